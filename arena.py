@@ -0,0 +1,323 @@
+from argparse import ArgumentParser
+from collections import Counter, deque
+from random import Random, randint
+from time import perf_counter
+from typing import Deque, List, Optional, Set, Tuple
+import pygame as pg
+from camera import Camera
+from free_cells import FreeCells
+from scheduler import FixedStepScheduler
+from spatial_index import ChunkIndex
+from text_cache import TextCache
+
+# Moves in tiles: up, down, left, right
+DIRECTIONS = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+
+
+class ArenaSnake:
+    def __init__(self, snake_id: int, bot: bool = True) -> None:
+        self.id = snake_id
+        self.bot = bot
+        # Tiles from tail to head
+        self.segments: Deque[Tuple[int, int]] = deque()
+        self.direction: Tuple[int, int] = (0, 0)
+        self.length: int = 0
+        self.score: int = 0
+        self.foods_eaten: int = 0
+        self.alive: bool = False
+        self.respawn_tick: int = 0
+        # Food the bot is heading for
+        self.target: Optional[Tuple[int, int]] = None
+
+    @property
+    def head(self) -> Tuple[int, int]:
+        return self.segments[-1]
+
+
+class ArenaEngine:
+    # Many snakes (bots and optionally a player) on one board with a shared food pool. All snakes
+    # move at the same time, then collisions are resolved through `bodies`, a count of segments on
+    # every tile shared by all snakes: a head dies if another head or any other segment is on its
+    # tile. Every check is a lookup, so a tick costs time linear in the segments that moved, not in
+    # pairs of snakes. Works on a tile grid like BatchSnakeEnv and needs no display.
+    def __init__(self, num_bots: int, size: Tuple[int, int] = (200, 150), player: bool = True, seed: Optional[int] = None,
+                 food_count: Optional[int] = None, start_length: int = 3, length_inc: int = 1, score_inc: int = 1,
+                 respawn_delay: int = 20) -> None:
+        self.cols, self.rows = size
+        self.seed: int = randint(0, 1000000) if seed is None else seed
+        self.RNG = Random(self.seed)
+        self.start_length = start_length
+        self.length_inc = length_inc
+        self.score_inc = score_inc
+        self.respawn_delay = respawn_delay
+        self.food_count = num_bots * 2 + 10 if food_count is None else food_count
+        self.ticks: int = 0
+
+        self.free_cells = FreeCells((x, y) for x in range(self.cols) for y in range(self.rows))
+        self.bodies: Counter = Counter()
+        self.foods: Set[Tuple[int, int]] = set()
+        # Foods by chunk, so bots only look at the food near them
+        self.food_chunks = ChunkIndex(8)
+        # Segments by chunk as (x, y, snake id), only kept once a view needs it (see track_chunks)
+        self.body_chunks: Optional[ChunkIndex] = None
+
+        self.snakes: List[ArenaSnake] = []
+        self.player: Optional[ArenaSnake] = None
+        if player:
+            self.player = ArenaSnake(0, bot=False)
+            self.snakes.append(self.player)
+        self.snakes += [ArenaSnake(len(self.snakes) + number) for number in range(num_bots)]
+        for snake in self.snakes:
+            self.spawn(snake)
+        self.spawn_food()
+
+    def spawn(self, snake: ArenaSnake) -> bool:
+        cells = self.free_cells.sample(1, self.RNG)
+        if not cells:
+            return False
+        # sample() blocked the cell, add_segment blocks it again for the snake
+        self.free_cells.unblock(cells[0])
+        snake.segments.clear()
+        self.add_segment(snake, cells[0])
+        snake.direction = self.RNG.choice(DIRECTIONS) if snake.bot else (0, 0)
+        snake.length = self.start_length
+        snake.score = 0
+        snake.foods_eaten = 0
+        snake.target = None
+        snake.alive = True
+        return True
+
+    def add_segment(self, snake: ArenaSnake, tile: Tuple[int, int]) -> None:
+        snake.segments.append(tile)
+        self.bodies[tile] += 1
+        self.free_cells.block(tile)
+        if self.body_chunks is not None:
+            self.body_chunks.add((tile[0], tile[1], snake.id))
+
+    def remove_tail(self, snake: ArenaSnake) -> Tuple[int, int]:
+        tile = snake.segments.popleft()
+        count = self.bodies[tile] - 1
+        if count:
+            self.bodies[tile] = count
+        else:
+            del self.bodies[tile]
+        self.free_cells.unblock(tile)
+        if self.body_chunks is not None:
+            self.body_chunks.remove((tile[0], tile[1], snake.id))
+        return tile
+
+    def add_food(self, tile: Tuple[int, int]) -> None:
+        # The cell has to be blocked for the food already
+        self.foods.add(tile)
+        self.food_chunks.add(tile)
+
+    def remove_food(self, tile: Tuple[int, int]) -> None:
+        self.foods.remove(tile)
+        self.food_chunks.remove(tile)
+        self.free_cells.unblock(tile)
+
+    def spawn_food(self) -> None:
+        for tile in self.free_cells.sample(self.food_count - len(self.foods), self.RNG):
+            self.add_food(tile)
+
+    def in_bounds(self, tile: Tuple[int, int]) -> bool:
+        return 0 <= tile[0] < self.cols and 0 <= tile[1] < self.rows
+
+    def turn(self, snake: ArenaSnake, direction: Tuple[int, int]) -> bool:
+        # Same rule as SnakeEngine.turn, no turning back into yourself
+        if direction == (-snake.direction[0], -snake.direction[1]) and len(snake.segments) > 1:
+            return False
+        snake.direction = direction
+        return True
+
+    def find_target(self, snake: ArenaSnake, radius: int = 12) -> Optional[Tuple[int, int]]:
+        head = snake.head
+        area = pg.Rect(head[0] - radius, head[1] - radius, radius * 2 + 1, radius * 2 + 1)
+        return min(self.food_chunks.query(area), key=lambda food: abs(food[0] - head[0]) + abs(food[1] - head[1]), default=None)
+
+    def bot_direction(self, snake: ArenaSnake) -> Tuple[int, int]:
+        # Greedy: towards the nearest food around it, never onto a wall or a segment if it can help it
+        if snake.target not in self.foods:
+            snake.target = self.find_target(snake)
+        head = snake.head
+        best, best_cost = snake.direction, None
+        for direction in DIRECTIONS:
+            if direction == (-snake.direction[0], -snake.direction[1]):
+                continue
+            tile = (head[0] + direction[0], head[1] + direction[1])
+            if not self.in_bounds(tile) or tile in self.bodies:
+                continue
+            if snake.target is None:
+                # Wander, mostly straight on
+                cost = 0 if direction == snake.direction else 1 + self.RNG.random()
+            else:
+                cost = abs(snake.target[0] - tile[0]) + abs(snake.target[1] - tile[1]) + self.RNG.random() * 0.5
+            if best_cost is None or cost < best_cost:
+                best, best_cost = direction, cost
+        return best
+
+    def kill(self, snake: ArenaSnake) -> None:
+        # Every other segment of a dead snake is left behind as food
+        for number, tile in enumerate(list(snake.segments)):
+            self.remove_tail(snake)
+            if number % 2 == 0 and tile in self.free_cells:
+                self.free_cells.block(tile)
+                self.add_food(tile)
+        snake.alive = False
+        snake.respawn_tick = self.ticks + self.respawn_delay
+
+    def step(self, player_direction: Optional[Tuple[int, int]] = None) -> bool:
+        # Advance every snake by one tick, returns True if the player died on this tick
+        if player_direction is not None and self.player is not None and self.player.alive:
+            self.turn(self.player, player_direction)
+
+        # Everyone picks a move first, so the order of the snakes doesn't matter
+        moving = [snake for snake in self.snakes if snake.alive and snake.direction != (0, 0)]
+        for snake in moving:
+            if snake.bot:
+                snake.direction = self.bot_direction(snake)
+        new_heads = [(snake.head[0] + snake.direction[0], snake.head[1] + snake.direction[1]) for snake in moving]
+
+        # Move: tails leave before heads arrive, so following a tail is allowed
+        dead = []
+        for snake, head in zip(moving, new_heads):
+            if not self.in_bounds(head):
+                dead.append(snake)
+                continue
+            while len(snake.segments) >= snake.length:
+                self.remove_tail(snake)
+        heads = Counter()
+        for snake, head in zip(moving, new_heads):
+            if snake.alive and self.in_bounds(head):
+                self.add_segment(snake, head)
+                heads[head] += 1
+
+        # Collisions: more than one head on a tile is head-on, more segments than heads means a body was hit
+        for snake, head in zip(moving, new_heads):
+            if self.in_bounds(head) and (heads[head] > 1 or self.bodies[head] > heads[head]):
+                dead.append(snake)
+        for snake in dead:
+            self.kill(snake)
+
+        # Eating
+        for snake, head in zip(moving, new_heads):
+            if snake.alive and head in self.foods:
+                self.remove_food(head)
+                snake.length += self.length_inc
+                snake.score += self.score_inc
+                snake.foods_eaten += 1
+
+        self.ticks += 1
+        for snake in self.snakes:
+            if not snake.alive and snake.bot and snake.respawn_tick <= self.ticks:
+                self.spawn(snake)
+        self.spawn_food()
+        return self.player is not None and self.player in dead
+
+    def track_chunks(self, chunk_size: int) -> None:
+        self.body_chunks = ChunkIndex(chunk_size)
+        for snake in self.snakes:
+            for tile in snake.segments:
+                self.body_chunks.add((tile[0], tile[1], snake.id))
+
+    @property
+    def segment_count(self) -> int:
+        return sum(self.bodies.values())
+
+
+class ArenaView:
+    # Window for the arena: the player's snake in the middle of a scrolling view, every bot in its own colour
+    def __init__(self, arena: ArenaEngine, resolution=(800, 650), tile: int = 20, tick_ms: int = 100) -> None:
+        pg.init()
+        self.arena = arena
+        self.tile = tile
+        self.screen = pg.display.set_mode(resolution, pg.SCALED | pg.DOUBLEBUF)
+        pg.display.set_caption('Snake Arena')
+        self.clock = pg.time.Clock()
+        self.camera = Camera(resolution, (arena.cols * tile, arena.rows * tile))
+        self.scheduler = FixedStepScheduler(tick_ms)
+        self.font = pg.font.Font(None, 30)
+        self.text_cache = TextCache()
+        self.keys = {pg.K_w: (0, -1), pg.K_s: (0, 1), pg.K_a: (-1, 0), pg.K_d: (1, 0),
+                     pg.K_UP: (0, -1), pg.K_DOWN: (0, 1), pg.K_LEFT: (-1, 0), pg.K_RIGHT: (1, 0)}
+        self.next_direction: Optional[Tuple[int, int]] = None
+        self.tick_ms: float = 0
+
+        # One tile per snake colour, the player is green like the normal game
+        rng = Random(arena.seed)
+        self.tiles = []
+        for snake in arena.snakes:
+            surface = pg.Surface((tile - 2, tile - 2)).convert()
+            surface.fill((0, 205, 0) if not snake.bot else (rng.randrange(60, 256), rng.randrange(60, 256), rng.randrange(60, 256)))
+            self.tiles.append(surface)
+        self.food_tile = pg.Surface((tile - 6, tile - 6)).convert()
+        self.food_tile.fill((255, 0, 0))
+        # Segments are culled by chunk like the foods
+        arena.track_chunks(8)
+
+    def tick(self) -> bool:
+        start = perf_counter()
+        died = self.arena.step(self.next_direction)
+        self.next_direction = None
+        self.tick_ms = (perf_counter() - start) * 1000
+        if died:
+            self.arena.spawn(self.arena.player)
+        return False
+
+    def draw(self) -> None:
+        arena, tile = self.arena, self.tile
+        self.screen.fill((0, 0, 0))
+        if arena.player is not None and arena.player.alive:
+            head = arena.player.head
+            self.camera.follow((head[0] * tile + tile // 2, head[1] * tile + tile // 2))
+        view = self.camera.rect
+        # Only the chunks in view are looked at, however many snakes there are
+        left, top, right, bottom = view.left // tile - 1, view.top // tile - 1, view.right // tile + 1, view.bottom // tile + 1
+        area = pg.Rect(left, top, right - left, bottom - top)
+        blits = [(self.food_tile, (x * tile + 3 - view.left, y * tile + 3 - view.top))
+                 for x, y in arena.food_chunks.query(area)]
+        blits += [(self.tiles[snake_id], (x * tile + 1 - view.left, y * tile + 1 - view.top))
+                  for x, y, snake_id in arena.body_chunks.query(area)]
+        self.screen.blits(blits, doreturn=False)
+        pg.draw.rect(self.screen, (0, 130, 0), self.camera.to_screen(pg.Rect(0, 0, arena.cols * tile, arena.rows * tile)), 1)
+
+        alive = sum(snake.alive for snake in arena.snakes)
+        lines = [f"Score: {arena.player.score if arena.player else 0}",
+                 f"Snakes: {alive} / {len(arena.snakes)}",
+                 f"Tick: {self.tick_ms:.1f} ms"]
+        for number, text in enumerate(lines):
+            self.screen.blit(self.text_cache.render(self.font, text), (10, 10 + number * 25))
+        pg.display.flip()
+
+    def run(self) -> None:
+        frame_time = 0
+        while True:
+            for event in pg.event.get():
+                if event.type == pg.QUIT or (event.type == pg.KEYDOWN and event.key == pg.K_ESCAPE):
+                    return
+                if event.type == pg.KEYDOWN and event.key in self.keys:
+                    self.next_direction = self.keys[event.key]
+            self.scheduler.update(frame_time, self.tick)
+            self.draw()
+            frame_time = self.clock.tick(60)
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Snake arena: you against a lot of bots on one big board')
+    parser.add_argument('--bots', type=int, default=200, help='number of bots (default 200)')
+    parser.add_argument('--size', default='200x150', metavar='COLSxROWS', help='board size in tiles (default 200x150)')
+    parser.add_argument('--seed', type=int, help='random seed')
+    parser.add_argument('--headless', type=int, metavar='TICKS', help='run this many ticks with bots only and print the tick rate')
+    args = parser.parse_args()
+    size = tuple(int(tiles) for tiles in args.size.lower().split('x'))
+
+    if args.headless is None:
+        ArenaView(ArenaEngine(args.bots, size, seed=args.seed)).run()
+    else:
+        arena = ArenaEngine(args.bots, size, player=False, seed=args.seed)
+        start = perf_counter()
+        for _ in range(args.headless):
+            arena.step()
+        elapsed = perf_counter() - start
+        print(f"{args.headless} ticks, {args.headless / elapsed:.0f} ticks/s, {elapsed / args.headless * 1000:.2f} ms/tick, "
+              f"{arena.segment_count} segments, {sum(snake.alive for snake in arena.snakes)} snakes alive")
@@ -0,0 +1,161 @@
+import hashlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from os import makedirs, path, replace
+from struct import Struct
+from time import perf_counter
+from typing import Dict, Optional, Tuple
+import pygame as pg
+
+# Header of a cached image: width, height, pitch, bits per pixel, RGBA masks, then the surface's raw pixels
+IMAGE_HEADER = Struct('<IIIIIIII')
+
+
+class LazySound:
+    # A sound that is decoded in the background, playing it before it is ready does nothing. One that
+    # can't be loaded (missing file, no audio device) is reported when that happens and never plays
+    def __init__(self, future: Future, name: str) -> None:
+        self.future = future
+        self.name = name
+        future.add_done_callback(self.loaded)
+
+    @property
+    def ready(self) -> bool:
+        return self.future.done()
+
+    @property
+    def failed(self) -> bool:
+        return self.future.done() and (self.future.cancelled() or self.future.exception() is not None)
+
+    def loaded(self, future: Future) -> None:
+        # Runs on the loading thread
+        if not future.cancelled() and future.exception() is not None:
+            print(f"Note: {self.name} can't be played: {future.exception()}")
+
+    def get(self) -> Optional[pg.mixer.Sound]:
+        # Waits for the sound, None if it couldn't be loaded
+        if self.future.cancelled() or self.future.exception() is not None:
+            return None
+        return self.future.result()
+
+    def play(self) -> None:
+        if self.future.done() and not self.failed:
+            self.future.result().play()
+
+
+class AssetLoader:
+    # Fonts, sounds and images are only loaded when they are first asked for, sounds and images
+    # are decoded on background threads. Decoded sounds and display-format images are also kept
+    # in cache_dir, so later startups copy raw bytes instead of decoding WAV and PNG files.
+    def __init__(self, asset_dir: str = 'assets', cache_dir: Optional[str] = '.asset_cache', workers: int = 2) -> None:
+        self.asset_dir = asset_dir
+        self.cache_dir = cache_dir
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='assets')
+        self.fonts: Dict[int, pg.font.Font] = {}
+        self.sounds: Dict[str, LazySound] = {}
+        self.pending_images: Dict[Tuple[str, bool], Future] = {}
+        self.images: Dict[Tuple[str, bool], pg.Surface] = {}
+        # How long each asset took to load in ms, for the startup report
+        self.load_times: Dict[str, float] = {}
+
+    def font(self, size: int) -> pg.font.Font:
+        # SysFont(None, size) ends up with this same built-in font, but only after scanning every system font
+        if size not in self.fonts:
+            start = perf_counter()
+            self.fonts[size] = pg.font.Font(None, size)
+            self.load_times[f"font {size}"] = (perf_counter() - start) * 1000
+        return self.fonts[size]
+
+    def sound(self, name: str) -> LazySound:
+        if name not in self.sounds:
+            self.sounds[name] = LazySound(self.executor.submit(self.load_sound, name), name)
+        return self.sounds[name]
+
+    def preload_image(self, name: str, alpha: bool = True) -> None:
+        # Needs the display mode to be set, the cache holds pixels in the display's format
+        key = (name, alpha)
+        if key not in self.images and key not in self.pending_images:
+            self.pending_images[key] = self.executor.submit(self.read_image, name, alpha, self.image_format(alpha))
+
+    def image(self, name: str, alpha: bool = True) -> pg.Surface:
+        key = (name, alpha)
+        if key in self.images:
+            return self.images[key]
+        self.preload_image(name, alpha)
+        cached, surface = self.pending_images.pop(key).result()
+        # Converting has to happen on the main thread, a cached image already is in the display's format
+        if not cached:
+            start = perf_counter()
+            surface = surface.convert_alpha() if alpha else surface.convert()
+            self.load_times[name] += (perf_counter() - start) * 1000
+            self.executor.submit(self.write_image, name, self.image_format(alpha), surface.copy())
+        self.images[key] = surface
+        return surface
+
+    def wait(self) -> None:
+        # Block until everything queued so far is loaded
+        for sound in self.sounds.values():
+            sound.get()
+        for name, alpha in list(self.pending_images):
+            self.image(name, alpha)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def cache_path(self, name: str, *key) -> Optional[str]:
+        # Cache files are named after everything that changes their contents: the source file,
+        # the mixer or display format and the pygame version
+        if self.cache_dir is None:
+            return None
+        source = path.join(self.asset_dir, name)
+        stat = pg.version.ver, path.getmtime(source), path.getsize(source)
+        digest = hashlib.sha1(repr((name, stat, key)).encode()).hexdigest()[:16]
+        return path.join(self.cache_dir, f"{path.splitext(path.basename(name))[0]}-{digest}")
+
+    def write_cache(self, cache_path: Optional[str], data: bytes) -> None:
+        if cache_path is None:
+            return
+        try:
+            makedirs(self.cache_dir, exist_ok=True)
+            # Write then rename, so a half written file is never read back
+            with open(cache_path + '.tmp', 'wb') as f:
+                f.write(data)
+            replace(cache_path + '.tmp', cache_path)
+        except OSError:
+            pass
+
+    def load_sound(self, name: str) -> pg.mixer.Sound:
+        start = perf_counter()
+        cache_path = self.cache_path(name, pg.mixer.get_init())
+        if cache_path is not None and path.exists(cache_path):
+            with open(cache_path, 'rb') as f:
+                sound = pg.mixer.Sound(buffer=f.read())
+        else:
+            sound = pg.mixer.Sound(path.join(self.asset_dir, name))
+            self.write_cache(cache_path, sound.get_raw())
+        self.load_times[name] = (perf_counter() - start) * 1000
+        return sound
+
+    def image_format(self, alpha: bool) -> Tuple:
+        display = pg.display.get_surface()
+        return alpha, display.get_bitsize(), display.get_masks()
+
+    def read_image(self, name: str, alpha: bool, image_format: Tuple) -> Tuple[bool, pg.Surface]:
+        start = perf_counter()
+        cache_path = self.cache_path(name, image_format)
+        if cache_path is not None and path.exists(cache_path):
+            with open(cache_path, 'rb') as f:
+                data = f.read()
+            width, height, pitch, bitsize, *masks = IMAGE_HEADER.unpack_from(data)
+            surface = pg.Surface((width, height), pg.SRCALPHA if alpha else 0, bitsize, masks)
+            # A different pitch means the surface came out in another layout, decode the file instead
+            if surface.get_pitch() == pitch:
+                surface.get_buffer().write(data[IMAGE_HEADER.size:])
+                self.load_times[name] = (perf_counter() - start) * 1000
+                return True, surface
+        surface = pg.image.load(path.join(self.asset_dir, name))
+        self.load_times[name] = (perf_counter() - start) * 1000
+        return False, surface
+
+    def write_image(self, name: str, image_format: Tuple, surface: pg.Surface) -> None:
+        header = IMAGE_HEADER.pack(*surface.get_size(), surface.get_pitch(), surface.get_bitsize(), *surface.get_masks())
+        self.write_cache(self.cache_path(name, image_format), header + surface.get_buffer().raw)
@@ -0,0 +1,197 @@
+from collections import deque
+from itertools import combinations, islice
+from math import hypot
+from typing import Deque, Dict, FrozenSet, List, Optional, Tuple
+import pygame as pg
+
+# Directions between neighbouring segments in tiles, the snake can also move diagonally (Q and E)
+DIRECTIONS = [(0, -1), (0, 1), (-1, 0), (1, 0), (-1, -1), (1, -1), (-1, 1), (1, 1)]
+DIRECTION_SET = frozenset(DIRECTIONS)
+FOOD_TEXTURES = [f'food (unused textures)/food_{number}.png' for number in (1, 2, 3)]
+
+
+class SpriteAtlas:
+    # Every tile the game draws, packed into one display-converted surface. Food comes from the
+    # textures in assets, the snake tiles are drawn here: a body tile for every pair of directions
+    # it connects (straight pieces and corners), tail ends with one connection, and the head facing
+    # each direction. Blitting areas of one surface lets a whole frame go out in one blits call.
+    def __init__(self, game, columns: int = 16) -> None:
+        self.game = game
+        self.tile = game.TILE_SIZE
+        self.areas: Dict[Tuple, pg.Rect] = {}
+
+        keys: List[Tuple] = [('food', index, last) for index in range(len(FOOD_TEXTURES)) for last in (False, True)]
+        keys += [('head', facing) for facing in DIRECTIONS + [(0, 0)]]
+        keys += [('body', frozenset())] + [('body', frozenset([direction])) for direction in DIRECTIONS]
+        keys += [('body', frozenset(pair)) for pair in combinations(DIRECTIONS, 2)]
+
+        rows = -(-len(keys) // columns)
+        self.surface: pg.Surface = pg.Surface((columns * self.tile, rows * self.tile), pg.SRCALPHA)
+        for number, key in enumerate(keys):
+            self.areas[key] = pg.Rect(number % columns * self.tile, number // columns * self.tile, self.tile, self.tile)
+            tile = self.surface.subsurface(self.areas[key])
+            if key[0] == 'food':
+                self.draw_food(tile, *key[1:])
+            elif key[0] == 'head':
+                self.draw_head(tile, key[1])
+            else:
+                self.draw_body(tile, key[1])
+        self.surface = self.surface.convert_alpha()
+
+    def draw_food(self, tile: pg.Surface, index: int, last: bool) -> None:
+        texture = self.game.assets.image(FOOD_TEXTURES[index])
+        # Fit the texture into the tile, keeping its aspect ratio
+        scale = self.tile / max(texture.get_size())
+        size = (max(1, round(texture.get_width() * scale)), max(1, round(texture.get_height() * scale)))
+        texture = pg.transform.smoothscale(texture, size)
+        if last:
+            # The last food of a level is blue, like the flat rendering
+            texture.fill((90, 90, 255, 255), special_flags=pg.BLEND_RGBA_MULT)
+        tile.blit(texture, texture.get_rect(center=tile.get_rect().center))
+
+    def draw_connection(self, tile: pg.Surface, color, direction: Tuple[int, int], start_width: float, end_width: float) -> None:
+        # A band from the tile centre to the edge (or corner) of the tile in direction
+        half = self.tile / 2
+        length = hypot(*direction)
+        normal = (-direction[1] / length, direction[0] / length)
+        end = (half + direction[0] * half, half + direction[1] * half)
+        pg.draw.polygon(tile, color, [(half + normal[0] * start_width / 2, half + normal[1] * start_width / 2),
+                                      (end[0] + normal[0] * end_width / 2, end[1] + normal[1] * end_width / 2),
+                                      (end[0] - normal[0] * end_width / 2, end[1] - normal[1] * end_width / 2),
+                                      (half - normal[0] * start_width / 2, half - normal[1] * start_width / 2)])
+
+    def draw_body(self, tile: pg.Surface, connections: FrozenSet[Tuple[int, int]]) -> None:
+        width = self.tile * 0.7
+        center = (self.tile // 2, self.tile // 2)
+        if len(connections) == 1:
+            # Tail, narrowing towards its end
+            self.draw_connection(tile, self.game.GREEN, next(iter(connections)), width * 0.4, width)
+            pg.draw.circle(tile, self.game.GREEN, center, width * 0.2)
+            return
+        for direction in connections:
+            self.draw_connection(tile, self.game.GREEN, direction, width, width)
+        pg.draw.circle(tile, self.game.GREEN, center, width / 2)
+
+    def draw_head(self, tile: pg.Surface, facing: Tuple[int, int]) -> None:
+        center = (self.tile / 2, self.tile / 2)
+        if facing != (0, 0):
+            self.draw_connection(tile, self.game.DARK_GREEN, (-facing[0], -facing[1]), self.tile * 0.7, self.tile * 0.7)
+        pg.draw.circle(tile, self.game.DARK_GREEN, center, self.tile * 0.45)
+        # Eyes a bit ahead of the centre, on both sides of the facing direction
+        length = hypot(*facing) or 1
+        forward = (facing[0] / length, facing[1] / length) if facing != (0, 0) else (0, -1)
+        side = (-forward[1], forward[0])
+        for sign in (1, -1):
+            eye = (center[0] + forward[0] * self.tile * 0.15 + side[0] * sign * self.tile * 0.2,
+                   center[1] + forward[1] * self.tile * 0.15 + side[1] * sign * self.tile * 0.2)
+            pg.draw.circle(tile, 'white', eye, self.tile * 0.14)
+            pg.draw.circle(tile, 'black', (eye[0] + forward[0], eye[1] + forward[1]), self.tile * 0.07)
+
+
+class SpriteBatch:
+    # Blit list of the snake and food for one Surface.blits call. A segment's tile only depends on
+    # its neighbours, so only the ends of the list change when the snake moves: the new head, the
+    # segment that was the head and the new tail are looked up again, the rest is reused as is.
+    def __init__(self, game, atlas: SpriteAtlas) -> None:
+        self.game = game
+        self.atlas = atlas
+        # (atlas surface, top left, atlas area) for every segment from tail to head, like Snake.segments
+        self.entries: Deque[Tuple[pg.Surface, Tuple[int, int], pg.Rect]] = deque()
+        self.added: int = 0
+        # Atlas area by tile centre, for drawing the segments a camera sees
+        self.tile_areas: Dict[Tuple[int, int], pg.Rect] = {}
+        self.food_entries: List[Tuple[pg.Surface, Tuple[int, int], pg.Rect]] = []
+        self.indexed_foods: Optional[List[pg.Rect]] = None
+        self.indexed_version: int = -1
+
+    def direction(self, center: Tuple[int, int], neighbour: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        tile = self.atlas.tile
+        direction = ((neighbour[0] - center[0]) // tile, (neighbour[1] - center[1]) // tile)
+        # Anything else (like a snake moved back to the middle) is not drawn as connected
+        return direction if direction in DIRECTION_SET else None
+
+    def segment_entry(self, index: int) -> Tuple[pg.Surface, Tuple[int, int], pg.Rect]:
+        segments = self.game.snake.segments
+        segment = segments[index]
+        connections = set()
+        if index > 0:
+            connections.add(self.direction(segment.center, segments[index - 1].center))
+        if index < len(segments) - 1:
+            connections.add(self.direction(segment.center, segments[index + 1].center))
+        connections.discard(None)
+        area = self.atlas.areas.get(('body', frozenset(connections)), self.atlas.areas[('body', frozenset())])
+        self.tile_areas[segment.center] = area
+        return self.atlas.surface, segment.topleft, area
+
+    def sync_snake(self) -> None:
+        snake = self.game.snake
+        segments = snake.segments
+        added = snake.added - self.added
+        self.added = snake.added
+        if added == 0:
+            return
+        if added >= len(segments):
+            # Everything is new (a reset, or more moves than the snake is long)
+            self.tile_areas.clear()
+            self.entries = deque(self.segment_entry(index) for index in range(len(segments)))
+            return
+        # Drop what left at the tail end, then redo the old head and add the new segments
+        while len(self.entries) + added > len(segments):
+            _, topleft, _ = self.entries.popleft()
+            center = (topleft[0] + self.atlas.tile // 2, topleft[1] + self.atlas.tile // 2)
+            if center not in snake.occupancy:
+                self.tile_areas.pop(center, None)
+        first_new = len(segments) - added
+        if self.entries:
+            self.entries[-1] = self.segment_entry(first_new - 1)
+        self.entries.extend(self.segment_entry(index) for index in range(first_new, len(segments)))
+        # The tail end may have changed shape
+        self.entries[0] = self.segment_entry(0)
+
+    def sync_foods(self, foods: List[pg.Rect]) -> None:
+        # Same change detection as Food.get_chunks
+        version = self.game.foods.version
+        if foods is self.indexed_foods and version == self.indexed_version:
+            return
+        self.food_entries = [(self.atlas.surface, food.topleft, self.food_area(food.center, len(foods))) for food in foods]
+        self.indexed_foods, self.indexed_version = foods, version
+
+    def food_area(self, center: Tuple[int, int], food_count: int) -> pg.Rect:
+        # The texture is picked from the position, so a food keeps its look while it is on the board
+        index = (center[0] // self.atlas.tile * 7 + center[1] // self.atlas.tile * 13) % len(FOOD_TEXTURES)
+        return self.atlas.areas[('food', index, food_count == 1)]
+
+    def head_entry(self, alpha: float, camera=None) -> Tuple[pg.Surface, Tuple[int, int], pg.Rect]:
+        snake = self.game.snake
+        segments = snake.segments
+        facing = self.game.snake_dir[0] // self.atlas.tile, self.game.snake_dir[1] // self.atlas.tile
+        if len(segments) > 1:
+            facing = self.direction(segments[-2].center, segments[-1].center) or facing
+        head = snake._snake.copy()
+        head.center = snake.get_head_center(alpha)
+        if camera is not None:
+            head = camera.to_screen(head)
+        return self.atlas.surface, head.topleft, self.atlas.areas.get(('head', facing), self.atlas.areas[('head', (0, 0))])
+
+    def draw(self, surface: pg.Surface, foods: List[pg.Rect], alpha: float = 1.0, camera=None) -> None:
+        self.sync_snake()
+        if camera is None:
+            self.sync_foods(foods)
+            blits = self.food_entries + list(islice(self.entries, len(self.entries) - 1))
+        else:
+            blits = self.visible_entries(foods, camera)
+        blits.append(self.head_entry(alpha, camera))
+        surface.blits(blits, doreturn=False)
+
+    def visible_entries(self, foods: List[pg.Rect], camera) -> List[Tuple[pg.Surface, Tuple[int, int], pg.Rect]]:
+        game = self.game
+        atlas = self.atlas.surface
+        half = self.atlas.tile // 2
+        view = camera.visible_area(self.atlas.tile)
+        left, top = camera.rect.left + half, camera.rect.top + half
+        blits = [(atlas, (center[0] - left, center[1] - top), self.food_area(center, len(foods)))
+                 for center in game.foods.get_chunks(foods, camera.chunk_size).query(view)]
+        head = game.snake._snake.center
+        blits += [(atlas, (center[0] - left, center[1] - top), self.tile_areas[center])
+                  for center in game.snake.chunks.query(view) if center != head or game.snake.occupancy[center] > 1]
+        return blits
@@ -0,0 +1,383 @@
+from collections import Counter, deque
+from itertools import repeat
+from time import perf_counter
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+INF = 1 << 30
+# Cells an update gets through between looks at the clock
+STEPS = 256
+
+
+class DistanceField:
+    # Steps from every cell to the nearest source (food) on a grid with blocked cells (the snake).
+    # Instead of a new BFS every tick the field is repaired where it changed: a freed cell or a
+    # new source can only make distances shorter, which spreads out like a BFS from that cell,
+    # a blocked cell or a removed source makes longer the distances that depended on it, those
+    # cells are found first and then filled in again from their unaffected neighbours.
+    # Changes are queued and done by update(), a few steps at a time, so one that reaches far
+    # (or a rebuild of a huge board) is spread over as many ticks as it needs.
+    def __init__(self, size: int, around: Callable[[int], Tuple[int, ...]]) -> None:
+        # Neighbours of a cell are worked out by around() the first time it is looked at, a huge
+        # board costs nothing up front. Tuples, the garbage collector stops looking at those
+        self.neighbours: List[Optional[Tuple[int, ...]]] = [None] * size
+        self.around = around
+        self.dist: List[int] = [INF] * size
+        self.blocked: List[bool] = [False] * size
+        self.sources: Set[int] = set()
+        # Changes not done yet, oldest first. Each one pauses every STEPS cells
+        self.pending: Deque[Iterator[None]] = deque()
+
+    def neighbours_of(self, cell: int) -> Tuple[int, ...]:
+        around = self.neighbours[cell]
+        if around is None:
+            around = self.neighbours[cell] = self.around(cell)
+        return around
+
+    def update(self, deadline: float = float('inf')) -> bool:
+        # Carry on with the pending changes, True once the field is up to date
+        pending = self.pending
+        while pending:
+            for _ in pending[0]:
+                if perf_counter() > deadline:
+                    return False
+            pending.popleft()
+        return True
+
+    def reset(self, blocked: Iterable[int], sources: Iterable[int]) -> None:
+        # Start over, anything still pending is dropped
+        self.pending.clear()
+        self.pending.append(self.rebuild(list(blocked), set(sources)))
+
+    def block(self, cell: int) -> None:
+        self.pending.append(self.set_blocked(cell, True))
+
+    def unblock(self, cell: int) -> None:
+        self.pending.append(self.set_blocked(cell, False))
+
+    def add_source(self, cell: int) -> None:
+        self.pending.append(self.set_source(cell, True))
+
+    def remove_source(self, cell: int) -> None:
+        self.pending.append(self.set_source(cell, False))
+
+    def rebuild(self, blocked: List[int], sources: Set[int]) -> Iterator[None]:
+        # The old field is cleared a slice at a time too
+        dist, is_blocked = self.dist, self.blocked
+        for start in range(0, len(dist), STEPS * 16):
+            end = min(start + STEPS * 16, len(dist))
+            dist[start:end] = repeat(INF, end - start)
+            is_blocked[start:end] = repeat(False, end - start)
+            yield
+        for cell in blocked:
+            is_blocked[cell] = True
+        self.sources = sources
+        queue = deque(source for source in sources if not is_blocked[source])
+        for source in queue:
+            dist[source] = 0
+        yield from self.spread(queue)
+
+    def set_blocked(self, cell: int, blocked: bool) -> Iterator[None]:
+        self.blocked[cell] = blocked
+        yield from self.raise_(cell) if blocked else self.lower(cell)
+
+    def set_source(self, cell: int, source: bool) -> Iterator[None]:
+        if source:
+            self.sources.add(cell)
+            yield from self.lower(cell)
+        else:
+            self.sources.discard(cell)
+            yield from self.raise_(cell)
+
+    def spread(self, queue: Deque[int]) -> Iterator[None]:
+        # Lower the distances around the queued cells as far as they go down
+        dist, blocked, neighbours, neighbours_of = self.dist, self.blocked, self.neighbours, self.neighbours_of
+        steps = 0
+        while queue:
+            steps += 1
+            if steps % STEPS == 0:
+                yield
+            cell = queue.popleft()
+            step = dist[cell] + 1
+            for neighbour in neighbours[cell] or neighbours_of(cell):
+                if not blocked[neighbour] and step < dist[neighbour]:
+                    dist[neighbour] = step
+                    queue.append(neighbour)
+
+    def through_neighbours(self, cell: int, skip: Set[int] = frozenset()) -> int:
+        # Distance of cell going through its best neighbour
+        best = min((self.dist[neighbour] for neighbour in self.neighbours_of(cell)
+                    if not self.blocked[neighbour] and neighbour not in skip), default=INF)
+        return best + 1 if best < INF else INF
+
+    def lower(self, cell: int) -> Iterator[None]:
+        # cell was freed or became a source
+        if self.blocked[cell]:
+            return
+        self.dist[cell] = 0 if cell in self.sources else self.through_neighbours(cell)
+        if self.dist[cell] < INF:
+            yield from self.spread(deque([cell]))
+
+    def raise_(self, cell: int) -> Iterator[None]:
+        # cell was blocked or stopped being a source, everything whose shortest path went through it is redone
+        dist, blocked, neighbours, neighbours_of, sources = self.dist, self.blocked, self.neighbours, self.neighbours_of, self.sources
+        level = dist[cell]
+        if level >= INF:
+            if blocked[cell]:
+                dist[cell] = INF
+            return
+        # Found a level at a time going outwards, so a cell is only judged once the level before it is known
+        affected = {cell}
+        current_level = [cell]
+        steps = 0
+        while current_level:
+            next_level = []
+            for current in current_level:
+                steps += 1
+                if steps % STEPS == 0:
+                    yield
+                for neighbour in neighbours[current] or neighbours_of(current):
+                    if neighbour in affected or blocked[neighbour] or neighbour in sources or dist[neighbour] != level + 1:
+                        continue
+                    # Still fine if another neighbour one step closer to a source is left
+                    for other in neighbours[neighbour] or neighbours_of(neighbour):
+                        if dist[other] == level and other not in affected and not blocked[other]:
+                            break
+                    else:
+                        affected.add(neighbour)
+                        next_level.append(neighbour)
+            current_level = next_level
+            level += 1
+
+        # Fill them in again from the unaffected cells around them, closest first. All steps cost
+        # the same, so lists per distance do the job of a priority queue.
+        for current in affected:
+            steps += 1
+            if steps % STEPS == 0:
+                yield
+            dist[current] = INF
+        buckets: Dict[int, List[int]] = {}
+        for current in affected:
+            steps += 1
+            if steps % STEPS == 0:
+                yield
+            if blocked[current]:
+                continue
+            dist[current] = 0 if current in sources else self.through_neighbours(current, affected)
+            if dist[current] < INF:
+                buckets.setdefault(dist[current], []).append(current)
+        level = min(buckets, default=0)
+        while buckets:
+            for current in buckets.pop(level, ()):
+                steps += 1
+                if steps % STEPS == 0:
+                    yield
+                if dist[current] != level:
+                    continue
+                for neighbour in neighbours[current] or neighbours_of(current):
+                    if not blocked[neighbour] and level + 1 < dist[neighbour]:
+                        dist[neighbour] = level + 1
+                        buckets.setdefault(level + 1, []).append(neighbour)
+            level += 1
+
+
+class Autopilot:
+    # Steers the snake to the nearest food along the distance field, only taking moves that keep a
+    # way back to its own tail. The field is updated from what changed since the last tick (head,
+    # tail, foods). Everything runs against a time budget: if the field can't be brought up to date
+    # in time the rest waits for the next tick and the safest looking move is taken instead.
+    # Usable as a tournament bot (create_bot) and as the game's demo mode.
+    def __init__(self, engine, budget_ms: float = 2.0) -> None:
+        self.engine = engine
+        self.budget_ms = budget_ms
+        tile = engine.TILE_SIZE
+
+        # Every tile the head can move to, numbered row by row. That is the grid food spawns on plus
+        # the strip along the walls food never spawns in
+        self.origin, self.cols, self.rows = engine.head_tiles()
+        self.field = DistanceField(self.cols * self.rows, self.around)
+        self.directions = [(0, -tile), (0, tile), (-tile, 0), (tile, 0)]
+
+        # What the field was last updated with
+        self.body: Deque[Tuple[int, int]] = deque()
+        self.body_count: Counter = Counter()
+        self.added: int = 0
+        self.foods: Set[int] = set()
+        # Ticks the fallback move was used, for checking the budget is big enough
+        self.fallbacks: int = 0
+
+    def cell_at(self, position: Tuple[int, int]) -> Optional[int]:
+        # None off the grid
+        tile = self.engine.TILE_SIZE
+        x, y = position[0] - self.origin[0], position[1] - self.origin[1]
+        if x % tile or y % tile:
+            return None
+        col, row = x // tile, y // tile
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            return row * self.cols + col
+        return None
+
+    def center(self, cell: int) -> Tuple[int, int]:
+        tile = self.engine.TILE_SIZE
+        row, col = divmod(cell, self.cols)
+        return (self.origin[0] + col * tile, self.origin[1] + row * tile)
+
+    def around(self, cell: int) -> Tuple[int, ...]:
+        # Up, down, left, right, as far as the grid goes
+        row, col = divmod(cell, self.cols)
+        neighbours = []
+        if row > 0:
+            neighbours.append(cell - self.cols)
+        if row < self.rows - 1:
+            neighbours.append(cell + self.cols)
+        if col > 0:
+            neighbours.append(cell - 1)
+        if col < self.cols - 1:
+            neighbours.append(cell + 1)
+        return tuple(neighbours)
+
+    def cells_at(self, positions: Iterable[Tuple[int, int]]) -> Set[int]:
+        return {cell for cell in map(self.cell_at, positions) if cell is not None}
+
+    def block_body(self, center: Tuple[int, int]) -> None:
+        self.body.append(center)
+        self.body_count[center] += 1
+        cell = self.cell_at(center)
+        if self.body_count[center] == 1 and cell is not None:
+            self.field.block(cell)
+
+    def unblock_body(self) -> None:
+        center = self.body.popleft()
+        self.body_count[center] -= 1
+        if self.body_count[center] == 0:
+            del self.body_count[center]
+            cell = self.cell_at(center)
+            if cell is not None:
+                self.field.unblock(cell)
+
+    def sync(self) -> None:
+        # Queue what changed in the engine since the last call as field changes
+        snake = self.engine.snake
+        segments = snake.segments
+        added = snake.added - self.added
+        self.added = snake.added
+        if added > len(segments):
+            # More moves than the snake is long, start over. A reset to one segment is still just a
+            # head added and an old body taken away, and a restored save-state (Snake.set_body adds
+            # the whole new body) takes the whole old body away and adds the new one
+            self.body.clear()
+            self.body_count.clear()
+            for segment in segments:
+                self.body_count[segment.center] += 1
+                self.body.append(segment.center)
+            self.foods = self.cells_at(food.center for food in self.engine.foods.foods)
+            self.field.reset(self.cells_at(self.body_count), self.foods)
+        else:
+            while len(self.body) + added > len(segments):
+                self.unblock_body()
+            for index in range(len(segments) - added, len(segments)):
+                self.block_body(segments[index].center)
+
+        foods = self.cells_at(food.center for food in self.engine.foods.foods)
+        if foods != self.foods:
+            for cell in self.foods - foods:
+                self.field.remove_source(cell)
+            for cell in foods - self.foods:
+                self.field.add_source(cell)
+            self.foods = foods
+
+    def candidates(self) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+        # (direction, new head) for every move that doesn't hit a wall or the body right away
+        engine = self.engine
+        head = engine.snake._snake.center
+        half = engine.TILE_SIZE // 2
+        # The tail moves out of the way unless the snake is growing
+        tail = engine.snake.segments[0].center if len(engine.snake.segments) >= engine.length else None
+        moves = []
+        for direction in self.directions:
+            if direction == (-engine.snake_dir[0], -engine.snake_dir[1]) and engine.length > 1:
+                continue
+            x, y = head[0] + direction[0], head[1] + direction[1]
+            if x - half < 0 or x + half > engine.width or y - half < 0 or y + half > engine.height:
+                continue
+            count = self.body_count.get((x, y), 0)
+            if count and not (count == 1 and (x, y) == tail and len(engine.snake.segments) > 1):
+                continue
+            moves.append((direction, (x, y)))
+        return moves
+
+    def reaches_tail(self, start: Tuple[int, int], deadline: float, searched: List[Tuple[Set[int], bool]]) -> Optional[bool]:
+        # Can the snake still get to its tail after moving its head to start? None if out of time.
+        # The answer is the same for every start in one open area, searched keeps the areas seen this tick.
+        engine = self.engine
+        segments = engine.snake.segments
+        start_cell = self.cell_at(start)
+        if start_cell is None:
+            # Off the board, the snake can't go there at all
+            return False
+        if len(segments) < 2:
+            return True
+        tail = self.cell_at(segments[0].center)
+        field = self.field
+        blocked, neighbours, neighbours_of = field.blocked, field.neighbours, field.neighbours_of
+        for area, reaches in searched:
+            if start_cell in area:
+                return reaches
+        seen = {start_cell}
+        queue = deque([start_cell])
+        visited = 0
+        while queue:
+            cell = queue.popleft()
+            visited += 1
+            if visited % 64 == 0 and perf_counter() > deadline:
+                return None
+            for neighbour in neighbours[cell] or neighbours_of(cell):
+                if neighbour == tail:
+                    searched.append((seen, True))
+                    return True
+                if neighbour not in seen and not blocked[neighbour]:
+                    seen.add(neighbour)
+                    queue.append(neighbour)
+        searched.append((seen, False))
+        return False
+
+    def free_neighbours(self, position: Tuple[int, int]) -> int:
+        # Uses the body rather than the field, which may be behind when this is needed
+        cell = self.cell_at(position)
+        if cell is None:
+            return 0
+        return sum(self.center(neighbour) not in self.body_count for neighbour in self.field.neighbours_of(cell))
+
+    def distance(self, position: Tuple[int, int]) -> int:
+        cell = self.cell_at(position)
+        return INF if cell is None else self.field.dist[cell]
+
+    def __call__(self) -> Optional[Tuple[int, int]]:
+        deadline = perf_counter() + self.budget_ms / 1000
+        self.sync()
+        moves = self.candidates()
+        if not moves:
+            return None
+        if self.field.update(deadline):
+            searched: List[Tuple[Set[int], bool]] = []
+            moves.sort(key=lambda move: (self.distance(move[1]), move[0] != self.engine.snake_dir))
+            for direction, head in moves:
+                if self.distance(head) >= INF:
+                    break
+                reaches = self.reaches_tail(head, deadline, searched)
+                if reaches is None:
+                    break
+                if reaches:
+                    return direction
+            # No food to go for safely: follow the tail (any move that keeps it in reach) until one turns up
+            for direction, head in moves:
+                if self.reaches_tail(head, deadline, searched):
+                    return direction
+        # Out of time (the field is still being updated) or out of options: the move with the most
+        # room around it, straight on if tied
+        self.fallbacks += 1
+        return max(moves, key=lambda move: (self.free_neighbours(move[1]), move[0] == self.engine.snake_dir))[0]
+
+
+def create_bot(engine, budget_ms: float = 2.0) -> Autopilot:
+    # For tournament.py
+    return Autopilot(engine, budget_ms)
@@ -17,7 +17,7 @@ class BaseObject:
         if hasattr(self, "_valid_positions"):
             return self._valid_positions
         # Adjust the range to account for the size of the object
-        valid_positions = [(x, y) for x in range(self.RANGE[0], self.RANGE[1] - self.TILE_SIZE, self.TILE_SIZE)
-                                  for y in range(self.RANGE[2], self.RANGE[3] - self.TILE_SIZE, self.TILE_SIZE)]
+        valid_positions = [(x, y) for x in range(self.RANGE[0] + self.TILE_SIZE, self.RANGE[1] - self.TILE_SIZE, self.TILE_SIZE)
+                                  for y in range(self.RANGE[2] + self.TILE_SIZE, self.RANGE[3] - self.TILE_SIZE, self.TILE_SIZE)]
         self._valid_positions = valid_positions
         return valid_positions
@@ -0,0 +1,147 @@
+from typing import Optional, Tuple
+import numpy as np
+from engine import SnakeEngine
+
+# Board cell values
+EMPTY, SNAKE, FOOD = 0, 1, 2
+
+# Actions: up, down, left, right (in tiles)
+DIRECTIONS = np.array([(0, -1), (0, 1), (-1, 0), (1, 0)], dtype=np.int32)
+
+
+class BatchSnakeEnv:
+    # Steps many games at once with the same rules as SnakeEngine, but on a tile grid held in
+    # NumPy arrays. The grid, the start tile and the tiles food spawns on are taken from an engine
+    # with the same resolution, for 800x650 that is a 39x32 board with food on the 37x30 inside it.
+    def __init__(self, num_games: int, resolution: Tuple[int, int] = (800, 650), seed: Optional[int] = None,
+                 length_inc: int = 1, score_inc: int = 1) -> None:
+        self.num_games = num_games
+        engine = SnakeEngine(resolution, 0)
+        tile = engine.TILE_SIZE
+        origin, self.cols, self.rows = engine.head_tiles()
+        self.cells = self.cols * self.rows
+        start = engine.snake._snake.center
+        self.start_x, self.start_y = (start[0] - origin[0]) // tile, (start[1] - origin[1]) // tile
+        self.spawnable = np.zeros(self.cells, dtype=bool)
+        for x, y in engine.free_cells.positions:
+            self.spawnable[(y - origin[1]) // tile * self.cols + (x - origin[0]) // tile] = True
+        self.length_inc = length_inc
+        self.score_inc = score_inc
+        self.RNG = np.random.default_rng(seed)
+
+        self.board = np.zeros((num_games, self.cells), dtype=np.int8)
+        # Snake bodies are ring buffers of cell indices, the head is at head_ptr and the tail at tail_ptr
+        self.body = np.zeros((num_games, self.cells), dtype=np.int32)
+        self.head_ptr = np.zeros(num_games, dtype=np.int32)
+        self.tail_ptr = np.zeros(num_games, dtype=np.int32)
+        self.size = np.zeros(num_games, dtype=np.int32)
+        self.head_x = np.zeros(num_games, dtype=np.int32)
+        self.head_y = np.zeros(num_games, dtype=np.int32)
+        self.dir = np.zeros((num_games, 2), dtype=np.int32)
+
+        self.length = np.zeros(num_games, dtype=np.int32)
+        self.score = np.zeros(num_games, dtype=np.int32)
+        self.level = np.zeros(num_games, dtype=np.int32)
+        self.foods_left = np.zeros(num_games, dtype=np.int32)
+        self.foods_eaten = np.zeros(num_games, dtype=np.int32)
+        self.ticks = np.zeros(num_games, dtype=np.int32)
+
+        # Stats of the last finished game of each slot, filled in before an auto-reset
+        self.final_score = np.zeros(num_games, dtype=np.int32)
+        self.final_level = np.zeros(num_games, dtype=np.int32)
+        self.final_foods_eaten = np.zeros(num_games, dtype=np.int32)
+        self.final_ticks = np.zeros(num_games, dtype=np.int32)
+
+        self._all = np.arange(num_games)
+        self.reset()
+
+    def reset(self, games: Optional[np.ndarray] = None) -> None:
+        games = self._all if games is None else games
+        if len(games) == 0:
+            return
+        self.board[games] = EMPTY
+        self.head_x[games] = self.start_x
+        self.head_y[games] = self.start_y
+        head = self.head_y[games] * self.cols + self.head_x[games]
+        self.body[games, 0] = head
+        self.board[games, head] = SNAKE
+        self.head_ptr[games] = 0
+        self.tail_ptr[games] = 0
+        self.size[games] = 1
+        self.dir[games] = 0
+
+        self.length[games] = 1
+        self.score[games] = 0
+        self.level[games] = 1
+        self.foods_eaten[games] = 0
+        self.ticks[games] = 0
+        self.foods_left[games] = 0
+        self.spawn_food(games, np.full(len(games), 5))
+
+    def spawn_food(self, games: np.ndarray, amounts: np.ndarray) -> np.ndarray:
+        # Uniform sampling without replacement among free food tiles: give every free one a random key and
+        # take the smallest ones. If the board is fuller than the request, only the free ones get food.
+        # Returns how many foods each game got
+        keys = self.RNG.random((len(games), self.cells))
+        taken = (self.board[games] != EMPTY) | ~self.spawnable
+        keys[taken] = 2.0
+        order = np.argsort(keys, axis=1)
+        amounts = np.minimum(amounts, self.cells - taken.sum(axis=1))
+        picked = np.arange(self.cells) < amounts[:, None]
+        self.board[np.repeat(games, amounts), order[picked]] = FOOD
+        self.foods_left[games] += amounts
+        return amounts
+
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Advance every game by one tick. Returns the score gained and whether each game ended,
+        # finished games are reset straight away like handle_collision(force_restart=True).
+        new_dir = DIRECTIONS[actions]
+        # The snake can't turn back into itself
+        reverse = np.all(new_dir == -self.dir, axis=1) & (self.length > 1)
+        self.dir = np.where(reverse[:, None], self.dir, new_dir)
+
+        self.head_x += self.dir[:, 0]
+        self.head_y += self.dir[:, 1]
+        self.ticks += 1
+        in_wall = (self.head_x < 0) | (self.head_x >= self.cols) | (self.head_y < 0) | (self.head_y >= self.rows)
+        head = np.clip(self.head_y, 0, self.rows - 1) * self.cols + np.clip(self.head_x, 0, self.cols - 1)
+
+        # Remove the tail first so the head may move into the cell the tail is leaving
+        trim = ~in_wall & (self.size >= self.length)
+        trimmed = self._all[trim]
+        self.board[trimmed, self.body[trimmed, self.tail_ptr[trimmed]]] = EMPTY
+        self.tail_ptr[trimmed] = (self.tail_ptr[trimmed] + 1) % self.cells
+        self.size[trimmed] -= 1
+
+        cell = self.board[self._all, head]
+        done = in_wall | (cell == SNAKE)
+        alive = self._all[~done]
+        eaten = ~done & (cell == FOOD)
+
+        self.head_ptr[alive] = (self.head_ptr[alive] + 1) % self.cells
+        self.body[alive, self.head_ptr[alive]] = head[alive]
+        self.board[alive, head[alive]] = SNAKE
+        self.size[alive] += 1
+
+        rewards = np.where(eaten, self.score_inc, 0)
+        self.score += rewards
+        self.length += np.where(eaten, self.length_inc, 0)
+        self.foods_eaten += eaten
+        self.foods_left -= eaten
+
+        # if a board has no food left, spawn more and go to the next level. The game is over once
+        # the snake covers every tile food can spawn on
+        empty = self._all[~done & (self.foods_left == 0)]
+        if len(empty):
+            spawned = self.spawn_food(empty, self.RNG.integers(4, 16, len(empty)) * self.level[empty])
+            self.level[empty[spawned > 0]] += 1
+            done[empty[spawned == 0]] = True
+
+        finished = self._all[done]
+        if len(finished):
+            self.final_score[finished] = self.score[finished]
+            self.final_level[finished] = self.level[finished]
+            self.final_foods_eaten[finished] = self.foods_eaten[finished]
+            self.final_ticks[finished] = self.ticks[finished]
+            self.reset(finished)
+        return rewards, done
@@ -0,0 +1,333 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import json
+import platform
+from argparse import ArgumentParser
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+import pygame as pg
+from main import SnakeGame
+from atlas import SpriteAtlas, SpriteBatch
+from arena import ArenaEngine
+from autopilot import Autopilot
+from savestate import RewindBuffer
+from engine import SnakeEngine
+
+# Board sizes (window resolution), snake lengths and food counts every benchmark is run over
+BOARDS = [(800, 650), (1600, 1300)]
+LENGTHS = [10, 300, 1000]
+FOOD_COUNTS = [5, 50, 300]
+FILL_RATIOS = [0.5, 0.9, 0.99]
+# World sizes bigger than the window, drawn through the camera
+WORLDS = [(4000, 4000), (20000, 20000)]
+# Bots in the arena benchmark, on a 200x150 tile board
+ARENA_BOTS = [100, 300, 1000]
+
+
+def make_game(resolution: Tuple[int, int], world_size: Optional[Tuple[int, int]] = None) -> SnakeGame:
+    pg.quit()
+    game = SnakeGame(resolution, config_path=None, world_size=world_size, stats_path=None, rewind=False)
+    pg.event.set_grab(False)
+    return game
+
+
+def board_path(game: SnakeGame) -> List[Tuple[int, int]]:
+    # Tile centres of the board in a back and forth (serpentine) order, so any prefix is a valid snake
+    # (the same cells food spawns on, so the fill ratio of the free-cell index is exact)
+    columns = range(game.RANGE[0] + game.TILE_SIZE, game.RANGE[1] - game.TILE_SIZE, game.TILE_SIZE)
+    rows = range(game.RANGE[2] + game.TILE_SIZE, game.RANGE[3] - game.TILE_SIZE, game.TILE_SIZE)
+    return [(x, y) for row, y in enumerate(rows) for x in (columns if row % 2 == 0 else reversed(columns))]
+
+
+def set_snake(game: SnakeGame, length: int) -> None:
+    game.reset()
+    path = board_path(game)[:length]
+    game.snake._snake.center = path[0]
+    game.snake.reset_body()
+    for center in path[1:]:
+        game.snake._snake.center = center
+        game.snake.add_segment(game.snake._snake.copy())
+    game.length = len(path)
+
+
+def set_foods(game: SnakeGame, count: int) -> None:
+    for food in game.foods.foods:
+        game.free_cells.unblock(food.center)
+    # Same food positions every run, whichever benchmarks ran before
+    game.RNG.seed(count)
+    game.foods.foods = game.foods.spawn_food(count)
+
+
+def measure(operation: Callable[[], None], number: int, repeat: int = 7, min_time: float = 0.02) -> float:
+    # Best of repeat runs in microseconds per operation, number is raised until a run takes
+    # at least min_time seconds so short operations aren't lost in timer noise
+    while True:
+        start = perf_counter()
+        for _ in range(number):
+            operation()
+        if perf_counter() - start >= min_time:
+            break
+        number *= 2
+    best = float('inf')
+    for _ in range(repeat):
+        start = perf_counter()
+        for _ in range(number):
+            operation()
+        best = min(best, (perf_counter() - start) / number)
+    return best * 1e6
+
+
+def bench_snake_move(game: SnakeGame, length: int) -> float:
+    set_snake(game, length)
+    directions = [(0, game.TILE_SIZE), (0, -game.TILE_SIZE)]
+    moves = iter(range(10 ** 9))
+    return measure(lambda: game.snake.move(directions[next(moves) % 2]), 2000)
+
+
+def bench_spawn_food(game: SnakeGame, fill: float, food_count: int) -> float:
+    # Food.spawn_food itself, the cells it took are given back after every round so the fill stays the same
+    cells = len(game.free_cells.cells)
+    set_snake(game, int(cells * fill))
+    set_foods(game, 0)
+
+    def spawn():
+        for food in game.foods.spawn_food(food_count):
+            game.free_cells.unblock(food.center)
+
+    return measure(spawn, 200)
+
+
+def bench_food_collision(game: SnakeGame, length: int, food_count: int) -> float:
+    # The usual tick, no food under the head
+    set_snake(game, length)
+    set_foods(game, food_count)
+    return measure(lambda: game.handle_food_collision(game.snake._snake, game.foods.foods, game.length, game.score, game.best_score), 1000)
+
+
+def bench_eat_food(game: SnakeGame, length: int, food_count: int) -> float:
+    # A tick the head is on a food (the last one, so the whole list is looked at), with the particles
+    # and sound of eating it. The food is put back after every round
+    set_snake(game, length)
+    set_foods(game, food_count)
+    foods = game.foods.foods
+    food = foods[-1]
+    game.free_cells.unblock(food.center)
+    food.center = game.snake._snake.center
+    game.free_cells.block(food.center)
+
+    def eat():
+        game.handle_food_collision(game.snake._snake, foods, game.length, game.score, game.best_score)
+        foods.append(food)
+        game.free_cells.block(food.center)
+
+    return measure(eat, 1000)
+
+
+def bench_food_in_snake(game: SnakeGame, length: int, food_count: int) -> float:
+    set_snake(game, length)
+    set_foods(game, food_count)
+    return measure(lambda: game.handle_food_in_snake_collision(game.foods.foods), 1000)
+
+
+def bench_particles(game: SnakeGame, bursts: int) -> Tuple[float, float]:
+    # Steady state with `bursts` foods eaten every frame
+    particles = game.particles
+    particles.start = particles.end = 0
+    for _ in range(particles.particle_lifetime):
+        for _ in range(bursts):
+            particles.emit((game.width // 2, game.height // 2), game.RED)
+        particles.update()
+
+    def update():
+        for _ in range(bursts):
+            particles.emit((game.width // 2, game.height // 2), game.RED)
+        particles.update()
+
+    return measure(update, 200), measure(lambda: particles.draw(game.screen), 200)
+
+
+def bench_draw_food(game: SnakeGame, food_count: int) -> float:
+    set_snake(game, 1)
+    set_foods(game, food_count)
+    return measure(lambda: game.foods.draw_food(game.foods.foods), 500)
+
+
+def bench_draw_snake(game: SnakeGame, length: int) -> float:
+    set_snake(game, length)
+    return measure(lambda: game.snake.draw_snake(), 200)
+
+
+def bench_draw_sprites(game: SnakeGame, atlas: SpriteAtlas, length: int, food_count: int) -> float:
+    # Textured snake and food in one blits call, compare with draw_snake + draw_food
+    set_snake(game, length)
+    set_foods(game, food_count)
+    batch = SpriteBatch(game, atlas)
+    return measure(lambda: batch.draw(game.screen, game.foods.foods), 200)
+
+
+def bench_frame(game: SnakeGame, length: int, food_count: int) -> float:
+    # Everything run() does in one frame, with one tick per frame and the snake heading off the board
+    set_snake(game, length)
+    set_foods(game, food_count)
+    game.no_collision_walls = True
+    game.turn((0, game.TILE_SIZE))
+
+    def frame():
+        game.handle_events()
+        game.step()
+        game.draw_objects(game.foods.foods)
+        game.display_scores(game.score, game.best_score, game.foods.foods)
+        pg.display.flip()
+
+    result = measure(frame, 10, repeat=3)
+    game.no_collision_walls = False
+    return result
+
+
+def bench_draw_world(game: SnakeGame, length: int, food_count: int) -> float:
+    # Drawing through the camera should cost the same whatever the world size and snake length
+    set_snake(game, length)
+    set_foods(game, food_count)
+    return measure(lambda: game.draw_objects(game.foods.foods), 100)
+
+
+def bench_arena(bots: int) -> float:
+    # One tick of the multi-snake arena, after the snakes had time to grow
+    arena = ArenaEngine(bots, player=False, seed=bots)
+    for _ in range(200):
+        arena.step()
+    return measure(arena.step, 20)
+
+
+def bench_autopilot(board: Tuple[int, int]) -> float:
+    # One autopilot move plus the tick it is played in, a few hundred ticks into a seeded game
+    engine = SnakeEngine(board, 0)
+    autopilot = Autopilot(engine)
+
+    def tick():
+        if engine.step(autopilot()):
+            engine.reset()
+    for _ in range(500):
+        tick()
+    return measure(tick, 20)
+
+
+def play_with_rewind(ticks: int, seed: int = 0) -> Tuple[SnakeEngine, RewindBuffer, float]:
+    # A seeded autopilot game with every tick captured, and the seconds the captures took
+    engine = SnakeEngine(BOARDS[0], seed)
+    autopilot = Autopilot(engine, budget_ms=1000)
+    rewind = RewindBuffer(engine)
+    elapsed = 0.0
+    for _ in range(ticks):
+        if engine.step(autopilot()):
+            engine.reset()
+        start = perf_counter()
+        rewind.capture()
+        elapsed += perf_counter() - start
+    return engine, rewind, elapsed
+
+
+def bench_rewind_capture(ticks: int) -> float:
+    # Recording one tick for rewinding, best of a few runs of the same game
+    return min(play_with_rewind(ticks)[2] / ticks for _ in range(3)) * 1e6
+
+
+def bench_rewind(ticks_back: int) -> float:
+    # Rebuilding the game from ticks_back ticks ago (keyframe plus changes) and putting it back
+    engine, rewind, _ = play_with_rewind(2000)
+    return measure(lambda: rewind.snapshot(ticks_back).restore(engine), 5)
+
+
+def run_benchmarks(name_filter: str = '') -> Dict[str, float]:
+    results = {}
+
+    def record(name: str, run: Callable[[], float]) -> None:
+        if name_filter in name:
+            results[name] = run()
+            print(f"{name:<60} {results[name]:>12.2f} us")
+
+    for board in BOARDS:
+        game = make_game(board)
+        size = f"{board[0]}x{board[1]}"
+        for length in LENGTHS:
+            record(f"snake_move[board={size},length={length}]", lambda: bench_snake_move(game, length))
+        for fill in FILL_RATIOS:
+            for food_count in FOOD_COUNTS:
+                record(f"spawn_food[board={size},fill={fill},foods={food_count}]", lambda: bench_spawn_food(game, fill, food_count))
+        for length in LENGTHS:
+            for food_count in FOOD_COUNTS:
+                params = f"board={size},length={length},foods={food_count}"
+                record(f"handle_food_collision[{params}]", lambda: bench_food_collision(game, length, food_count))
+                record(f"eat_food[{params}]", lambda: bench_eat_food(game, length, food_count))
+                record(f"handle_food_in_snake_collision[{params}]", lambda: bench_food_in_snake(game, length, food_count))
+                record(f"frame[{params}]", lambda: bench_frame(game, length, food_count))
+        for food_count in FOOD_COUNTS:
+            record(f"draw_food[board={size},foods={food_count}]", lambda: bench_draw_food(game, food_count))
+        for length in LENGTHS:
+            record(f"draw_snake[board={size},length={length}]", lambda: bench_draw_snake(game, length))
+        atlas = SpriteAtlas(game)
+        for length in LENGTHS:
+            for food_count in FOOD_COUNTS:
+                record(f"draw_sprites[board={size},length={length},foods={food_count}]", lambda: bench_draw_sprites(game, atlas, length, food_count))
+        for bursts in (1, 5, 20):
+            names = (f"particles.update[board={size},bursts={bursts}]", f"particles.draw[board={size},bursts={bursts}]")
+            if any(name_filter in name for name in names):
+                times = bench_particles(game, bursts)
+                for name, time in zip(names, times):
+                    record(name, lambda: time)
+    for world in WORLDS:
+        size = f"{world[0]}x{world[1]}"
+        names = {(length, food_count): f"draw_world[world={size},length={length},foods={food_count}]"
+                 for length in LENGTHS for food_count in FOOD_COUNTS}
+        # Big worlds take a while to set up, so only make one if it gets used
+        if not any(name_filter in name for name in names.values()):
+            continue
+        game = make_game(BOARDS[0], world)
+        for (length, food_count), name in names.items():
+            record(name, lambda: bench_draw_world(game, length, food_count))
+    for bots in ARENA_BOTS:
+        record(f"arena.step[bots={bots}]", lambda: bench_arena(bots))
+    record("rewind.capture[ticks=2000]", lambda: bench_rewind_capture(2000))
+    for ticks_back in (1, 50, 500):
+        record(f"rewind[ticks_back={ticks_back}]", lambda: bench_rewind(ticks_back))
+    for board in BOARDS:
+        record(f"autopilot[board={board[0]}x{board[1]}]", lambda: bench_autopilot(board))
+    pg.quit()
+    return results
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], tolerance: float, min_delta: float) -> List[str]:
+    # A benchmark regressed if it got slower by more than tolerance (relative) and min_delta (in us),
+    # the second one stops sub-microsecond jitter on the fastest benchmarks from failing the run
+    regressions = []
+    for name, time in results.items():
+        if name in baseline and time > baseline[name] * (1 + tolerance) and time - baseline[name] > min_delta:
+            regressions.append(f"{name}: {baseline[name]:.2f} us -> {time:.2f} us ({time / baseline[name]:.2f}x)")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Benchmark the game hot paths')
+    parser.add_argument('--filter', default='', help='only run benchmarks whose name contains this')
+    parser.add_argument('--save', metavar='FILE', help='save the results as JSON')
+    parser.add_argument('--compare', metavar='FILE', help='fail if a benchmark is slower than in this JSON baseline')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='allowed slowdown against the baseline (default 0.5 = 50%%)')
+    parser.add_argument('--min-delta', type=float, default=1.0, help='ignore slowdowns smaller than this many microseconds (default 1)')
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.filter)
+    if args.save is not None:
+        with open(args.save, 'w') as f:
+            json.dump({'python': platform.python_version(), 'pygame': pg.version.ver, 'results': results}, f, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance, args.min_delta)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            exit(1)
+        print(f"No regressions against {args.compare}")
@@ -0,0 +1,23 @@
+from typing import Tuple
+import pygame as pg
+
+class Camera:
+    # The part of the world shown in the window, kept centred on the snake's head
+    def __init__(self, view_size: Tuple[int, int], world_size: Tuple[int, int], chunk_size: int = 320) -> None:
+        self.rect = pg.Rect((0, 0), view_size)
+        self.world_size = world_size
+        # Size in pixels of the chunks the snake and food are indexed by for culling
+        self.chunk_size = chunk_size
+
+    def follow(self, center: Tuple[int, int]) -> None:
+        self.rect.center = center
+        # Stop at the edges of the world unless the world is smaller than the window
+        self.rect.left = max(0, min(self.rect.left, self.world_size[0] - self.rect.width))
+        self.rect.top = max(0, min(self.rect.top, self.world_size[1] - self.rect.height))
+
+    def to_screen(self, rect: pg.Rect) -> pg.Rect:
+        return rect.move(-self.rect.left, -self.rect.top)
+
+    def visible_area(self, margin: int) -> pg.Rect:
+        # Tile centres just outside the view still overlap it, margin covers those
+        return self.rect.inflate(margin * 2, margin * 2)
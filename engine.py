@@ -0,0 +1,182 @@
+from random import Random, randint
+from typing import Dict, List, Optional, Tuple
+from snake import Snake
+from food import Food
+from free_cells import FreeCells
+from base_object import BaseObject
+import pygame as pg
+
+
+# Settings that change the rules, these come from config.txt in the game
+CONFIG_FIELDS = ('time_step', 'length_inc', 'score_inc', 'length', 'no_collision_walls',
+                 'fix_collision_itself', 'no_collision_food', 'cheat_mode')
+
+
+class SnakeEngine:
+    # Pure game logic. Only pg.Rect and Vector2 are used, so no display, mixer or fonts
+    # are needed and the game can be stepped as fast as the CPU allows.
+    def __init__(self, resolution=(800, 650), seed: Optional[int] = None) -> None:
+        self.width, self.height = resolution
+        self.TILE_SIZE: int = 20
+        self.RANGE: Tuple[int, int, int, int] = (0, self.width - self.TILE_SIZE, 0, self.height - self.TILE_SIZE)
+        self.seed: int = randint(0, 1000000) if seed is None else seed
+        self.RNG: Random = Random(self.seed)
+
+        # Variables to control collision behavior
+        self.no_collision_walls: bool = False
+        self.no_collision_food: bool = False
+        self.fix_collision_itself: bool = True
+
+        self.length: int = 1
+        self.length_inc: int = 1
+        self.level: int = 1
+
+        self.snake_dir: Tuple[int, int] = (0, 0)
+        self.score: int = 0
+        self.best_score: int = 0
+        self.score_inc: int = 1
+
+        self.cheat_mode: bool = False
+        self.time_step: int = 100
+
+        self.remaining_foods: int = 5
+        self.foods_eaten: int = 0
+        self.ticks: int = 0
+
+        # Set by ReplayRecorder to log inputs
+        self.recorder = None
+
+        # Cells food can spawn on, kept in sync by Snake and Food as they move around
+        self.free_cells = FreeCells(BaseObject(self).get_valid_positions())
+        self.snake = Snake(self)
+        self.foods = Food(self)
+
+    def reset(self) -> None:
+        self.free_cells.reset()
+        self.snake.reset_pos()
+        self.snake.reset_body()
+        self.length, self.snake_dir = 1, (0, 0)
+        self.score = 0
+        self.level = 1
+        self.foods_eaten = 0
+        self.ticks = 0
+        self.foods.foods = self.foods.spawn_food(5, self.level)
+        self.remaining_foods = len(self.foods.foods)
+
+    def restart(self) -> None:
+        # Start a new game on request (R key or after game over), unlike reset() this is a player input
+        if self.recorder is not None:
+            self.recorder.record_restart()
+        self.reset()
+
+    def get_config(self) -> Dict[str, int]:
+        return {field: int(getattr(self, field)) for field in CONFIG_FIELDS}
+
+    def apply_config(self, config: Dict[str, int]) -> None:
+        for field in CONFIG_FIELDS:
+            value = config[field]
+            setattr(self, field, bool(value) if isinstance(getattr(self, field), bool) else value)
+
+    def turn(self, direction: Tuple[int, int]) -> bool:
+        direction = (int(direction[0]), int(direction[1]))
+        if self.recorder is not None:
+            self.recorder.record_turn(direction)
+        # The snake can't turn back into itself
+        if direction == (-self.snake_dir[0], -self.snake_dir[1]) and self.length > 1:
+            return False
+        self.snake_dir = direction
+        return True
+
+    def step(self, action: Optional[Tuple[int, int]] = None) -> bool:
+        # Advance the game by one tick, returns True if the snake died on this tick
+        if action is not None:
+            self.turn(action)
+        game_over = self.advance()
+        if self.recorder is not None:
+            self.recorder.on_step()
+        return game_over
+
+    def advance(self) -> bool:
+        self.snake._snake, self.foods.foods, self.length, self.snake_dir, self.score = self.handle_collision(self.snake._snake, self.foods.foods, self.length, self.snake_dir, self.score)
+
+        if self.snake_dir != (0, 0):
+            self.snake.move(self.snake_dir)
+        self.ticks += 1
+
+        if self.is_game_over():
+            return True
+
+        if self.no_collision_food is False:
+            self.snake._snake, self.foods.foods, self.length, self.score, self.best_score = self.handle_food_collision(self.snake._snake, self.foods.foods, self.length, self.score, self.best_score)
+            self.foods.check_food_position()
+            self.foods.foods = self.handle_food_in_snake_collision(self.foods.foods)
+
+        # if foods list is empty, spawn more
+        if len(self.foods.foods) == 0:
+            self.foods.foods = self.foods.spawn_food(self.RNG.randint(4, 15), self.level)
+            # The snake fills the whole board, nothing is left to eat
+            if len(self.foods.foods) == 0:
+                return True
+            self.level += 1
+            self.remaining_foods = len(self.foods.foods)
+            self.on_food_spawned()
+        return False
+
+    def is_game_over(self) -> bool:
+        # Check if the snake collides with itself or the walls
+        snake = self.snake._snake
+        snake_in_wall = snake.left < 0 or snake.right > self.width or snake.top < 0 or snake.bottom > self.height
+        return (self.no_collision_walls is False and snake_in_wall) or self.snake.head_in_body()
+
+    def head_tiles(self) -> Tuple[Tuple[int, int], int, int]:
+        # Every tile the head can move to without hitting a wall: the centre of the top left one and
+        # how many columns and rows there are. Food spawns on the tiles inside it, one tile in from the walls
+        tile = self.TILE_SIZE
+        half = tile // 2
+        head = self.snake._snake.center
+        origin = (head[0] - (head[0] - half) // tile * tile, head[1] - (head[1] - half) // tile * tile)
+        return origin, (self.width - half - origin[0]) // tile + 1, (self.height - half - origin[1]) // tile + 1
+
+    def handle_collision(self, snake: pg.rect.Rect, foods: List[pg.rect.Rect], length: int, snake_dir: Tuple[int, int], score: int, force_restart: bool = False) -> Tuple[pg.rect.Rect, List[pg.rect.Rect], int, Tuple[int, int], int]:
+        snake_in_wall: bool = (snake.left < 0 or snake.right > self.width or snake.top < 0 or snake.bottom > self.height) and self.no_collision_walls is False
+        if (snake_in_wall or self.snake.in_body(snake.center)) or force_restart or self.fix_collision_itself is False:
+            self.reset()
+            return self.snake._snake, self.foods.foods, self.length, self.snake_dir, self.score
+        return snake, foods, length, snake_dir, score
+
+    def handle_food_collision(self, snake: pg.rect.Rect, foods: List[pg.rect.Rect], length: int, score: int, best_score: int) -> Tuple[pg.rect.Rect, List[pg.rect.Rect], int, int]:
+        if self.no_collision_food is False:
+            for food in foods:
+                if snake.collidepoint(food.center):
+                    foods.remove(food)
+                    self.foods.changed()
+                    self.free_cells.unblock(food.center)
+                    length += self.length_inc
+                    score += self.score_inc
+                    self.foods_eaten += 1
+
+                    self.on_food_eaten(food, len(foods) < 1)
+                    if score > best_score:
+                        best_score = score
+            return snake, foods, length, score, best_score
+
+    def handle_food_in_snake_collision(self, foods: List[pg.rect.Rect]) -> List[pg.rect.Rect]:
+        # Removes foods under the body from the list in place and hands the same list back.
+        # Front to back, the order cells are unblocked in decides where later food spawns
+        index = 0
+        while index < len(foods):
+            food_in_snake: bool = self.snake.in_body(foods[index].center)
+            if food_in_snake:
+                self.free_cells.unblock(foods[index].center)
+                del foods[index]
+                self.foods.changed()
+            else:
+                index += 1
+        return foods
+
+    # Hooks for the renderer, the engine itself has no sounds or particles
+    def on_food_eaten(self, food: pg.rect.Rect, last_food: bool) -> None:
+        pass
+
+    def on_food_spawned(self) -> None:
+        pass
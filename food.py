@@ -1,22 +1,40 @@
 from base_object import BaseObject
 import pygame as pg
+from typing import List, Optional
+from spatial_index import ChunkIndex
 
 class Food(BaseObject):
     def __init__(self, main) -> None:
         super().__init__(main)
+        # Goes up whenever a food is added, removed or moved, so caches of the foods can tell
+        # when to rebuild without comparing the whole list every frame
+        self.version: int = 0
+        self._foods: List[pg.rect.Rect] = []
         self.foods = self.spawn_food(5)
+        # Foods by chunk for drawing through a camera, rebuilt when the foods change
+        self.chunks: Optional[ChunkIndex] = None
+        self.indexed_foods: Optional[List[pg.rect.Rect]] = None
+        self.indexed_version: int = -1
+
+    @property
+    def foods(self) -> List[pg.rect.Rect]:
+        return self._foods
+
+    @foods.setter
+    def foods(self, foods: List[pg.rect.Rect]) -> None:
+        # A new list is a change, the engine handing the same list back after a tick isn't
+        if foods is not self._foods:
+            self._foods = foods
+            self.version += 1
+
+    def changed(self) -> None:
+        # For changes made to the list in place
+        self.version += 1
 
     def spawn_food(self, spawnAmount: int, level: int = 1):
-        valid_positions = self.get_valid_positions()
-        snake_positions = {segment.center for segment in self.main.snake.segments}
+        # Only cells that are not occupied by the snake or other food can be picked
         foods = []
-
-        for _ in range(spawnAmount * level):
-            # Find a position that is not occupied by the snake
-            food_position = self.RNG.choice(valid_positions)
-            while food_position in snake_positions:
-                food_position = self.RNG.choice(valid_positions)
-            
+        for food_position in self.main.free_cells.sample(spawnAmount * level, self.RNG):
             food = self.main.snake.copy_snake(self.main.snake._snake)
             food.center = food_position
             foods.append(food)
@@ -24,13 +42,39 @@ class Food(BaseObject):
         return foods
 
     def check_food_position(self) -> None:
-        for food in self.foods:
+        # Edits the list in place, most ticks nothing moves and the caches stay valid
+        foods = self.foods
+        index = 0
+        while index < len(foods):
+            food = foods[index]
             if food.left < self.RANGE[0] or food.right > self.RANGE[1] or food.top < self.RANGE[2] or food.bottom > self.RANGE[3]:
-                food.center = self.get_random_pos()
+                self.main.free_cells.unblock(food.center)
+                new_position = self.main.free_cells.sample(1, self.RNG)
+                self.changed()
+                # No free cell left to move it to
+                if not new_position:
+                    del foods[index]
+                    continue
+                food.center = new_position[0]
+            index += 1
+
+    def get_chunks(self, foods, chunk_size: int) -> ChunkIndex:
+        if self.chunks is None or foods is not self.indexed_foods or self.version != self.indexed_version:
+            self.chunks = ChunkIndex(chunk_size)
+            for food in foods:
+                self.chunks.add(food.center)
+            self.indexed_foods, self.indexed_version = foods, self.version
+        return self.chunks
 
-    def draw_food(self, foods) -> None:
-        food_surface = pg.Surface((self.RANGE[1], self.RANGE[3]))
+    def draw_food(self, foods, surface: Optional[pg.Surface] = None, camera=None) -> None:
+        surface = self.main.screen if surface is None else surface
         food_color = self.main.BLUE if len(foods) == 1 else self.main.RED
-        for food in foods:
-            pg.draw.rect(food_surface, food_color, food)
-        self.main.screen.blit(food_surface, (0, 0))
\ No newline at end of file
+        if camera is None:
+            for food in foods:
+                pg.draw.rect(surface, food_color, food)
+            return
+        # Only the foods in view are looked at
+        tile = pg.Rect(0, 0, self.TILE_SIZE, self.TILE_SIZE)
+        for center in self.get_chunks(foods, camera.chunk_size).query(camera.visible_area(self.TILE_SIZE)):
+            tile.center = center
+            pg.draw.rect(surface, food_color, camera.to_screen(tile))
@@ -0,0 +1,86 @@
+from array import array
+from collections import Counter
+from itertools import compress, count
+from operator import ne
+from random import Random
+from typing import Dict, Iterable, List, Optional, Tuple
+
+class FreeCells:
+    # Board cells with neither snake nor food on them. The free cells are kept at the front of
+    # self.cells and self.slots maps a cell to its index, so blocking, unblocking and picking a
+    # random free cell are all O(1) no matter how full the board is.
+    def __init__(self, cells: Iterable[Tuple[int, int]]) -> None:
+        self.cells: List[Tuple[int, int]] = list(cells)
+        # The order the cells started in, save-states only store the slots that moved since
+        self.positions: List[Tuple[int, int]] = list(self.cells)
+        self.slots = {cell: slot for slot, cell in enumerate(self.cells)}
+        # How many things (snake segments or foods) are on each blocked cell
+        self.blocked: Counter = Counter()
+        self.free: int = len(self.cells)
+        # Set by RewindBuffer: both slots of every swap. The order of the cells decides where the next
+        # food spawns, so it has to be played back exactly
+        self.journal: Optional[array] = None
+
+    def __len__(self) -> int:
+        return self.free
+
+    def __contains__(self, cell: Tuple[int, int]) -> bool:
+        slot = self.slots.get(cell)
+        return slot is not None and slot < self.free
+
+    def _swap(self, slot: int, other: int) -> None:
+        cell, other_cell = self.cells[slot], self.cells[other]
+        self.cells[slot], self.cells[other] = other_cell, cell
+        self.slots[cell], self.slots[other_cell] = other, slot
+
+    def block(self, cell: Tuple[int, int]) -> None:
+        slot = self.slots.get(cell)
+        if slot is None:
+            return
+        self.blocked[cell] += 1
+        if self.blocked[cell] == 1:
+            self.free -= 1
+            self._swap(slot, self.free)
+            if self.journal is not None:
+                self.journal.extend((slot, self.free))
+
+    def unblock(self, cell: Tuple[int, int]) -> None:
+        slot = self.slots.get(cell)
+        if slot is None or cell not in self.blocked:
+            return
+        self.blocked[cell] -= 1
+        if self.blocked[cell] == 0:
+            del self.blocked[cell]
+            self._swap(slot, self.free)
+            self.free += 1
+            if self.journal is not None:
+                self.journal.extend((slot, self.free - 1))
+
+    def sample(self, amount: int, rng: Random) -> List[Tuple[int, int]]:
+        # Picks up to amount distinct free cells and blocks them. When the board is full
+        # this returns fewer cells than asked for (or none at all).
+        picked = []
+        for _ in range(min(amount, self.free)):
+            cell = self.cells[rng.randrange(self.free)]
+            self.block(cell)
+            picked.append(cell)
+        return picked
+
+    def reset(self) -> None:
+        self.blocked.clear()
+        self.free = len(self.cells)
+
+    def displaced(self) -> Dict[int, Tuple[int, int]]:
+        # Slots whose cell isn't the one it started with, compared in C as this may be a big board
+        return {slot: self.cells[slot] for slot in compress(count(), map(ne, self.cells, self.positions))}
+
+    def restore(self, displaced: Dict[int, Tuple[int, int]], blocked: Counter) -> None:
+        # Puts the order back to what displaced() returned at the time, blocked has to match it
+        for slot in self.displaced():
+            self.cells[slot] = self.positions[slot]
+            self.slots[self.positions[slot]] = slot
+        for slot, cell in displaced.items():
+            self.cells[slot] = cell
+            self.slots[cell] = slot
+        self.blocked = Counter(blocked)
+        self.free = len(self.cells) - len(self.blocked)
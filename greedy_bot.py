@@ -0,0 +1,33 @@
+from typing import Callable, Optional, Tuple
+from engine import SnakeEngine
+
+# Bots for tournament.py are modules with a create_bot(engine) function. The bot it returns is
+# called before every tick and returns the direction to turn to (in pixels, like
+# SnakeEngine.turn) or None to keep going straight.
+
+
+def create_bot(engine: SnakeEngine) -> Callable[[], Optional[Tuple[int, int]]]:
+    tile = engine.TILE_SIZE
+    half = tile // 2
+    directions = [(0, -tile), (0, tile), (-tile, 0), (tile, 0)]
+
+    def bot() -> Optional[Tuple[int, int]]:
+        # Towards the nearest food, never into a wall or the body if another way is open
+        head = engine.snake._snake.center
+        foods = engine.foods.foods
+        best, best_cost = None, None
+        for direction in directions:
+            if direction == (-engine.snake_dir[0], -engine.snake_dir[1]) and engine.length > 1:
+                continue
+            x, y = head[0] + direction[0], head[1] + direction[1]
+            # Same wall test as SnakeEngine.is_game_over
+            if x - half < 0 or x + half > engine.width or y - half < 0 or y + half > engine.height:
+                continue
+            if (x, y) in engine.snake.occupancy:
+                continue
+            cost = min((abs(food.centerx - x) + abs(food.centery - y) for food in foods), default=0)
+            if best_cost is None or cost < best_cost:
+                best, best_cost = direction, cost
+        return best
+
+    return bot
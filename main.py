@@ -1,74 +1,104 @@
-from random import Random, randint
-from typing import Dict, List, Tuple
+from time import perf_counter
+# Startup is timed from here, the imports (mostly pygame) are the first step
+STARTED = perf_counter()
+
+from argparse import ArgumentParser
+from typing import Dict, List, Optional, Tuple
 from os import path
-from snake import Snake
-from food import Food
+from engine import SnakeEngine
 from particle import ParticleSystem
+from renderer import DirtyRenderer
+from text_cache import TextCache
+from scheduler import FixedStepScheduler
+from replay import Replay, ReplayPlayer, ReplayRecorder
+from profiler import FrameProfiler, StartupTimer
+from assets import AssetLoader
+from camera import Camera
+from atlas import FOOD_TEXTURES, SpriteAtlas, SpriteBatch
+from autopilot import Autopilot
+from stats import RunStats
+from savestate import RewindBuffer, Snapshot
 
 try:
     import pygame as pg
-    from pygame.math import Vector2
-    from pygame.font import SysFont
 except ModuleNotFoundError:
     input("Please install pygame. Run 'pip install pygame' in the terminal. Press enter to continue.\n")
 
 print("Note: You may experience some unknown bugs while playing the game. If you encounter any, please report it to the developer. Thanks!")
 
 
-class SnakeGame:
-    def __init__(self, resolution=(800, 650)) -> None:
+class SnakeGame(SnakeEngine):
+    def __init__(self, resolution=(800, 650), dirty_rects: bool = False, turbo: bool = False,
+                 replay: Optional[Replay] = None, record: Optional[str] = None, profile: Optional[str] = None,
+                 config_path: Optional[str] = 'config.txt', world_size: Optional[Tuple[int, int]] = None,
+                 startup_report: bool = False, textured: bool = False, autopilot: bool = False,
+                 stats_path: Optional[str] = 'stats.db', rewind: bool = True, state_path: str = 'quicksave.state') -> None:
+        self.startup = StartupTimer(STARTED)
+        self.startup.mark('imports')
+        self.startup_report = startup_report
         pg.init()
-        self.width, self.height = resolution
-        self.TILE_SIZE: int = 20
-        self.RANGE: Tuple[int, int, int, int] = (0, self.width - self.TILE_SIZE, 0, self.height - self.TILE_SIZE)
-        self.RNG: Random = Random(randint(0, 1000000))
+        self.startup.mark('pygame.init')
+        self.renderer: Optional[DirtyRenderer] = None
+        # The board can be bigger than the window (world_size), the camera then shows the part around the snake
+        self.view_width, self.view_height = resolution
+        if replay is None:
+            super().__init__(resolution if world_size is None else world_size)
+        else:
+            super().__init__(replay.resolution, replay.seed)
         self.GREEN: Tuple[int, int, int] = (0, 205, 0)
         self.DARK_GREEN: Tuple[int, int, int] = (0, 130, 0)
         self.RED = (255, 0, 0)
         self.BLUE = (0, 0, 255)
         self.BLACK = (0, 0, 0)
         
-        self.score_font: SysFont = SysFont(None, 30)
-        self.game_over_font: SysFont = SysFont(None, 40)
-        self.paused_font: SysFont = SysFont(None, 60)
-
-        # Variables to control collision behavior
-        self.no_collision_walls: bool = False
-        self.no_collision_food: bool = False
-
-
-        self.fix_collision_itself: bool = True
-
-
-        # Sound Effects
-        self.eat_sound: pg.mixer.Sound = pg.mixer.Sound(path.join('assets', 'eat.wav'))
-        self.food_spawn_sound: pg.mixer.Sound = pg.mixer.Sound(path.join('assets', 'food_spawn.wav'))
+        self.startup.mark('engine')
+
+        # Sounds are decoded in the background and stay silent until they are ready
+        self.assets = AssetLoader()
+        self.eat_sound = self.assets.sound('eat.wav')
+        self.food_spawn_sound = self.assets.sound('food_spawn.wav')
+        self.score_font: pg.font.Font = self.assets.font(30)
+        self.game_over_font: pg.font.Font = self.assets.font(40)
+        self.paused_font: pg.font.Font = self.assets.font(60)
+
+        # Text only gets rendered again when it changes, the static lines are rendered once here
+        self.text_cache = TextCache()
+        self.text_cache.pin(self.paused_font, "Paused")
+        self.text_cache.pin(self.score_font, "Cheat Mode on, You can't save best scores.")
+        self.text_cache.pin(self.game_over_font, "Game Over! Press R to Restart or ESC to Quit", 'cyan')
+        self.startup.mark('fonts')
 
-        self.length: int = 1
-        self.length_inc: int = 1
-        self.level: int = 1
-
-        self.snake_dir: Vector2 = Vector2(0, 0)
-        self.score: int = 0
         self.best_score: int = self.get_best_score()
-        self.score_inc: int = 1
-
-        self.cheat_mode: bool = False
+        # Every game goes into the stats file, written in the background (None keeps no stats)
+        self.stats: Optional[RunStats] = None if stats_path is None else RunStats(stats_path)
+        self.run_started: float = perf_counter()
 
         # Set up the screen and clock
-        self.screen: pg.Surface = pg.display.set_mode((self.width, self.height), pg.SCALED | pg.DOUBLEBUF | pg.HWSURFACE | pg.HWACCEL)
+        self.screen: pg.Surface = pg.display.set_mode((self.view_width, self.view_height), pg.SCALED | pg.DOUBLEBUF | pg.HWSURFACE | pg.HWACCEL)
 
         pg.display.set_caption('Snake Game')
+        self.startup.mark('display')
         self.clock: pg.time.Clock = pg.time.Clock()
-        self.time: int = 0
-        self.time_step: int = 100
+        self.frame_time: int = 0
         
-        self.snake = Snake(self)
-        self.foods = Food(self)
         self.particles = ParticleSystem(self)
-
-        self.remaining_foods: int = 5
-        self.foods_eaten: int = 0
+        self.camera: Optional[Camera] = None
+        if (self.width, self.height) != (self.view_width, self.view_height):
+            self.camera = Camera((self.view_width, self.view_height), (self.width, self.height))
+            self.snake.track_chunks(self.camera.chunk_size)
+        # Textured tiles from one atlas, drawn with a single blits call per frame
+        self.sprites: Optional[SpriteBatch] = None
+        if textured:
+            for texture in FOOD_TEXTURES:
+                self.assets.preload_image(texture)
+            self.sprites = SpriteBatch(self, SpriteAtlas(self))
+        if dirty_rects and self.camera is not None:
+            print("Note: --dirty-rects does nothing when the world is bigger than the window, the view scrolls every tick.")
+        elif dirty_rects and self.sprites is not None:
+            print("Note: --dirty-rects does nothing with --textured, the board is drawn in one batch every frame.")
+        elif dirty_rects:
+            self.renderer = DirtyRenderer(self)
+        self.startup.mark('particles and renderer')
         
         # Make the cursor invisible
         pg.mouse.set_visible(False)
@@ -80,20 +110,55 @@ class SnakeGame:
         self.paused = False
 
         # Dictionary to map keyboard keys to snake directions
-        self.keys: Dict[int, Vector2] = {pg.K_w: Vector2(0, -self.TILE_SIZE),
-                                                 pg.K_s: Vector2(0, self.TILE_SIZE),
-                                                 pg.K_a: Vector2(-self.TILE_SIZE, 0),
-                                                 pg.K_d: Vector2(self.TILE_SIZE, 0),
-                                                 pg.K_q: Vector2(-self.TILE_SIZE, -self.TILE_SIZE),
-                                                 pg.K_e: Vector2(self.TILE_SIZE, -self.TILE_SIZE),
-                                                 pg.K_UP: Vector2(0, -self.TILE_SIZE),
-                                                 pg.K_DOWN: Vector2(0, self.TILE_SIZE),
-                                                 pg.K_LEFT: Vector2(-self.TILE_SIZE, 0),
-                                                 pg.K_RIGHT: Vector2(self.TILE_SIZE, 0)}
+        self.keys: Dict[int, Tuple[int, int]] = {pg.K_w: (0, -self.TILE_SIZE),
+                                                 pg.K_s: (0, self.TILE_SIZE),
+                                                 pg.K_a: (-self.TILE_SIZE, 0),
+                                                 pg.K_d: (self.TILE_SIZE, 0),
+                                                 pg.K_q: (-self.TILE_SIZE, -self.TILE_SIZE),
+                                                 pg.K_e: (self.TILE_SIZE, -self.TILE_SIZE),
+                                                 pg.K_UP: (0, -self.TILE_SIZE),
+                                                 pg.K_DOWN: (0, self.TILE_SIZE),
+                                                 pg.K_LEFT: (-self.TILE_SIZE, 0),
+                                                 pg.K_RIGHT: (self.TILE_SIZE, 0)}
         
+        # Without a config path the default settings are used
+        if replay is not None:
+            self.apply_config(replay.config)
+        elif config_path is not None:
+            self.load_config(config_path)
+        self.startup.mark('config')
+        # Settings the current game started with, for its stats (length changes as the snake grows)
+        self.run_config: Dict[str, int] = self.get_config()
+
+        # The snake moves every time_step ms, independent of the frame rate
+        self.scheduler = FixedStepScheduler(self.time_step, turbo=turbo)
+
+        # Replays: either play one back or record this session
+        self.replay_player: Optional[ReplayPlayer] = None if replay is None else ReplayPlayer(replay, self)
+        self.record_path = record
+        if record is not None:
+            ReplayRecorder(self)
+
+        # Hold Backspace to go back in time, F5 and F9 save and load the game. A replay can't
+        # follow a game that jumps around, so none of it works while recording or watching one
+        self.rewind: Optional[RewindBuffer] = None
+        if rewind and replay is None and record is None:
+            self.rewind = RewindBuffer(self)
+        self.rewinding = False
+        self.state_path = state_path
+
+        # F3 shows where the frame time goes, profile saves a Chrome trace of the whole session
+        self.profiler = FrameProfiler(self, trace_path=profile)
+
+        # Demo mode (F2): the autopilot plays and a new game starts when it dies
+        self.autopilot: Optional[Autopilot] = None
+        if autopilot:
+            self.toggle_autopilot()
+
+    def load_config(self, config_path: str = 'config.txt') -> None:
         # Check if the config file exists, if not, create it with default values
-        if path.exists('config.txt') is False:
-            with open('config.txt', 'w') as f:
+        if path.exists(config_path) is False:
+            with open(config_path, 'w') as f:
                 f.write(f"Snake Speed: {self.time_step}\nSnake Length Increment: {self.length_inc}\n"
                         f"Score Increment: {self.score_inc}\nSnakes Starting Length: {self.length}\n\nDisable Collision With Wall: No\n"
                         "Fix Collision With Self: Yes\nDisable Collision With Food: No\n\nWarning: "
@@ -102,7 +167,7 @@ class SnakeGame:
         # Read the config file and update the variables
         try:
             print("Reading config file...")
-            with open('config.txt') as f:
+            with open(config_path) as f:
                 config: List[str] = f.read().lower().split()
 
                 self.time_step: int = int(config[2])
@@ -136,44 +201,96 @@ class SnakeGame:
 
     def run(self):
         while True:
-            self.snake_dir = self.handle_events(self.snake_dir)
-            self.draw_objects(self.foods.foods)
-            self.display_scores(self.score, self.best_score, self.foods.foods)
-
-            if self.paused is False:
-                self.snake._snake, self.foods.foods, self.length, self.snake_dir, self.score = self.handle_collision(self.snake._snake, self.foods.foods, self.length, self.snake_dir, self.score)
-
-                if self.no_collision_food is False:
-                    self.snake._snake, self.foods.foods, self.length, self.score, self.best_score = self.handle_food_collision(self.snake._snake, self.foods.foods, self.length, self.score, self.best_score)
-                    self.foods.check_food_position()
-                    self.foods.foods = self.handle_food_in_snake_collision(self.foods.foods, self.snake.segments)
-
-                # if foods list is empty, spawn more
-                if len(self.foods.foods) == 0:
-                    self.foods.foods = self.foods.spawn_food(self.RNG.randint(4, 15), self.level)
-                    self.level += 1
-                    self.remaining_foods = len(self.foods.foods)
-                    self.food_spawn_sound.play()
-
-                time_now = pg.time.get_ticks()
-                if time_now - self.time >= self.time_step:
-                    self.time = time_now
-                    self.snake.move(self.snake_dir)
-            
-            pg.display.flip()
-            self.clock.tick(60)
-
-            # Check if the snake collides with itself or the walls
-            if (self.no_collision_walls is False and (self.snake._snake.left < 0 or self.snake._snake.right > self.width or self.snake._snake.top < 0 or self.snake._snake.bottom > self.height)) or self.snake._snake.collidelist(self.snake.segments[:-1]) != -1:
-                self.game_over_screen()
-                self.snake._snake, self.foods.foods, self.length, self.snake_dir, self.score = self.handle_collision(self.snake._snake, self.foods.foods, self.length, self.snake_dir, self.score, True)
-
-
-    def game_over_screen(self):
-        game_over_text = self.game_over_font.render("Game Over! Press R to Restart or ESC to Quit", True, 'cyan')
-        game_over_rect = game_over_text.get_rect(center=(self.width // 2, self.height // 2))
-        foods_eaten_text = self.game_over_font.render(f"Total Food Eaten: {self.foods_eaten}", True, 'cyan')
-        foods_eaten_rect = foods_eaten_text.get_rect(center=(self.width // 2, self.height // 2 + 50))
+            if self.profiler.enabled:
+                self.profiler.begin_frame()
+            self.handle_events()
+            tick = self.step if self.replay_player is None else self.replay_player.step
+            if self.autopilot is not None:
+                tick = self.autopilot_step
+            if self.rewinding:
+                # One tick back per frame while Backspace is held
+                self.rewind_ticks(1)
+            elif self.paused is False and self.scheduler.update(self.frame_time, tick):
+                if self.autopilot is not None or self.game_over_screen():
+                    self.restart()
+                self.clock.tick()
+
+            if self.renderer is None:
+                self.draw_objects(self.foods.foods, 1.0 if self.paused or self.rewinding else self.scheduler.alpha)
+                self.display_scores(self.score, self.best_score, self.foods.foods)
+                if self.profiler.enabled:
+                    self.profiler.draw_overlay(self.screen)
+                with self.profiler.phase('flip'):
+                    pg.display.flip()
+            else:
+                with self.profiler.phase('dirty render'):
+                    self.renderer.render()
+            if self.profiler.enabled:
+                self.profiler.end_frame()
+            if self.startup is not None:
+                self.startup.mark('first frame')
+                if self.startup_report:
+                    print(self.startup.report(self.assets.load_times))
+                self.startup = None
+            self.frame_time = self.clock.tick(60)
+
+
+    def autopilot_step(self) -> bool:
+        return self.step(self.autopilot())
+
+    def toggle_autopilot(self) -> None:
+        # Not while a replay plays, its inputs come from the file
+        if self.replay_player is not None:
+            return
+        if self.autopilot is not None:
+            self.autopilot = None
+            return
+        # Scores the autopilot made aren't the player's
+        self.cheat_mode = True
+        self.autopilot = Autopilot(self)
+
+    def step(self, action: Optional[Tuple[int, int]] = None) -> bool:
+        game_over = super().step(action)
+        if self.rewind is not None:
+            self.rewind.capture()
+        return game_over
+
+    def rewind_ticks(self, ticks: int) -> bool:
+        if self.rewind is None or self.rewind.rewind(ticks) == 0:
+            return False
+        self.restored()
+        return True
+
+    def save_state(self) -> None:
+        if self.rewind is None:
+            return
+        Snapshot.capture(self).save(self.state_path)
+        print(f"Saved the game to {self.state_path}")
+
+    def load_state(self) -> None:
+        if self.rewind is None:
+            return
+        try:
+            Snapshot.load(self.state_path).restore(self)
+        except (OSError, ValueError) as e:
+            print(f"Couldn't load {self.state_path}: {e}")
+            return
+        self.rewind.restored()
+        self.restored()
+
+    def restored(self) -> None:
+        # After rewinding or loading, going back in time doesn't make for a fair score
+        self.cheat_mode = True
+        self.scheduler.reset()
+        if self.renderer is not None:
+            self.renderer.invalidate()
+
+    def game_over_screen(self) -> bool:
+        # True to start a new game, False if Backspace went back to before the snake died
+        game_over_text = self.text_cache.render(self.game_over_font, "Game Over! Press R to Restart or ESC to Quit", 'cyan')
+        game_over_rect = game_over_text.get_rect(center=(self.view_width // 2, self.view_height // 2))
+        foods_eaten_text = self.text_cache.render(self.game_over_font, f"Total Food Eaten: {self.foods_eaten}", 'cyan')
+        foods_eaten_rect = foods_eaten_text.get_rect(center=(self.view_width // 2, self.view_height // 2 + 50))
         self.screen.blit(game_over_text, game_over_rect)
         self.screen.blit(foods_eaten_text, foods_eaten_rect)
         pg.display.flip()
@@ -181,80 +298,59 @@ class SnakeGame:
         while True:
             for event in pg.event.get():
                 if event.type == pg.QUIT:
-                    self.save_best_score(self.best_score)
-                    exit()
+                    self.quit_game()
                 if event.type == pg.KEYDOWN:
+                    # reset() zeroes foods_eaten once the run is recorded
                     if event.key == pg.K_r:
-                        self.foods_eaten = 0
-                        return
+                        return True
+                    # Two seconds back, paused so there is time to get ready
+                    if event.key == pg.K_BACKSPACE and self.rewind_ticks(round(2000 / self.time_step)):
+                        self.paused = True
+                        return False
                     if event.key == pg.K_ESCAPE:
-                        self.save_best_score(self.best_score)
-                        exit()
+                        self.quit_game()
                     
 
 
-    def handle_collision(self, snake: pg.rect.Rect, foods: List[pg.rect.Rect], length: int, snake_dir: Tuple[int, int], score: int, force_restart: bool = False) -> Tuple[pg.rect.Rect, List[pg.rect.Rect], int, Tuple[int, int], int]:
-        snake_in_wall: bool = (snake.left < 0 or snake.right > self.width or snake.top < 0 or snake.bottom > self.height) and self.no_collision_walls is False
-        snake_positions = set(segment.center for segment in self.snake.segments[:-1])
-        if (snake_in_wall or snake.center in snake_positions) or force_restart or self.fix_collision_itself is False:
-            valid_positions = self.snake.get_valid_positions()
-            self.snake.reset_pos()
-            foods = self.foods.spawn_food(5, self.level)
-            self.remaining_foods = len(foods)
-            length, snake_dir = 1, (0, 0)
-            score = 0
-            self.level = 1
-            self.snake.segments = [snake.copy()]
-            for food in foods:
-                if len(foods) > 15:
-                    foods = foods[:15]
-                    self.remaining_foods = len(foods)
-                food.center = self.foods.get_random_pos()
-        return snake, foods, length, snake_dir, score
-
-
-    def handle_food_collision(self, snake: pg.rect.Rect, foods: List[pg.rect.Rect], length: int, score: int, best_score: int) -> Tuple[pg.rect.Rect, List[pg.rect.Rect], int, int]:
-        if self.no_collision_food is False:
-            for food in foods:
-                if snake.collidepoint(food.center):
-                    foods.remove(food)
-                    length += self.length_inc
-                    score += self.score_inc
-                    self.foods_eaten += 1
-
-                    self.particles.emit(food.center, self.BLUE if len(foods) < 1 else self.RED)
-
-                    self.eat_sound.play()
-                    if score > best_score:
-                        best_score = score
-            return snake, foods, length, score, best_score
-
-    def handle_food_in_snake_collision(self, foods: List[pg.rect.Rect], segments: List[pg.rect.Rect]) -> List[pg.rect.Rect]:
-        new_foods = []
-        for food in foods:
-            food_in_snake: bool = food.collidelist(segments[:-1]) != -1
-            if food_in_snake is False:
-                new_foods.append(food)
-        return new_foods
-
+    def render_text(self, font: pg.font.Font, text: str) -> pg.Surface:
+        return self.text_cache.render(font, text)
 
-    def display_scores(self, score: int, best_score: int, foods: List[pg.rect.Rect]) -> None:
-        score_text = self.score_font.render(f"Score: {score}", True, 'white')
-        self.screen.blit(score_text, (10, 10))
-        best_score_text = self.score_font.render(f"Best Score: {best_score}", True, 'white')
-        self.screen.blit(best_score_text, (10, score_text.get_height() + 15))
-        level_text = self.score_font.render(f"Level: {self.level}", True, 'white')
+    def get_hud(self, score: int, best_score: int, foods: List[pg.rect.Rect]) -> List[Tuple[pg.font.Font, str, Tuple[int, int]]]:
+        # HUD lines as (font, text, position), Font.size measures the text without rendering it
+        hud = [(self.score_font, f"Score: {score}", (10, 10))]
+        score_height = self.score_font.size(hud[0][1])[1]
+        hud.append((self.score_font, f"Best Score: {best_score}", (10, score_height + 15)))
+        best_score_height = self.score_font.size(hud[1][1])[1]
+        level_text = f"Level: {self.level}"
         if self.cheat_mode:
-            cheat_text = self.score_font.render("Cheat Mode on, You can't save best scores.", True, 'white')
-            self.screen.blit(cheat_text, (10, best_score_text.get_height() + 94))
-            self.screen.blit(level_text, (10, cheat_text.get_height() + 40))
-        self.screen.blit(level_text, (10, best_score_text.get_height() + 40))
-        remaining_foods_text = self.score_font.render(f"Remaining Foods: {len(foods)} / {self.remaining_foods}", True, 'white')
-        self.screen.blit(remaining_foods_text, (10, level_text.get_height() + 65))
+            cheat_text = "Cheat Mode on, You can't save best scores."
+            hud.append((self.score_font, cheat_text, (10, best_score_height + 94)))
+            hud.append((self.score_font, level_text, (10, self.score_font.size(cheat_text)[1] + 40)))
+        hud.append((self.score_font, level_text, (10, best_score_height + 40)))
+        level_height = self.score_font.size(level_text)[1]
+        hud.append((self.score_font, f"Remaining Foods: {len(foods)} / {self.remaining_foods}", (10, level_height + 65)))
 
         if self.paused:
-            paused_text = self.paused_font.render("Paused", True, 'white')
-            self.screen.blit(paused_text, (self.width // 2 - paused_text.get_width() // 2, self.height // 2 - paused_text.get_height() // 2))
+            paused_width, paused_height = self.paused_font.size("Paused")
+            hud.append((self.paused_font, "Paused", (self.view_width // 2 - paused_width // 2, self.view_height // 2 - paused_height // 2)))
+        return hud
+
+    def display_scores(self, score: int, best_score: int, foods: List[pg.rect.Rect]) -> None:
+        for font, text, pos in self.get_hud(score, best_score, foods):
+            self.screen.blit(self.render_text(font, text), pos)
+
+    def quit_game(self) -> None:
+        self.assets.shutdown()
+        self.record_run()
+        if self.stats is not None:
+            self.stats.close()
+        if self.recorder is not None:
+            self.recorder.replay.save(self.record_path)
+        self.profiler.save_trace()
+        # A replay's score was already saved (or not) when it was played
+        if self.replay_player is None:
+            self.save_best_score(self.best_score)
+        exit()
 
     def ask_save_best_score(self, best_score: int) -> bool:
         pg.quit()
@@ -280,52 +376,127 @@ class SnakeGame:
         else:
             return 0
 
-    def handle_events(self, snake_dir: Tuple[int, int]) -> Tuple[int, Tuple[int, int]]:
+    def handle_events(self) -> None:
         for event in pg.event.get():
             if event.type == pg.QUIT:
-                self.save_best_score(self.best_score)
-                exit()
+                self.quit_game()
+
+            if event.type == pg.KEYUP and event.key == pg.K_BACKSPACE:
+                self.rewinding = False
 
             if event.type == pg.KEYDOWN:
                 if event.key == pg.K_ESCAPE:
-                    self.save_best_score(self.best_score)
-                    exit()
+                    self.quit_game()
+
+                # Inputs come from the replay while one is playing
+                if self.replay_player is not None and (event.key == pg.K_r or event.key in self.keys):
+                    continue
 
                 if event.key == pg.K_r:
-                    snake_dir = (0, 0)
-                    self.length = 1
-                    self.handle_collision(self.snake._snake, self.foods.foods, self.length, snake_dir, self.score, True)
-                    self.foods.foods = self.foods.spawn_food(5, self.level)
-                    for food in self.foods.foods:
-                        food.center = self.snake.get_random_pos()
-                    self.remaining_foods = len(self.foods.foods)
+                    self.restart()
                     
                 if event.key == pg.K_SPACE or event.key == pg.K_p:
                     self.paused = not self.paused
 
+                if event.key == pg.K_t:
+                    self.scheduler.turbo = not self.scheduler.turbo
+
+                if event.key == pg.K_F3:
+                    self.profiler.toggle()
+
+                if event.key == pg.K_F2:
+                    self.toggle_autopilot()
+
+                if event.key == pg.K_BACKSPACE:
+                    self.rewinding = self.rewind is not None
+
+                if event.key == pg.K_F5:
+                    self.save_state()
+
+                if event.key == pg.K_F9:
+                    self.load_state()
+
                 if event.key in self.keys:
                     if self.paused:
                         continue
+                    # Steering takes over from the autopilot
+                    self.autopilot = None
                     
                     current_time = pg.time.get_ticks()
                     if current_time - self.last_move_time >= self.move_delay:
-                        if snake_dir == (-self.keys[event.key][0], -self.keys[event.key][1]) and self.length > 1:
-                            continue
-                        snake_dir = self.keys[event.key]
-                        self.last_move_time = current_time
-
-        return snake_dir
-
-    def draw_objects(self, foods: List[pg.rect.Rect]) -> None:
+                        if self.turn(self.keys[event.key]):
+                            self.last_move_time = current_time
+
+    def record_run(self) -> None:
+        # Replays were recorded when they were played, and the autopilot's games aren't the player's
+        if self.stats is None or self.replay_player is not None or self.autopilot is not None or self.ticks == 0:
+            return
+        self.stats.record(perf_counter() - self.run_started, self.ticks, self.score, self.level, self.foods_eaten,
+                          self.cheat_mode, self.run_config)
+
+    def reset(self) -> None:
+        self.record_run()
+        super().reset()
+        self.run_started = perf_counter()
+        self.run_config = self.get_config()
+        self.scheduler.reset()
+        if self.renderer is not None:
+            self.renderer.invalidate()
+
+    def on_food_eaten(self, food: pg.rect.Rect, last_food: bool) -> None:
+        self.particles.emit(food.center, self.BLUE if last_food else self.RED)
+        self.eat_sound.play()
+
+    def on_food_spawned(self) -> None:
+        self.food_spawn_sound.play()
+
+    def draw_objects(self, foods: List[pg.rect.Rect], alpha: float = 1.0) -> None:
         try:
             self.screen.fill(self.BLACK)
-            self.foods.draw_food(foods)
-            self.snake.draw_snake()
+            offset = (0, 0)
+            if self.camera is not None:
+                # Follow the interpolated head so the view scrolls smoothly between ticks
+                self.camera.follow(self.snake.get_head_center(alpha))
+                offset = self.camera.rect.topleft
+                pg.draw.rect(self.screen, self.DARK_GREEN, self.camera.to_screen(pg.Rect(0, 0, self.width, self.height)), 1)
+            if self.sprites is not None:
+                self.sprites.draw(self.screen, foods, alpha, self.camera)
+            else:
+                self.foods.draw_food(foods, camera=self.camera)
+                self.snake.draw_snake(alpha=alpha, camera=self.camera)
             self.particles.update()
-            self.particles.draw(self.screen)
+            self.particles.draw(self.screen, offset)
         except pg.error as e:
             print(f"Error occurred during rendering: {e}")
 
 
 if __name__ == '__main__':
-    SnakeGame().run()
+    parser = ArgumentParser(description='Snake Game')
+    parser.add_argument('--dirty-rects', action='store_true', help='only redraw and present the parts of the screen that changed')
+    parser.add_argument('--turbo', action='store_true', help='run the game logic as fast as possible (toggle with T)')
+    parser.add_argument('--record', metavar='FILE', help='record this session to a replay file')
+    parser.add_argument('--replay', metavar='FILE', help='watch a replay file')
+    parser.add_argument('--profile', metavar='FILE', help='time every frame and save a Chrome trace (JSON) when quitting')
+    parser.add_argument('--startup-report', action='store_true', help='print how long each step of starting the game took')
+    parser.add_argument('--textured', action='store_true', help='draw the snake and food with textures instead of flat colours')
+    parser.add_argument('--autopilot', action='store_true', help='let the computer play, starting a new game every time it dies (toggle with F2)')
+    parser.add_argument('--load-state', metavar='FILE', help='start from a game saved with F5, F5 and F9 then use this file')
+    parser.add_argument('--world', metavar='COLSxROWS', help='play on a board of this many tiles, bigger than the window (e.g. 1000x1000)')
+    args = parser.parse_args()
+    world_size = None
+    if args.world is not None:
+        columns, rows = (int(tiles) for tiles in args.world.lower().split('x'))
+        world_size = (columns * 20, rows * 20)
+    replay = None
+    if args.replay is not None:
+        try:
+            replay = Replay.load(args.replay)
+        except (OSError, ValueError) as e:
+            parser.error(f"can't watch {args.replay}: {e}")
+    game = SnakeGame(dirty_rects=args.dirty_rects, turbo=args.turbo, record=args.record, profile=args.profile,
+                     replay=replay, world_size=world_size,
+                     startup_report=args.startup_report, textured=args.textured, autopilot=args.autopilot,
+                     state_path=args.load_state or 'quicksave.state')
+    if args.load_state is not None:
+        game.load_state()
+    game.run()
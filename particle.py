@@ -1,71 +1,108 @@
 import pygame as pg
-from pygame.math import Vector2
+import numpy as np
+from itertools import islice
+from typing import Optional
 
 class ParticleSystem:
-    def __init__(self, game):
+    def __init__(self, game, capacity: int = 4096):
         self.game = game
 
         # Particle settings
         self.particle_count = 20
         self.particle_lifetime = 40
         self.particle_speed = 1
+        self.size = 4
 
-        self.particles = []
-
-    def emit(self, pos, color):
-        for _ in range(self.particle_count):
-            particle = self.get_particle()
-            particle.reset(pos, color)
-            self.particles.append(particle)
+        # Particles are stored as arrays, the live ones are in [start, end). Every particle lives for
+        # particle_lifetime frames, so the dead ones are always the oldest at the front.
+        self.capacity = capacity
+        self.pos = np.zeros((capacity, 2), dtype=np.float32)
+        self.vel = np.zeros((capacity, 2), dtype=np.float32)
+        self.lifetime = np.zeros(capacity, dtype=np.int32)
+        self.color = np.zeros(capacity, dtype=np.int32)
+        self.start = 0
+        self.end = 0
+        # Blit entries ([sprite, [x, y]]) and draw positions are made once and written over every frame
+        self._draw_x = np.zeros(capacity, dtype=np.int32)
+        self._draw_y = np.zeros(capacity, dtype=np.int32)
+        self._entries = [[None, [0, 0]] for _ in range(capacity)]
 
-    
-    def get_particle(self):
-        for particle in self.particles:
-            if particle.lifetime <= 0:
-                return particle
-        return Particle(self, (0, 0), self.game, (0, 0, 0))  # Default particle
+        # Particles are cosmetic, so they get their own RNG and don't change the game's random numbers
+        self.RNG = np.random.default_rng(game.seed)
 
-    def update(self):
-        self.particles = [p for p in self.particles if p.lifetime > 0]
-        for particle in self.particles:
-            particle.update()
+        # One pre-drawn sprite per colour, color holds the index into these lists
+        self.palette = []
+        self.sprites = []
 
-    def draw(self, surface):
-        for particle in self.particles:
-            particle.draw(surface)
+    def __len__(self) -> int:
+        return self.end - self.start
 
+    def emit(self, pos, color):
+        if self.end + self.particle_count > self.capacity:
+            self.compact()
+        amount = min(self.particle_count, self.capacity - self.end)
+        new = slice(self.end, self.end + amount)
+        self.pos[new] = pos
+        self.RNG.random(out=self.vel[new], dtype=np.float32)
+        self.vel[new] *= 2 * self.particle_speed
+        self.vel[new] -= self.particle_speed
+        self.lifetime[new] = self.particle_lifetime
+        self.color[new] = self.get_color_id(color)
+        self.end += amount
 
-class Particle(pg.sprite.Sprite):
-    def __init__(self, system: ParticleSystem, pos: tuple, game, color):
-        super().__init__()
-        self.image = pg.Surface((4, 4))
-        self.image.fill(color)
-        self.rect = self.image.get_rect()
-        self.rect.center = pos
-        self.pos = Vector2(*pos)
-        self.color = color
-        self.system = system
+    def compact(self):
+        # Move the live particles back to the front of the arrays
+        live = len(self)
+        if self.start == 0:
+            return
+        for array in (self.pos, self.vel, self.lifetime, self.color):
+            array[:live] = array[self.start:self.end]
+        self.start, self.end = 0, live
 
-        self.lifetime = self.system.particle_lifetime
-        self.vel = Vector2(game.RNG.uniform(-self.system.particle_speed, self.system.particle_speed),
-                           game.RNG.uniform(-self.system.particle_speed, self.system.particle_speed))
-        self.size = 4
-        self.game = game
-    
-    def __hash__(self) -> int:
-        return hash((self.pos, self.color))
+    def get_color_id(self, color) -> int:
+        color = tuple(pg.Color(color))
+        if color not in self.palette:
+            sprite = pg.Surface((self.size, self.size))
+            sprite.set_colorkey((0, 0, 0))
+            pg.draw.ellipse(sprite, color, sprite.get_rect())
+            if pg.display.get_surface() is not None:
+                sprite = sprite.convert()
+            self.palette.append(color)
+            self.sprites.append(sprite)
+        return self.palette.index(color)
 
     def update(self):
-        self.vel *= 0.97
-        self.pos += self.vel
-        self.lifetime -= 1
+        live = slice(self.start, self.end)
+        self.vel[live] *= 0.97
+        self.pos[live] += self.vel[live]
+        self.lifetime[live] -= 1
+        self.start += int(np.count_nonzero(self.lifetime[live] <= 0))
+        if self.start == self.end:
+            self.start = self.end = 0
 
-    def reset(self, pos, color):
-        self.pos = pos
-        self.color = color
-        self.lifetime = self.system.particle_lifetime
-        self.vel = Vector2(self.game.RNG.uniform(-self.system.particle_speed, self.system.particle_speed),
-                           self.game.RNG.uniform(-self.system.particle_speed, self.system.particle_speed))
+    def get_bounds(self) -> Optional[pg.Rect]:
+        # Area covered by all live particles, or None if there are none
+        if len(self) == 0:
+            return None
+        live = self.pos[self.start:self.end]
+        left, top = np.floor(live.min(axis=0))
+        right, bottom = np.floor(live.max(axis=0))
+        return pg.Rect(int(left), int(top), int(right - left) + self.size + 1, int(bottom - top) + self.size + 1)
 
-    def draw(self, surface):
-        pg.draw.ellipse(surface, self.color, pg.Rect(self.pos, (self.size, self.size)))
+    def draw(self, surface, offset=(0, 0)):
+        live = len(self)
+        if live == 0:
+            return
+        xs, ys = self._draw_x[:live], self._draw_y[:live]
+        np.copyto(xs, self.pos[self.start:self.end, 0], casting='unsafe')
+        np.copyto(ys, self.pos[self.start:self.end, 1], casting='unsafe')
+        if offset != (0, 0):
+            xs -= offset[0]
+            ys -= offset[1]
+        sprites = self.sprites
+        for entry, color, x, y in zip(self._entries, memoryview(self.color)[self.start:self.end], memoryview(xs), memoryview(ys)):
+            entry[0] = sprites[color]
+            dest = entry[1]
+            dest[0] = x
+            dest[1] = y
+        surface.blits(islice(self._entries, live), doreturn=False)
@@ -0,0 +1,212 @@
+import json
+from collections import defaultdict, deque
+from itertools import chain
+from time import perf_counter
+from typing import Deque, Dict, List, Optional, Tuple
+import pygame as pg
+import numpy as np
+
+# (object attribute path, method name, phase name) of everything timed while the profiler is on
+PHASES = [
+    ('', 'handle_events', 'handle_events'),
+    ('', 'step', 'tick'),
+    ('', 'handle_collision', 'handle_collision'),
+    ('', 'handle_food_collision', 'handle_food_collision'),
+    ('', 'handle_food_in_snake_collision', 'handle_food_in_snake_collision'),
+    ('snake', 'move', 'Snake.move'),
+    ('', 'draw_objects', 'draw_objects'),
+    ('foods', 'draw_food', 'draw_food'),
+    ('snake', 'draw_snake', 'draw_snake'),
+    ('sprites', 'draw', 'sprites.draw'),
+    ('particles', 'update', 'particles.update'),
+    ('particles', 'draw', 'particles.draw'),
+    ('', 'display_scores', 'display_scores'),
+]
+
+
+class NullPhase:
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+NULL_PHASE = NullPhase()
+PHASES_ORDER = [phase_name for _, _, phase_name in PHASES]
+
+
+class Phase:
+    def __init__(self, profiler: 'FrameProfiler', name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start = perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        self.profiler.add(self.name, self.start, perf_counter())
+
+
+class FrameProfiler:
+    # Times each phase of a frame. While it is off nothing is wrapped, so it costs nothing;
+    # turning it on wraps the game's methods with timers (see PHASES).
+    def __init__(self, game, history: int = 240, trace_path: Optional[str] = None, max_trace_events: int = 1000000) -> None:
+        self.game = game
+        self.enabled: bool = False
+        self.history = history
+        self.frame_times: Deque[float] = deque(maxlen=history)
+        self.phase_times: Dict[str, Deque[float]] = {}
+        self.current: Dict[str, float] = defaultdict(float)
+        self.frame_start: float = 0
+        self.wrapped: List[Tuple[object, str]] = []
+
+        # Chrome trace events (open the file in chrome://tracing or Perfetto)
+        self.trace_path = trace_path
+        self.max_trace_events = max_trace_events
+        self.trace: List[Dict] = []
+        self.origin = perf_counter()
+
+        # The overlay text is only rendered a few times per second
+        self.font: Optional[pg.font.Font] = None
+        self.lines: List[Tuple[pg.Surface, float]] = []
+        self.last_refresh: float = 0
+        self.overlay_rect = pg.Rect(game.screen.get_width() - 330, 10, 320, 60 + 18 * len(PHASES))
+
+        if trace_path is not None:
+            self.enable()
+
+    def toggle(self) -> None:
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+
+    def enable(self) -> None:
+        if self.enabled:
+            return
+        self.enabled = True
+        for attribute, method_name, phase_name in PHASES:
+            owner = getattr(self.game, attribute) if attribute else self.game
+            # Optional parts of the game (like the textured renderer) are None when they are off
+            if owner is not None:
+                self.wrap(owner, method_name, phase_name)
+        # The game only begins frames while the profiler is on, but it ends the one it was turned on in
+        self.begin_frame()
+
+    def disable(self) -> None:
+        # Keep timing while a trace is being recorded
+        if not self.enabled or self.trace_path is not None:
+            return
+        self.enabled = False
+        for owner, method_name in self.wrapped:
+            delattr(owner, method_name)
+        self.wrapped = []
+        self.frame_times.clear()
+        self.phase_times.clear()
+
+    def wrap(self, owner, method_name: str, phase_name: str) -> None:
+        method = getattr(owner, method_name)
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.add(phase_name, start, perf_counter())
+
+        # The instance attribute hides the class method until it is deleted again
+        setattr(owner, method_name, timed)
+        self.wrapped.append((owner, method_name))
+
+    def phase(self, name: str):
+        # For code that is not a method, like pg.display.flip: with profiler.phase('flip'): ...
+        return Phase(self, name) if self.enabled else NULL_PHASE
+
+    def add(self, name: str, start: float, end: float) -> None:
+        self.current[name] += end - start
+        if self.trace_path is not None and len(self.trace) < self.max_trace_events:
+            self.trace.append({'name': name, 'ph': 'X', 'pid': 1, 'tid': 1,
+                               'ts': (start - self.origin) * 1e6, 'dur': (end - start) * 1e6})
+
+    def begin_frame(self) -> None:
+        self.frame_start = perf_counter()
+
+    def end_frame(self) -> None:
+        end = perf_counter()
+        self.frame_times.append((end - self.frame_start) * 1000)
+        for name in chain(PHASES_ORDER, self.current):
+            if name not in self.phase_times:
+                self.phase_times[name] = deque(maxlen=self.history)
+        for name, history in self.phase_times.items():
+            history.append(self.current.get(name, 0) * 1000)
+        self.current.clear()
+        if self.trace_path is not None and len(self.trace) < self.max_trace_events:
+            self.trace.append({'name': 'frame', 'ph': 'X', 'pid': 1, 'tid': 0,
+                               'ts': (self.frame_start - self.origin) * 1e6, 'dur': (end - self.frame_start) * 1e6})
+
+    def refresh(self) -> None:
+        if self.font is None:
+            self.font = self.game.assets.font(20)
+        times = np.array(self.frame_times)
+        p50, p95, p99 = np.percentile(times, (50, 95, 99)) if len(times) else (0, 0, 0)
+        lines = [(f"FPS {self.game.clock.get_fps():.0f}   frame p50 {p50:.2f} p95 {p95:.2f} p99 {p99:.2f} ms", 0)]
+        for name, history in self.phase_times.items():
+            average = sum(history) / len(history) if history else 0
+            lines.append((f"{name} {average:.3f} ms", average))
+        # The numbers change all the time, so these don't go through the HUD's text cache
+        self.lines = [(self.font.render(text, True, 'white'), ms) for text, ms in lines]
+
+    def draw_overlay(self, surface: pg.Surface) -> pg.Rect:
+        now = perf_counter()
+        if now - self.last_refresh > 0.25:
+            self.last_refresh = now
+            self.refresh()
+
+        surface.fill((20, 20, 20), self.overlay_rect)
+        x, y = self.overlay_rect.x + 6, self.overlay_rect.y + 6
+        for text, ms in self.lines:
+            # One frame at 60 fps fills the whole bar
+            bar_width = int(min(ms / (1000 / 60), 1) * (self.overlay_rect.width - 12))
+            if bar_width:
+                surface.fill((0, 120, 200), (x, y + 13, bar_width, 3))
+            surface.blit(text, (x, y))
+            y += 18
+            if y > self.overlay_rect.bottom - 18:
+                break
+        return self.overlay_rect
+
+    def save_trace(self) -> None:
+        if self.trace_path is None:
+            return
+        with open(self.trace_path, 'w') as f:
+            json.dump({'traceEvents': self.trace, 'displayTimeUnit': 'ms'}, f)
+
+
+class StartupTimer:
+    # Time from start to the first frame, split into the steps SnakeGame.__init__ goes through
+    def __init__(self, start: Optional[float] = None) -> None:
+        self.start = perf_counter() if start is None else start
+        self.last = self.start
+        self.steps: List[Tuple[str, float]] = []
+
+    def mark(self, name: str) -> None:
+        # Time since the previous mark goes to name
+        now = perf_counter()
+        self.steps.append((name, (now - self.last) * 1000))
+        self.last = now
+
+    @property
+    def total(self) -> float:
+        return (self.last - self.start) * 1000
+
+    def report(self, load_times: Optional[Dict[str, float]] = None) -> str:
+        load_times = load_times or {}
+        width = max(len(name) for name in chain([name for name, _ in self.steps], load_times))
+        lines = ["Startup times (ms):"]
+        lines += [f"  {name:<{width}} {ms:8.2f}" for name, ms in self.steps]
+        lines.append(f"  {'total':<{width}} {self.total:8.2f}")
+        if load_times:
+            lines.append("Assets (ms, sounds and images load in the background):")
+            lines += [f"  {name:<{width}} {ms:8.2f}" for name, ms in load_times.items()]
+        return '\n'.join(lines)
@@ -0,0 +1,147 @@
+from collections import deque
+from itertools import islice
+from typing import Deque, Dict, List, Optional, Set, Tuple
+import pygame as pg
+
+
+class DirtyRenderer:
+    # Keeps the board (background, food and snake) on its own surface and only redraws the tiles
+    # that changed since the last frame. Particles and HUD text are drawn on top, and only the
+    # changed parts of the screen are presented with pg.display.update(rects).
+    def __init__(self, game) -> None:
+        self.game = game
+        self.board: pg.Surface = pg.Surface(game.screen.get_size()).convert()
+        self.full_redraw: bool = True
+
+        # What the board surface currently shows
+        self.snake_tiles: Deque[Tuple[int, int]] = deque()
+        self.added: int = 0
+        self.removed: int = 0
+        self.food_tiles: Set[Tuple[int, int]] = set()
+        self.food_color: Tuple[int, int, int] = game.RED
+
+        # What was drawn over the board last frame
+        self.particle_rect: Optional[pg.Rect] = None
+        self.overlay_rect: Optional[pg.Rect] = None
+        self.hud: Dict[Tuple, Tuple[pg.Surface, pg.Rect]] = {}
+
+    def invalidate(self) -> None:
+        self.full_redraw = True
+
+    def redraw_board(self) -> None:
+        game = self.game
+        self.board.fill(game.BLACK)
+        game.foods.draw_food(game.foods.foods, self.board)
+        game.snake.draw_snake(self.board)
+
+        self.snake_tiles = deque(segment.center for segment in game.snake.segments)
+        self.added, self.removed = game.snake.added, game.snake.removed
+        self.food_tiles = {food.center for food in game.foods.foods}
+        self.food_color = game.BLUE if len(game.foods.foods) == 1 else game.RED
+        self.full_redraw = False
+
+    def draw_tile(self, center: Tuple[int, int]) -> pg.Rect:
+        game = self.game
+        tile = pg.Rect(0, 0, game.TILE_SIZE, game.TILE_SIZE)
+        tile.center = center
+        self.board.fill(game.BLACK, tile)
+        if center in self.food_tiles:
+            self.board.fill(self.food_color, tile)
+        if center == game.snake._snake.center:
+            self.board.fill(game.DARK_GREEN, tile)
+        elif center in game.snake.occupancy:
+            self.board.fill(game.GREEN, tile)
+        return tile
+
+    def update_board(self) -> List[pg.Rect]:
+        game = self.game
+        segments = game.snake.segments
+        changed = set()
+
+        # Segments added since the last frame, the old head turns into a body segment
+        added = min(game.snake.added - self.added, len(segments))
+        if added and self.snake_tiles:
+            changed.add(self.snake_tiles[-1])
+        new_tiles = [segment.center for segment in islice(reversed(segments), added)]
+        self.snake_tiles.extend(reversed(new_tiles))
+        changed.update(new_tiles)
+        # Whatever is left over at the tail end has been vacated
+        while len(self.snake_tiles) > len(segments):
+            changed.add(self.snake_tiles.popleft())
+        self.added, self.removed = game.snake.added, game.snake.removed
+
+        food_tiles = {food.center for food in game.foods.foods}
+        food_color = game.BLUE if len(game.foods.foods) == 1 else game.RED
+        if food_color != self.food_color:
+            changed.update(food_tiles | self.food_tiles)
+        else:
+            changed.update(food_tiles ^ self.food_tiles)
+        self.food_tiles, self.food_color = food_tiles, food_color
+
+        return [self.draw_tile(center) for center in changed]
+
+    def render(self) -> None:
+        game = self.game
+        screen = game.screen
+        game.particles.update()
+
+        if self.full_redraw:
+            self.redraw_board()
+            self.particle_rect = None
+            self.hud = {}
+            dirty = [screen.get_rect()]
+        else:
+            dirty = self.update_board()
+
+        particle_rect = game.particles.get_bounds()
+        for rect in (self.particle_rect, particle_rect):
+            if rect is not None:
+                dirty.append(rect)
+        self.particle_rect = particle_rect
+
+        # The profiler overlay changes every frame while it is shown
+        overlay_rect = game.profiler.overlay_rect if game.profiler.enabled else None
+        for rect in (self.overlay_rect, overlay_rect):
+            if rect is not None:
+                dirty.append(rect)
+        self.overlay_rect = overlay_rect
+
+        # HUD lines that changed, appeared or went away
+        hud = {}
+        for font, text, pos in game.get_hud(game.score, game.best_score, game.foods.foods):
+            key = (font, text, pos)
+            if key in self.hud:
+                hud[key] = self.hud[key]
+            else:
+                surface = game.render_text(font, text)
+                hud[key] = (surface, surface.get_rect(topleft=pos))
+                dirty.append(hud[key][1])
+        for key, (surface, rect) in self.hud.items():
+            if key not in hud:
+                dirty.append(rect)
+        self.hud = hud
+
+        # Restoring the board erases any HUD line under a dirty rect, so those get redrawn
+        # (and their whole rect restored first, or the antialiased text would get bolder)
+        redraw_hud = []
+        pending = list(hud.values())
+        while pending:
+            overlapping = [item for item in pending if item[1].collidelist(dirty) != -1]
+            if not overlapping:
+                break
+            for item in overlapping:
+                pending.remove(item)
+                redraw_hud.append(item)
+                dirty.append(item[1])
+
+        if not dirty:
+            return
+
+        for rect in dirty:
+            screen.blit(self.board, rect, rect)
+        game.particles.draw(screen)
+        for surface, rect in redraw_hud:
+            screen.blit(surface, rect)
+        if overlay_rect is not None:
+            game.profiler.draw_overlay(screen)
+        pg.display.update(dirty)
@@ -0,0 +1,181 @@
+from argparse import ArgumentParser
+from struct import Struct
+from time import perf_counter
+from typing import Dict, List, Tuple
+from engine import CONFIG_FIELDS, SnakeEngine
+
+# File layout: header, then one event per input as (ticks since the last event as a varint, code byte)
+MAGIC = b'SNKR'
+VERSION = 2
+# magic, version, seed, width, height, config fields, ticks, final score, best score, foods eaten, event count
+HEADER = Struct(f'<4sBqII{len(CONFIG_FIELDS)}iIiiII')
+# Version 1 only had 16 bits for the width and height, worlds wider or taller than 65535 pixels didn't fit
+HEADERS = {1: Struct(f'<4sBqHH{len(CONFIG_FIELDS)}iIiiII'), VERSION: HEADER}
+
+# Event codes: 0-8 are turns, (dx + 1) * 3 + (dy + 1) with the direction in tiles
+RESTART = 9
+
+
+class Replay:
+    def __init__(self, seed: int, resolution: Tuple[int, int], config: Dict[str, int]) -> None:
+        self.seed = seed
+        self.resolution = resolution
+        self.config = config
+        # (tick, code) pairs, the event is applied before that tick is stepped
+        self.events: List[Tuple[int, int]] = []
+        self.ticks: int = 0
+        # Results of the recorded session, used to verify a replay
+        self.score: int = 0
+        self.best_score: int = 0
+        self.foods_eaten: int = 0
+
+    def to_bytes(self) -> bytes:
+        config = [self.config[field] for field in CONFIG_FIELDS]
+        data = bytearray(HEADER.pack(MAGIC, VERSION, self.seed, *self.resolution, *config, self.ticks,
+                                     self.score, self.best_score, self.foods_eaten, len(self.events)))
+        last_tick = 0
+        for tick, code in self.events:
+            delta = tick - last_tick
+            last_tick = tick
+            while delta >= 0x80:
+                data.append(delta & 0x7f | 0x80)
+                delta >>= 7
+            data.append(delta)
+            data.append(code)
+        return bytes(data)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Replay':
+        header = HEADERS.get(data[4]) if data[:4] == MAGIC and len(data) > 4 else None
+        if header is None:
+            raise ValueError("Not a snake replay file or made by a different version of the game")
+        if len(data) < header.size:
+            raise ValueError("This replay is cut short")
+        fields = header.unpack_from(data)
+        seed, width, height = fields[2:5]
+        config = dict(zip(CONFIG_FIELDS, fields[5:5 + len(CONFIG_FIELDS)]))
+        replay = cls(seed, (width, height), config)
+        replay.ticks, replay.score, replay.best_score, replay.foods_eaten, event_count = fields[5 + len(CONFIG_FIELDS):]
+
+        offset, tick = header.size, 0
+        for _ in range(event_count):
+            delta, shift = 0, 0
+            while offset < len(data) and data[offset] & 0x80:
+                delta |= (data[offset] & 0x7f) << shift
+                shift += 7
+                offset += 1
+            if offset + 2 > len(data):
+                raise ValueError("This replay is cut short")
+            delta |= data[offset] << shift
+            tick += delta
+            replay.events.append((tick, data[offset + 1]))
+            offset += 2
+        return replay
+
+    def save(self, file_path: str) -> None:
+        with open(file_path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, file_path: str) -> 'Replay':
+        with open(file_path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+    def create_engine(self) -> SnakeEngine:
+        engine = SnakeEngine(self.resolution, self.seed)
+        engine.apply_config(self.config)
+        return engine
+
+
+class ReplayRecorder:
+    # Logs the inputs given to an engine, set up before the first tick
+    def __init__(self, engine: SnakeEngine) -> None:
+        self.engine = engine
+        self.replay = Replay(engine.seed, (engine.width, engine.height), engine.get_config())
+        engine.recorder = self
+
+    def record_turn(self, direction: Tuple[int, int]) -> None:
+        dx, dy = direction[0] // self.engine.TILE_SIZE, direction[1] // self.engine.TILE_SIZE
+        if not (-1 <= dx <= 1 and -1 <= dy <= 1):
+            raise ValueError(f"Can't record a move of more than one tile: {direction}")
+        self.replay.events.append((self.replay.ticks, (dx + 1) * 3 + (dy + 1)))
+
+    def record_restart(self) -> None:
+        self.replay.events.append((self.replay.ticks, RESTART))
+
+    def on_step(self) -> None:
+        self.replay.ticks += 1
+        self.replay.score = self.engine.score
+        self.replay.best_score = max(self.replay.best_score, self.engine.score)
+        self.replay.foods_eaten = max(self.replay.foods_eaten, self.engine.foods_eaten)
+
+
+class ReplayPlayer:
+    # Feeds the recorded inputs back into an engine, one tick per step()
+    def __init__(self, replay: Replay, engine: SnakeEngine) -> None:
+        self.replay = replay
+        self.engine = engine
+        self.tick: int = 0
+        self.next_event: int = 0
+        self.best_score: int = 0
+        self.foods_eaten: int = 0
+
+    @property
+    def finished(self) -> bool:
+        return self.tick >= self.replay.ticks
+
+    def apply_events(self) -> None:
+        events = self.replay.events
+        while self.next_event < len(events) and events[self.next_event][0] <= self.tick:
+            code = events[self.next_event][1]
+            if code == RESTART:
+                self.engine.reset()
+            else:
+                tile = self.engine.TILE_SIZE
+                self.engine.turn(((code // 3 - 1) * tile, (code % 3 - 1) * tile))
+            self.next_event += 1
+
+    def step(self) -> bool:
+        # Deaths are followed by a recorded restart, so this never reports a game over
+        if self.finished:
+            return False
+        self.apply_events()
+        self.engine.step()
+        self.tick += 1
+        self.best_score = max(self.best_score, self.engine.score)
+        self.foods_eaten = max(self.foods_eaten, self.engine.foods_eaten)
+        return False
+
+
+def play_headless(replay: Replay) -> ReplayPlayer:
+    player = ReplayPlayer(replay, replay.create_engine())
+    while not player.finished:
+        player.step()
+    return player
+
+
+def verify(replay: Replay) -> bool:
+    player = play_headless(replay)
+    return (player.engine.score, player.best_score, player.foods_eaten) == (replay.score, replay.best_score, replay.foods_eaten)
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Play snake replays headless at full speed and check their results')
+    parser.add_argument('replays', nargs='+', help='replay files')
+    args = parser.parse_args()
+
+    start, failed, ticks = perf_counter(), 0, 0
+    for file_path in args.replays:
+        try:
+            replay = Replay.load(file_path)
+        except (OSError, ValueError) as e:
+            failed += 1
+            print(f"FAIL {file_path}: {e}")
+            continue
+        ok = verify(replay)
+        failed += not ok
+        ticks += replay.ticks
+        print(f"{'OK  ' if ok else 'FAIL'} {file_path}: best score {replay.best_score}, {replay.ticks} ticks")
+    elapsed = perf_counter() - start
+    print(f"{len(args.replays) - failed}/{len(args.replays)} replays match, {ticks / max(elapsed, 1e-9):.0f} ticks/s")
+    exit(1 if failed else 0)
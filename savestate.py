@@ -0,0 +1,359 @@
+import os
+from array import array
+from collections import Counter, deque
+from itertools import chain, islice
+from struct import Struct, error as StructError
+from sys import getsizeof
+from typing import Deque, Dict, List, Optional, Tuple
+from engine import CONFIG_FIELDS, SnakeEngine
+
+# File layout: header, the snake from tail to head as a path (see pack_path), the foods, the free
+# cells that moved from their starting slot (slot, x, y) and the RNG state
+MAGIC = b'SNKS'
+VERSION = 2
+# magic, version, width, height, tile size, config fields, ticks, length, level, score, foods eaten, remaining foods,
+# direction, segment count, food count, moved free cell count
+HEADER = Struct(f'<4sBIIB{len(CONFIG_FIELDS)}iIIIiIIhhIII')
+POINT = Struct('<ii')
+SLOT = Struct('<III')
+# Header and moved free cell layout of every version that can be loaded. Version 1 only had 16 bits
+# for the board size and cell positions, worlds over 65535 pixels didn't fit
+FORMATS = {1: (Struct(f'<4sBHHB{len(CONFIG_FIELDS)}iIIIiIIhhIII'), Struct('<IHH')), VERSION: (HEADER, SLOT)}
+# Random.getstate(): 624 words of Mersenne Twister state plus its position, and the cached gauss value
+RNG_STATE = Struct('<625IBd')
+
+# A path step to one of the 8 neighbouring tiles (or the same tile) is one byte, like replay turn
+# codes: (dx + 1) * 3 + (dy + 1) in tiles. Anything else is ESCAPE followed by the point.
+ESCAPE = 0xff
+
+# One tick of changes: flags, heads added, tails removed, free cell swaps
+DELTA = Struct('<BHHI')
+SCALARS_CHANGED, FOODS_CHANGED, RNG_CHANGED = 1, 2, 4
+# length, level, score, foods eaten, remaining foods, direction
+SCALARS = Struct('<IIiIIhh')
+
+
+def pack_path(data: bytearray, centers, previous: Optional[Tuple[int, int]], tile: int) -> None:
+    for center in centers:
+        if previous is not None:
+            dx, dy = (center[0] - previous[0]) // tile, (center[1] - previous[1]) // tile
+            if -1 <= dx <= 1 and -1 <= dy <= 1 and (previous[0] + dx * tile, previous[1] + dy * tile) == center:
+                data.append((dx + 1) * 3 + (dy + 1))
+                previous = center
+                continue
+        data.append(ESCAPE)
+        data += POINT.pack(*center)
+        previous = center
+
+
+def unpack_path(data: bytes, offset: int, count: int, previous: Optional[Tuple[int, int]],
+                tile: int) -> Tuple[List[Tuple[int, int]], int]:
+    centers = []
+    for _ in range(count):
+        code = data[offset]
+        offset += 1
+        if code == ESCAPE:
+            previous = POINT.unpack_from(data, offset)
+            offset += POINT.size
+        elif previous is None:
+            raise ValueError("A path has to start with a full point")
+        else:
+            previous = (previous[0] + (code // 3 - 1) * tile, previous[1] + (code % 3 - 1) * tile)
+        centers.append(previous)
+    return centers, offset
+
+
+class Snapshot:
+    # Everything a game needs to carry on exactly as it would have: the body, foods, score and
+    # friends, the RNG and the order of the free cells (which cell the RNG picks for the next
+    # food depends on it). Save-states are these as bytes, and so are the rewind keyframes.
+    def __init__(self, resolution: Tuple[int, int], tile: int, config: Dict[str, int]) -> None:
+        self.resolution = resolution
+        self.tile = tile
+        self.config = config
+        self.ticks: int = 0
+        self.length: int = 1
+        self.level: int = 1
+        self.score: int = 0
+        self.foods_eaten: int = 0
+        self.remaining_foods: int = 0
+        self.snake_dir: Tuple[int, int] = (0, 0)
+        self.segments: Deque[Tuple[int, int]] = deque()
+        self.foods: List[Tuple[int, int]] = []
+        # Free cell slots that don't hold the cell they started with, usually a small part of the board
+        self.displaced: Dict[int, Tuple[int, int]] = {}
+        self.rng_state: Tuple = ()
+
+    @classmethod
+    def capture(cls, engine: SnakeEngine) -> 'Snapshot':
+        snapshot = cls((engine.width, engine.height), engine.TILE_SIZE, engine.get_config())
+        snapshot.ticks, snapshot.length, snapshot.level, snapshot.score = engine.ticks, engine.length, engine.level, engine.score
+        snapshot.foods_eaten, snapshot.remaining_foods = engine.foods_eaten, engine.remaining_foods
+        snapshot.snake_dir = engine.snake_dir
+        snapshot.segments = deque(segment.center for segment in engine.snake.segments)
+        snapshot.foods = [food.center for food in engine.foods.foods]
+        snapshot.displaced = engine.free_cells.displaced()
+        snapshot.rng_state = engine.RNG.getstate()
+        return snapshot
+
+    def restore(self, engine: SnakeEngine) -> None:
+        if (engine.width, engine.height, engine.TILE_SIZE) != (*self.resolution, self.tile):
+            raise ValueError(f"This save-state is for a {self.resolution[0]}x{self.resolution[1]} board")
+        engine.apply_config(self.config)
+        engine.ticks, engine.length, engine.level, engine.score = self.ticks, self.length, self.level, self.score
+        engine.foods_eaten, engine.remaining_foods = self.foods_eaten, self.remaining_foods
+        engine.snake_dir = self.snake_dir
+        engine.snake.set_body(self.segments)
+        foods = []
+        for center in self.foods:
+            food = engine.snake._snake.copy()
+            food.center = center
+            foods.append(food)
+        engine.foods.foods = foods
+        # Each snake segment and food blocks its cell once, like while playing
+        free_cells = engine.free_cells
+        free_cells.restore(self.displaced, Counter(center for center in chain(self.segments, self.foods) if center in free_cells.slots))
+        engine.RNG.setstate(self.rng_state)
+
+    def apply(self, delta: bytes, positions: List[Tuple[int, int]]) -> None:
+        # Moves the snapshot one tick forward with a RewindBuffer delta
+        flags, heads, tails, swaps = DELTA.unpack_from(delta)
+        previous = self.segments[-1] if self.segments else None
+        centers, offset = unpack_path(delta, DELTA.size, heads, previous, self.tile)
+        for _ in range(tails):
+            self.segments.popleft()
+        self.segments.extend(centers)
+
+        journal = array('I')
+        journal.frombytes(delta[offset:offset + swaps * 2 * journal.itemsize])
+        offset += swaps * 2 * journal.itemsize
+        displaced = self.displaced
+        for index in range(0, len(journal), 2):
+            slot, other = journal[index], journal[index + 1]
+            cell, other_cell = displaced.get(slot, positions[slot]), displaced.get(other, positions[other])
+            for moved_slot, moved_cell in ((slot, other_cell), (other, cell)):
+                if moved_cell == positions[moved_slot]:
+                    displaced.pop(moved_slot, None)
+                else:
+                    displaced[moved_slot] = moved_cell
+
+        self.ticks += 1
+        if flags & SCALARS_CHANGED:
+            self.length, self.level, self.score, self.foods_eaten, self.remaining_foods, dx, dy = SCALARS.unpack_from(delta, offset)
+            self.snake_dir = (dx, dy)
+            # length is a config field too, kept the same as in a snapshot captured at this tick
+            self.config['length'] = self.length
+            offset += SCALARS.size
+        if flags & FOODS_CHANGED:
+            self.foods, offset = unpack_points(delta, offset)
+        if flags & RNG_CHANGED:
+            self.rng_state = unpack_rng_state(delta, offset)
+
+    def to_bytes(self) -> bytes:
+        config = [self.config[field] for field in CONFIG_FIELDS]
+        data = bytearray(HEADER.pack(MAGIC, VERSION, *self.resolution, self.tile, *config, self.ticks, self.length, self.level,
+                                     self.score, self.foods_eaten, self.remaining_foods, *self.snake_dir,
+                                     len(self.segments), len(self.foods), len(self.displaced)))
+        pack_path(data, self.segments, None, self.tile)
+        for center in self.foods:
+            data += POINT.pack(*center)
+        # In slot order, like FreeCells.displaced() returns them, so equal snapshots give equal bytes
+        for slot in sorted(self.displaced):
+            data += SLOT.pack(slot, *self.displaced[slot])
+        data += pack_rng_state(self.rng_state)
+        return bytes(data)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Snapshot':
+        header, slot_format = FORMATS.get(data[4], (None, None)) if data[:4] == MAGIC and len(data) > 4 else (None, None)
+        if header is None:
+            raise ValueError("Not a snake save-state or made by a different version of the game")
+        if len(data) < header.size:
+            raise ValueError("This save-state is cut short")
+        fields = header.unpack_from(data)
+        width, height, tile = fields[2:5]
+        snapshot = cls((width, height), tile, dict(zip(CONFIG_FIELDS, fields[5:5 + len(CONFIG_FIELDS)])))
+        (snapshot.ticks, snapshot.length, snapshot.level, snapshot.score, snapshot.foods_eaten, snapshot.remaining_foods,
+         dx, dy, segment_count, food_count, displaced_count) = fields[5 + len(CONFIG_FIELDS):]
+        if not segment_count:
+            raise ValueError("This save-state has no snake in it")
+        snapshot.snake_dir = (dx, dy)
+        # A file written only part of the way runs out somewhere in here
+        try:
+            segments, offset = unpack_path(data, header.size, segment_count, None, tile)
+            snapshot.segments = deque(segments)
+            for _ in range(food_count):
+                snapshot.foods.append(POINT.unpack_from(data, offset))
+                offset += POINT.size
+            for _ in range(displaced_count):
+                slot, x, y = slot_format.unpack_from(data, offset)
+                snapshot.displaced[slot] = (x, y)
+                offset += slot_format.size
+            snapshot.rng_state = unpack_rng_state(data, offset)
+        except (StructError, IndexError):
+            raise ValueError("This save-state is cut short") from None
+        return snapshot
+
+    def save(self, file_path: str) -> None:
+        # Written next to the old file and swapped in, so a game killed while saving keeps the last save
+        data = self.to_bytes()
+        temp_path = file_path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, file_path)
+
+    @classmethod
+    def load(cls, file_path: str) -> 'Snapshot':
+        with open(file_path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+
+def pack_points(data: bytearray, points: List[Tuple[int, int]]) -> None:
+    data += len(points).to_bytes(4, 'little')
+    for point in points:
+        data += POINT.pack(*point)
+
+
+def unpack_points(data: bytes, offset: int) -> Tuple[List[Tuple[int, int]], int]:
+    count = int.from_bytes(data[offset:offset + 4], 'little')
+    offset += 4
+    points = [POINT.unpack_from(data, offset + index * POINT.size) for index in range(count)]
+    return points, offset + count * POINT.size
+
+
+def pack_rng_state(state: Tuple) -> bytes:
+    version, words, gauss_next = state
+    return RNG_STATE.pack(*words, gauss_next is not None, gauss_next or 0.0)
+
+
+def unpack_rng_state(data: bytes, offset: int) -> Tuple:
+    fields = RNG_STATE.unpack_from(data, offset)
+    return 3, fields[:625], fields[626] if fields[625] else None
+
+
+class RewindBuffer:
+    # The last stretch of a game for rewinding, in a fixed amount of memory. Each tick is stored as
+    # what changed in it (heads added, tails removed, free cell swaps, and the foods, numbers or RNG
+    # state if they changed), a few dozen bytes no matter how long the snake is. Every
+    # keyframe_interval ticks, and whenever a new game starts, a full Snapshot is stored instead.
+    # Going back finds the keyframe before the tick, plays the changes after it forward on the
+    # snapshot and restores that. The oldest ticks are dropped once capacity bytes are used.
+    def __init__(self, engine: SnakeEngine, capacity: int = 1 << 20, keyframe_interval: int = 100) -> None:
+        self.engine = engine
+        self.capacity = capacity
+        self.keyframe_interval = keyframe_interval
+        # One entry per tick, keyframes start with MAGIC
+        self.entries: Deque[bytes] = deque()
+        self.size: int = 0
+        self.since_keyframe: int = 0
+        # What the game was at when the last entry was made
+        self.added: int = 0
+        self.removed: int = 0
+        self.ticks: int = 0
+        self.head: Optional[Tuple[int, int]] = None
+        self.scalars: Tuple = ()
+        self.foods: List[Tuple[int, int]] = []
+        self.journal = array('I')
+        engine.free_cells.journal = self.journal
+
+    def __len__(self) -> int:
+        # Ticks that can be gone back
+        return max(len(self.entries) - 1, 0)
+
+    def get_scalars(self) -> Tuple:
+        engine = self.engine
+        return engine.length, engine.level, engine.score, engine.foods_eaten, engine.remaining_foods, *engine.snake_dir
+
+    def capture(self) -> None:
+        # Call after every tick
+        engine = self.engine
+        snake = engine.snake
+        added = snake.added - self.added
+        # A new game (or a snake that moved more than its length) starts from a keyframe
+        if (not self.entries or engine.ticks != self.ticks + 1 or added >= len(snake.segments)
+                or self.since_keyframe >= self.keyframe_interval):
+            self.capture_keyframe()
+            return
+        self.push(self.make_delta(added))
+        self.since_keyframe += 1
+        self.rebase()
+
+    def make_delta(self, added: int) -> bytes:
+        engine = self.engine
+        segments = engine.snake.segments
+        body = bytearray()
+        pack_path(body, (segment.center for segment in islice(segments, len(segments) - added, len(segments))),
+                  self.head, engine.TILE_SIZE)
+        body += self.journal.tobytes()
+        flags = 0
+        scalars = self.get_scalars()
+        if scalars != self.scalars:
+            flags |= SCALARS_CHANGED
+            body += SCALARS.pack(*scalars)
+        foods = [food.center for food in engine.foods.foods]
+        if foods != self.foods:
+            flags |= FOODS_CHANGED
+            pack_points(body, foods)
+            # New foods mean the RNG was used
+            if not set(foods) <= set(self.foods):
+                flags |= RNG_CHANGED
+                body += pack_rng_state(engine.RNG.getstate())
+        return DELTA.pack(flags, added, engine.snake.removed - self.removed, len(self.journal) // 2) + body
+
+    def push(self, entry: bytes) -> None:
+        self.entries.append(entry)
+        self.size += getsizeof(entry)
+        while self.size > self.capacity and len(self.entries) > 1:
+            self.size -= getsizeof(self.entries.popleft())
+            # Changes are useless without the keyframe before them
+            while self.entries and not self.entries[0].startswith(MAGIC):
+                self.size -= getsizeof(self.entries.popleft())
+
+    def rebase(self) -> None:
+        # The game as it is now is what the next entry is made against
+        engine = self.engine
+        self.added, self.removed, self.ticks = engine.snake.added, engine.snake.removed, engine.ticks
+        self.head = engine.snake.segments[-1].center
+        self.scalars = self.get_scalars()
+        self.foods = [food.center for food in engine.foods.foods]
+        del self.journal[:]
+
+    def snapshot(self, ticks_back: int) -> Snapshot:
+        # The game ticks_back ticks ago, 0 is the last tick captured
+        target = len(self.entries) - 1 - ticks_back
+        keyframe = target
+        while not self.entries[keyframe].startswith(MAGIC):
+            keyframe -= 1
+        snapshot = Snapshot.from_bytes(self.entries[keyframe])
+        positions = self.engine.free_cells.positions
+        for index in range(keyframe + 1, target + 1):
+            snapshot.apply(self.entries[index], positions)
+        return snapshot
+
+    def rewind(self, ticks: int) -> int:
+        # Puts the game back up to ticks ticks, returns how many it went back
+        ticks = min(ticks, len(self))
+        if ticks <= 0:
+            return 0
+        snapshot = self.snapshot(ticks)
+        for _ in range(ticks):
+            self.size -= getsizeof(self.entries.pop())
+        snapshot.restore(self.engine)
+        self.since_keyframe = 0
+        for entry in reversed(self.entries):
+            if entry.startswith(MAGIC):
+                break
+            self.since_keyframe += 1
+        self.rebase()
+        return ticks
+
+    def restored(self) -> None:
+        # The game was put back to a save-state, carry on from there
+        self.entries.clear()
+        self.size = 0
+        self.capture_keyframe()
+
+    def capture_keyframe(self) -> None:
+        self.push(Snapshot.capture(self.engine).to_bytes())
+        self.since_keyframe = 0
+        self.rebase()
@@ -0,0 +1,45 @@
+from time import perf_counter
+from typing import Callable
+
+class FixedStepScheduler:
+    # Runs the game logic at a fixed number of ticks per second no matter how fast frames are
+    # rendered. Frame time goes into an accumulator and one tick is run for every step_ms in it.
+    def __init__(self, step_ms: float, max_catch_up: int = 5, turbo: bool = False, turbo_budget_ms: float = 15) -> None:
+        self.step_ms = step_ms
+        # At most this many ticks per frame, so a slow frame doesn't snowball into even slower ones
+        self.max_catch_up = max_catch_up
+        # In turbo mode ticks run back to back for turbo_budget_ms of every frame
+        self.turbo = turbo
+        self.turbo_budget_ms = turbo_budget_ms
+        self.accumulator: float = 0
+        self.ticks: int = 0
+
+    @property
+    def alpha(self) -> float:
+        # How far we are between the last tick and the next one, for render interpolation
+        if self.turbo:
+            return 1.0
+        return min(self.accumulator / self.step_ms, 1.0)
+
+    def reset(self) -> None:
+        self.accumulator = 0
+
+    def update(self, elapsed_ms: float, tick: Callable[[], bool]) -> bool:
+        # Runs the ticks that are due, stops early and returns True if a tick returns True
+        if self.turbo:
+            self.accumulator = 0
+            deadline = perf_counter() + self.turbo_budget_ms / 1000
+            while perf_counter() < deadline:
+                self.ticks += 1
+                if tick():
+                    return True
+            return False
+
+        self.accumulator = min(self.accumulator + elapsed_ms, self.max_catch_up * self.step_ms)
+        while self.accumulator >= self.step_ms:
+            self.accumulator -= self.step_ms
+            self.ticks += 1
+            if tick():
+                self.accumulator = 0
+                return True
+        return False
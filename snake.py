@@ -1,6 +1,9 @@
 import pygame as pg
 from base_object import BaseObject
-from pygame.math import Vector2
+from collections import Counter, deque
+from itertools import islice
+from typing import Deque, Iterable, Optional, Tuple
+from spatial_index import ChunkIndex
 
 class Snake(BaseObject):
     def __init__(self, main) -> None:
@@ -9,27 +12,116 @@ class Snake(BaseObject):
         mid_x = (self.main.width // 2) // self.TILE_SIZE * self.TILE_SIZE
         mid_y = (self.main.height // 2) // self.TILE_SIZE * self.TILE_SIZE
         self._snake.center = (mid_x, mid_y)
-        self.segments = [self._snake.copy()]
+        # Where the head was before the last move, for render interpolation
+        self.last_head: Tuple[int, int] = self._snake.center
+        # Body from tail to head, plus how many segments sit on each tile centre so
+        # collision checks are a lookup instead of a scan over the whole body
+        self.segments: Deque[pg.rect.Rect] = deque()
+        self.occupancy: Counter = Counter()
+        # Running totals of segments added and removed, so a renderer can tell what changed
+        self.added: int = 0
+        self.removed: int = 0
+        # Segments by chunk, only kept up to date once a camera needs it (see track_chunks)
+        self.chunks: Optional[ChunkIndex] = None
+        self.reset_body()
 
     def move(self, snake_dir) -> None:
+        self.last_head = self._snake.center
         self._snake.move_ip(snake_dir)
-        self.segments.append(self._snake.copy())
-        if len(self.segments) > self.main.length:
-            self.segments = self.segments[-self.main.length:]
+        self.add_segment(self._snake.copy())
+        while len(self.segments) > self.main.length:
+            self.remove_tail()
 
-    def draw_snake(self) -> None:
-        # Draw snake head
-        pg.draw.rect(self.main.screen, self.main.DARK_GREEN, self._snake)
-        # Draw snake segments
-        for segment in self.segments[0:-1]:
-            pg.draw.rect(self.main.screen, self.main.GREEN, segment)
+    def add_segment(self, segment: pg.rect.Rect) -> None:
+        self.segments.append(segment)
+        self.added += 1
+        self.occupancy[segment.center] += 1
+        self.main.free_cells.block(segment.center)
+        if self.chunks is not None:
+            self.chunks.add(segment.center)
+
+    def remove_tail(self) -> pg.rect.Rect:
+        segment = self.segments.popleft()
+        self.removed += 1
+        count = self.occupancy[segment.center] - 1
+        if count:
+            self.occupancy[segment.center] = count
+        else:
+            del self.occupancy[segment.center]
+        self.main.free_cells.unblock(segment.center)
+        if self.chunks is not None:
+            self.chunks.remove(segment.center)
+        return segment
+
+    def reset_body(self) -> None:
+        for segment in self.segments:
+            self.main.free_cells.unblock(segment.center)
+        self.segments.clear()
+        self.occupancy.clear()
+        if self.chunks is not None:
+            self.chunks.clear()
+        self.add_segment(self._snake.copy())
+
+    def set_body(self, centers: Iterable[Tuple[int, int]]) -> None:
+        # Puts back a body from a save-state, tail first. Everything counts as added, so whatever
+        # mirrors the body (renderers, the autopilot) starts over
+        for segment in self.segments:
+            self.main.free_cells.unblock(segment.center)
+        self.segments.clear()
+        self.occupancy.clear()
+        if self.chunks is not None:
+            self.chunks.clear()
+        for center in centers:
+            segment = self._snake.copy()
+            segment.center = center
+            self.add_segment(segment)
+        self._snake.center = self.segments[-1].center
+        self.last_head = self._snake.center
+
+    def in_body(self, pos: Tuple[int, int]) -> bool:
+        # True if a segment other than the head is on pos
+        count = self.occupancy.get(pos, 0)
+        if pos == self.segments[-1].center:
+            return count > 1
+        return count > 0
+
+    def head_in_body(self) -> bool:
+        return self.in_body(self._snake.center)
+
+    def track_chunks(self, chunk_size: int) -> None:
+        self.chunks = ChunkIndex(chunk_size)
+        for segment in self.segments:
+            self.chunks.add(segment.center)
+
+    def draw_snake(self, surface: Optional[pg.Surface] = None, alpha: float = 1.0, camera=None) -> None:
+        surface = self.main.screen if surface is None else surface
+        # Draw snake segments, with a camera only the ones in view are looked at
+        if camera is None:
+            for segment in islice(self.segments, len(self.segments) - 1):
+                pg.draw.rect(surface, self.main.GREEN, segment)
+        else:
+            tile = self._snake.copy()
+            for center in self.chunks.query(camera.visible_area(self.TILE_SIZE)):
+                if center != self._snake.center or self.occupancy[center] > 1:
+                    tile.center = center
+                    pg.draw.rect(surface, self.main.GREEN, camera.to_screen(tile))
+        # Draw snake head on top, alpha slides it from its last position to the current one between ticks
+        head = self._snake
+        if alpha < 1.0:
+            head = self._snake.copy()
+            head.center = self.get_head_center(alpha)
+        pg.draw.rect(surface, self.main.DARK_GREEN, head if camera is None else camera.to_screen(head))
+
+    def get_head_center(self, alpha: float = 1.0) -> Tuple[int, int]:
+        return (round(self.last_head[0] + (self._snake.centerx - self.last_head[0]) * alpha),
+                round(self.last_head[1] + (self._snake.centery - self.last_head[1]) * alpha))
 
     def reset_pos(self) -> None:
         mid_x = (self.main.width // 2) // self.TILE_SIZE * self.TILE_SIZE
         mid_y = (self.main.height // 2) // self.TILE_SIZE * self.TILE_SIZE
         self._snake.center = (mid_x, mid_y)
-                
+        self.last_head = self._snake.center
+
     @staticmethod
     def copy_snake(snake: pg.rect.Rect) -> pg.rect.Rect:
         return snake.copy()
-    
\ No newline at end of file
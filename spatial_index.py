@@ -0,0 +1,47 @@
+from collections import Counter, defaultdict
+from typing import Dict, Iterator, Tuple
+import pygame as pg
+
+class ChunkIndex:
+    # Positions bucketed into square chunks of chunk_size pixels, so everything inside a rect can
+    # be found by looking at the few chunks it overlaps instead of every position in the world.
+    # A position may carry more after x and y (the arena adds whose segment it is), only x and y
+    # are looked at.
+    def __init__(self, chunk_size: int) -> None:
+        self.chunk_size = chunk_size
+        # Chunk -> how many things are at each position in it
+        self.chunks: Dict[Tuple[int, int], Counter] = defaultdict(Counter)
+
+    def __len__(self) -> int:
+        return sum(sum(chunk.values()) for chunk in self.chunks.values())
+
+    def chunk_of(self, pos: Tuple[int, int]) -> Tuple[int, int]:
+        return pos[0] // self.chunk_size, pos[1] // self.chunk_size
+
+    def add(self, pos: Tuple[int, int]) -> None:
+        self.chunks[self.chunk_of(pos)][pos] += 1
+
+    def remove(self, pos: Tuple[int, int]) -> None:
+        key = self.chunk_of(pos)
+        chunk = self.chunks[key]
+        chunk[pos] -= 1
+        if chunk[pos] <= 0:
+            del chunk[pos]
+            if not chunk:
+                del self.chunks[key]
+
+    def clear(self) -> None:
+        self.chunks.clear()
+
+    def query(self, rect: pg.Rect) -> Iterator[Tuple[int, int]]:
+        # Every distinct position inside rect
+        left, top = self.chunk_of(rect.topleft)
+        right, bottom = self.chunk_of(rect.bottomright)
+        for chunk_x in range(left, right + 1):
+            for chunk_y in range(top, bottom + 1):
+                chunk = self.chunks.get((chunk_x, chunk_y))
+                if chunk is None:
+                    continue
+                for pos in chunk:
+                    if rect.collidepoint(pos[0], pos[1]):
+                        yield pos
@@ -0,0 +1,154 @@
+import json
+import sqlite3
+from argparse import ArgumentParser
+from datetime import datetime
+from queue import Empty, Queue
+from threading import Event, Thread
+from time import time
+from typing import Dict, List, Optional, Tuple
+
+# One row per finished game, only ever appended to
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    finished REAL NOT NULL,
+    duration REAL NOT NULL,
+    ticks INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    foods_eaten INTEGER NOT NULL,
+    cheat_mode INTEGER NOT NULL,
+    config TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_leaderboard ON runs (cheat_mode, score DESC, finished);
+CREATE INDEX IF NOT EXISTS runs_history ON runs (finished DESC);
+'''
+COLUMNS = ('finished', 'duration', 'ticks', 'score', 'level', 'foods_eaten', 'cheat_mode', 'config')
+INSERT = f"INSERT INTO runs ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+
+class RunStats:
+    # Keeps every game in an SQLite file. The game loop only puts rows on a queue, a writer thread
+    # owns the connection and writes whatever has queued up in one transaction, so the disk is
+    # never waited on during a frame. Queries use their own connection, WAL lets them read while
+    # the writer writes.
+    def __init__(self, db_path: str = 'stats.db', batch_delay: float = 1.0) -> None:
+        self.db_path = db_path
+        # Rows wait this long for others to share their transaction
+        self.batch_delay = batch_delay
+        self.queue: Queue = Queue()
+        # Set once the writer has made the table (or failed to), creating the file is left to it too
+        self.ready = Event()
+        # Why the file can't be used (locked, read-only directory...), rows are dropped from then on
+        self.error: Optional[Exception] = None
+        self.reader: Optional[sqlite3.Connection] = None
+        self.writer = Thread(target=self.write_batches, name='run stats writer', daemon=True)
+        self.writer.start()
+
+    def connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_path)
+        connection.execute('PRAGMA journal_mode=WAL')
+        # Losing the last batch in a power cut is fine, a sync on every commit isn't needed
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def record(self, duration: float, ticks: int, score: int, level: int, foods_eaten: int,
+               cheat_mode: bool, config: Dict[str, int]) -> None:
+        self.queue.put((time(), duration, ticks, score, level, foods_eaten, int(cheat_mode), json.dumps(config, sort_keys=True)))
+
+    def fail(self, error: Exception) -> None:
+        self.error = error
+        print(f"Note: Game stats won't be saved, {self.db_path} can't be written: {error}")
+
+    def write_batches(self) -> None:
+        # Errors stay in this thread: they are kept for query() and the queue keeps being emptied,
+        # so nothing waiting on the writer (flush, close) ever hangs
+        connection: Optional[sqlite3.Connection] = None
+        try:
+            connection = self.connect()
+            connection.executescript(SCHEMA)
+        except sqlite3.Error as error:
+            self.fail(error)
+        finally:
+            self.ready.set()
+        running = True
+        while running:
+            rows = [self.queue.get()]
+            # Give the next few rows a moment to arrive and write them together, None means stop
+            while rows[-1] is not None:
+                try:
+                    rows.append(self.queue.get(timeout=self.batch_delay))
+                except Empty:
+                    break
+            running = rows[-1] is not None
+            batch = rows if running else rows[:-1]
+            if batch and self.error is None:
+                try:
+                    with connection:
+                        connection.executemany(INSERT, batch)
+                except sqlite3.Error as error:
+                    self.fail(error)
+            for _ in rows:
+                self.queue.task_done()
+        if connection is not None:
+            connection.close()
+
+    def flush(self) -> None:
+        # Wait until everything recorded so far is in the file (or dropped, see error)
+        self.queue.join()
+
+    def close(self) -> None:
+        self.queue.put(None)
+        self.writer.join()
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+
+    def query(self, sql: str, parameters: Tuple = ()) -> List[Dict]:
+        if self.reader is None:
+            self.ready.wait()
+            if self.error is not None:
+                raise self.error
+            self.reader = self.connect()
+            self.reader.row_factory = sqlite3.Row
+        return [dict(row) for row in self.reader.execute(sql, parameters)]
+
+    def leaderboard(self, limit: int = 10, cheat_mode: bool = False) -> List[Dict]:
+        # Best games first, ties go to whoever got there first. Walks runs_leaderboard, no sorting
+        return self.query('SELECT * FROM runs WHERE cheat_mode = ? ORDER BY score DESC, finished LIMIT ?',
+                          (int(cheat_mode), limit))
+
+    def history(self, limit: int = 20) -> List[Dict]:
+        # Latest games first
+        return self.query('SELECT * FROM runs ORDER BY finished DESC LIMIT ?', (limit,))
+
+    def totals(self) -> Dict:
+        return self.query('SELECT COUNT(*) AS games, COALESCE(SUM(duration), 0) AS seconds, '
+                          'COALESCE(SUM(foods_eaten), 0) AS foods_eaten FROM runs')[0]
+
+
+def format_run(run: Dict) -> str:
+    finished = datetime.fromtimestamp(run['finished']).strftime('%Y-%m-%d %H:%M')
+    cheat = '  (cheat mode)' if run['cheat_mode'] else ''
+    return (f"{finished}  score {run['score']:>5}  level {run['level']:>3}  foods {run['foods_eaten']:>5}  "
+            f"{run['duration']:>7.1f}s{cheat}")
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Show the best and the latest games from the stats the game keeps')
+    parser.add_argument('--db', default='stats.db', help='stats file (default stats.db)')
+    parser.add_argument('--top', type=int, default=10, help='games on the leaderboard (default 10)')
+    parser.add_argument('--history', type=int, default=10, help='latest games to show (default 10)')
+    parser.add_argument('--cheat-mode', action='store_true', help='show the leaderboard of games played in cheat mode')
+    args = parser.parse_args()
+
+    stats = RunStats(args.db)
+    totals = stats.totals()
+    print(f"{totals['games']} games, {totals['seconds'] / 60:.0f} minutes played, {totals['foods_eaten']} foods eaten\n")
+    print("Leaderboard" + (" (cheat mode)" if args.cheat_mode else ""))
+    for place, run in enumerate(stats.leaderboard(args.top, args.cheat_mode), 1):
+        print(f"{place:>3}. {format_run(run)}")
+    print("\nLatest games")
+    for run in stats.history(args.history):
+        print(f"     {format_run(run)}")
+    stats.close()
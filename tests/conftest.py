@@ -0,0 +1,6 @@
+import os
+
+# No window or sound card is needed, and pygame's banner stays out of the test output
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
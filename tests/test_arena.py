@@ -0,0 +1,48 @@
+from collections import Counter
+from arena import ArenaEngine
+
+
+def check(arena: ArenaEngine) -> None:
+    # bodies, the free cells and the chunk index all agree with the snakes
+    segments = Counter(tile for snake in arena.snakes for tile in snake.segments)
+    assert arena.bodies == segments
+    assert set(arena.free_cells.blocked) == set(segments) | arena.foods
+    assert not any(snake.segments for snake in arena.snakes if not snake.alive)
+    if arena.body_chunks is not None:
+        assert Counter({(tile[0], tile[1], snake.id): count for snake in arena.snakes
+                        for tile, count in Counter(snake.segments).items()}) == Counter(
+            {pos: count for chunk in arena.body_chunks.chunks.values() for pos, count in chunk.items()})
+
+
+def test_ticks_keep_everything_in_sync():
+    arena = ArenaEngine(60, (60, 40), player=False, seed=1)
+    for tick in range(300):
+        arena.step()
+        if tick == 100:
+            arena.track_chunks(8)
+        if tick % 50 == 0:
+            check(arena)
+    check(arena)
+    assert any(snake.foods_eaten for snake in arena.snakes)
+
+
+def test_seeded_arenas_play_the_same():
+    runs = []
+    for _ in range(2):
+        arena = ArenaEngine(30, (40, 30), player=False, seed=2)
+        for _ in range(200):
+            arena.step()
+        runs.append([(snake.score, tuple(snake.segments)) for snake in arena.snakes])
+    assert runs[0] == runs[1]
+
+
+def test_player_dies_on_a_wall():
+    arena = ArenaEngine(0, (10, 10), seed=3)
+    player = arena.player
+    died = False
+    for _ in range(20):
+        died = arena.step((1, 0))
+        if died:
+            break
+    assert died
+    assert not player.alive
@@ -0,0 +1,30 @@
+import os
+import pygame as pg
+from assets import AssetLoader
+
+ASSET_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'assets')
+
+
+def test_sounds_load_in_the_background_and_are_cached(tmp_path):
+    pg.mixer.init()
+    for _ in range(2):
+        loader = AssetLoader(ASSET_DIR, str(tmp_path))
+        sound = loader.sound('eat.wav')
+        loader.wait()
+        assert sound.ready and not sound.failed
+        assert isinstance(sound.get(), pg.mixer.Sound)
+        sound.play()
+        loader.shutdown()
+    assert len(os.listdir(tmp_path)) == 1
+
+
+def test_a_sound_that_fails_to_load_is_reported_and_never_plays(tmp_path, capsys):
+    pg.mixer.init()
+    loader = AssetLoader(ASSET_DIR, str(tmp_path))
+    sound = loader.sound('missing.wav')
+    loader.wait()
+    assert sound.failed
+    assert sound.get() is None
+    sound.play()
+    assert "missing.wav can't be played" in capsys.readouterr().out
+    loader.shutdown()
@@ -0,0 +1,139 @@
+from collections import deque
+from random import Random
+from autopilot import INF, Autopilot, DistanceField
+from engine import SnakeEngine
+
+COLS, ROWS = 7, 5
+
+
+def around(cell: int):
+    x, y = cell % COLS, cell // COLS
+    return tuple(ny * COLS + nx for nx, ny in ((x, y - 1), (x, y + 1), (x - 1, y), (x + 1, y)) if 0 <= nx < COLS and 0 <= ny < ROWS)
+
+
+def bfs(blocked, sources):
+    # Distances from scratch, what the field has to agree with after any repair
+    dist = [INF] * len(blocked)
+    queue = deque(source for source in sources if not blocked[source])
+    for source in queue:
+        dist[source] = 0
+    while queue:
+        cell = queue.popleft()
+        for neighbour in around(cell):
+            if not blocked[neighbour] and dist[neighbour] > dist[cell] + 1:
+                dist[neighbour] = dist[cell] + 1
+                queue.append(neighbour)
+    return dist
+
+
+def random_change(field: DistanceField, rng: Random) -> None:
+    cell = rng.randrange(COLS * ROWS)
+    kind = rng.randrange(4)
+    if kind == 0 and not field.blocked[cell]:
+        field.block(cell)
+    elif kind == 1 and field.blocked[cell]:
+        field.unblock(cell)
+    elif kind == 2 and cell not in field.sources:
+        field.add_source(cell)
+    elif kind == 3 and cell in field.sources:
+        field.remove_source(cell)
+
+
+def test_repaired_field_matches_a_fresh_bfs():
+    for seed in range(300):
+        rng = Random(seed)
+        field = DistanceField(COLS * ROWS, around)
+        field.reset([], [rng.randrange(COLS * ROWS)])
+        assert field.update()
+        for _ in range(30):
+            random_change(field, rng)
+            assert field.update()
+            assert field.dist == bfs(field.blocked, field.sources)
+
+
+def test_updates_carry_on_after_running_out_of_time():
+    rng = Random(1)
+    field = DistanceField(COLS * ROWS, around)
+    field.reset([], [0])
+    for _ in range(40):
+        random_change(field, rng)
+    # A deadline in the past stops before anything is done, the changes stay queued in order
+    assert not field.update(deadline=0)
+    assert field.pending
+    assert field.update()
+    assert field.dist == bfs(field.blocked, field.sources)
+
+
+def test_big_board_rebuild_is_spread_over_calls():
+    cols, rows = 300, 300
+    field = DistanceField(cols * rows, lambda cell: tuple(
+        other for other, ok in ((cell - cols, cell >= cols), (cell + cols, cell < cols * (rows - 1)),
+                                (cell - 1, cell % cols > 0), (cell + 1, cell % cols < cols - 1)) if ok))
+    field.reset([], [0])
+    calls = 1
+    while not field.update(deadline=0):
+        calls += 1
+    assert calls > 10
+    assert field.dist[cols * rows - 1] == cols + rows - 2
+
+
+def test_cells_and_centers_map_back_and_forth():
+    engine = SnakeEngine((800, 650), 0)
+    autopilot = Autopilot(engine)
+    for position in engine.free_cells.positions[::37]:
+        assert autopilot.center(autopilot.cell_at(position)) == position
+    assert autopilot.cell_at((0, 0)) is None
+    assert autopilot.cell_at((engine.width, engine.height)) is None
+    assert autopilot.cell_at((25, 20)) is None
+    # The strip along the walls food never spawns on is still somewhere the snake can go
+    tile = engine.TILE_SIZE
+    edge = (engine.width // tile * tile - tile, engine.height // tile * tile - tile)
+    assert edge[0] > engine.free_cells.positions[-1][0] and edge[1] > engine.free_cells.positions[-1][1]
+    assert autopilot.center(autopilot.cell_at(edge)) == edge
+    assert autopilot.cell_at((edge[0] + tile, edge[1])) is None
+
+
+def test_field_follows_the_game():
+    engine = SnakeEngine((400, 300), 2)
+    autopilot = Autopilot(engine, budget_ms=1000)
+    for _ in range(600):
+        if engine.step(autopilot()):
+            engine.reset()
+        if engine.ticks % 50 == 0:
+            autopilot.sync()
+            autopilot.field.update()
+            blocked = [False] * len(autopilot.field.dist)
+            for cell in map(autopilot.cell_at, autopilot.body_count):
+                blocked[cell] = True
+            assert autopilot.field.blocked == blocked
+            assert autopilot.field.sources == {autopilot.cell_at(food.center) for food in engine.foods.foods}
+            fresh = DistanceField(len(blocked), autopilot.around)
+            fresh.reset([cell for cell, is_blocked in enumerate(blocked) if is_blocked], autopilot.field.sources)
+            fresh.update()
+            assert autopilot.field.dist == fresh.dist
+
+
+def test_never_heads_into_a_dead_end_along_the_wall():
+    # The head at the right wall, just below a pocket the body closes off: going up can't get back out
+    engine = SnakeEngine((400, 300), 4)
+    body = [(x, 20) for x in range(200, 360, 20)] + [(360, y) for y in range(20, 220, 20)] + [(380, 200)]
+    engine.snake.set_body(body)
+    engine.length, engine.snake_dir = len(body), (engine.TILE_SIZE, 0)
+    autopilot = Autopilot(engine, budget_ms=1000)
+    autopilot.sync()
+    autopilot.field.update()
+    assert autopilot.reaches_tail((380, 180), float('inf'), []) is False
+    assert autopilot.reaches_tail((380, 220), float('inf'), []) is True
+    assert autopilot() == (0, engine.TILE_SIZE)
+
+
+def test_plays_a_seeded_game_the_same_way_every_time():
+    scores = []
+    for _ in range(2):
+        engine = SnakeEngine((400, 300), 3)
+        autopilot = Autopilot(engine, budget_ms=1000)
+        while engine.ticks < 500 and not engine.step(autopilot()):
+            pass
+        scores.append((engine.score, engine.ticks))
+    assert scores[0] == scores[1]
+    assert scores[0][0] > 0
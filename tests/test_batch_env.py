@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+from autopilot import Autopilot
+from batch_env import DIRECTIONS, EMPTY, FOOD, SNAKE, BatchSnakeEnv
+from engine import SnakeEngine
+
+
+def check(env: BatchSnakeEnv) -> None:
+    # The board holds exactly the body in the ring buffer plus foods_left foods
+    for game in range(env.num_games):
+        cells = [env.body[game, (env.tail_ptr[game] + offset) % env.cells] for offset in range(env.size[game])]
+        snake = np.flatnonzero(env.board[game] == SNAKE)
+        assert sorted(cells) == sorted(snake.tolist())
+        assert cells[-1] == env.head_y[game] * env.cols + env.head_x[game]
+        assert np.count_nonzero(env.board[game] == FOOD) == env.foods_left[game]
+        assert env.size[game] <= env.length[game]
+        assert env.spawnable[env.board[game] == FOOD].all()
+
+
+def test_random_play_keeps_every_board_consistent():
+    env = BatchSnakeEnv(64, (260, 220), seed=1)
+    rng = np.random.default_rng(2)
+    finished = 0
+    for _ in range(300):
+        rewards, done = env.step(rng.integers(0, 4, env.num_games))
+        assert (rewards >= 0).all()
+        finished += int(done.sum())
+        check(env)
+    assert finished > 0
+    assert env.final_ticks.max() > 0
+
+
+def test_finished_games_start_over():
+    env = BatchSnakeEnv(4, (180, 180), seed=3)
+    # Straight up from the start hits the wall after start_y + 1 moves
+    for _ in range(env.start_y):
+        _, done = env.step(np.zeros(4, dtype=np.int64))
+        assert not done.any()
+    _, done = env.step(np.zeros(4, dtype=np.int64))
+    assert done.all()
+    assert (env.size == 1).all() and (env.ticks == 0).all()
+    assert (env.final_ticks == env.start_y + 1).all()
+    assert np.count_nonzero(env.board != EMPTY) == 4 * (1 + 5)
+
+
+def test_board_matches_the_engine():
+    engine = SnakeEngine((800, 650), 0)
+    env = BatchSnakeEnv(1, (800, 650), seed=0)
+    (left, top), cols, rows = engine.head_tiles()
+    tile = engine.TILE_SIZE
+    assert (env.cols, env.rows) == (cols, rows) == (39, 32)
+    assert (left + env.start_x * tile, top + env.start_y * tile) == engine.snake._snake.center
+    spawnable = {(left + cell % cols * tile, top + cell // cols * tile) for cell in np.flatnonzero(env.spawnable)}
+    assert spawnable == set(engine.free_cells.positions)
+
+
+@pytest.mark.parametrize('resolution, seed, ticks', [((400, 300), 1, 1500), ((100, 100), 2, 200), ((120, 100), 3, 300)])
+def test_plays_by_the_engine_rules(resolution, seed, ticks):
+    # One game played by the autopilot in both. The foods come from different random numbers, so the
+    # engine's foods are copied onto the env's board before every tick, the rest has to follow by itself
+    engine = SnakeEngine(resolution, seed)
+    env = BatchSnakeEnv(1, resolution, seed)
+    autopilot = Autopilot(engine, budget_ms=1000)
+    (left, top), cols, _ = engine.head_tiles()
+    tile = engine.TILE_SIZE
+    directions = [(int(dx) * tile, int(dy) * tile) for dx, dy in DIRECTIONS]
+
+    def cell(center):
+        return (center[1] - top) // tile * cols + (center[0] - left) // tile
+
+    endings = []
+    for _ in range(ticks):
+        board = env.board[0]
+        board[board == FOOD] = EMPTY
+        for food in engine.foods.foods:
+            board[cell(food.center)] = FOOD
+        env.foods_left[0] = len(engine.foods.foods)
+        direction = autopilot() or engine.snake_dir
+        game_over = engine.step(direction)
+        _, done = env.step(np.array([directions.index(direction)]))
+        assert done[0] == game_over
+        if game_over:
+            endings.append(len(engine.foods.foods) == 0)
+            assert (env.final_score[0], env.final_level[0], env.final_foods_eaten[0], env.final_ticks[0]) == \
+                   (engine.score, engine.level, engine.foods_eaten, engine.ticks)
+            engine.reset()
+            continue
+        body = [env.body[0, (env.tail_ptr[0] + index) % env.cells] for index in range(env.size[0])]
+        assert body == [cell(segment.center) for segment in engine.snake.segments]
+        assert (env.score[0], env.length[0], env.level[0], env.foods_eaten[0]) == \
+               (engine.score, engine.length, engine.level, engine.foods_eaten)
+    assert endings
+    # On the small boards the snake fills every food tile, which ends the game in both
+    assert all(endings) == (resolution != (400, 300))
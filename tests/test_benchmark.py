@@ -0,0 +1,28 @@
+from benchmark import board_path, compare, measure, set_snake
+from engine import SnakeEngine
+
+
+def test_only_real_slowdowns_are_regressions():
+    baseline = {'fast': 0.5, 'slow': 100.0, 'same': 10.0, 'gone': 1.0}
+    results = {'fast': 1.2, 'slow': 151.0, 'same': 10.5, 'new': 5.0}
+    # fast doubled but by less than a microsecond, new has nothing to compare with
+    assert compare(results, baseline, 0.5, 1.0) == ['slow: 100.00 us -> 151.00 us (1.51x)']
+    assert compare(results, baseline, 0.6, 1.0) == []
+    assert [line.split(':')[0] for line in compare(results, baseline, 0.5, 0.0)] == ['fast', 'slow']
+
+
+def test_board_path_is_a_snake_over_every_food_cell():
+    engine = SnakeEngine((400, 300), 1)
+    path = board_path(engine)
+    assert sorted(path) == sorted(engine.free_cells.cells)
+    for a, b in zip(path, path[1:]):
+        assert abs(a[0] - b[0]) + abs(a[1] - b[1]) == engine.TILE_SIZE
+    set_snake(engine, 100)
+    assert [segment.center for segment in engine.snake.segments] == path[:100]
+    assert engine.length == 100
+
+
+def test_measure_reports_microseconds_per_call():
+    calls = []
+    assert measure(lambda: calls.append(1), 1, repeat=2, min_time=0.001) > 0
+    assert len(calls) > 2
@@ -0,0 +1,46 @@
+from random import Random
+import pygame as pg
+from camera import Camera
+from spatial_index import ChunkIndex
+
+
+def test_query_finds_what_a_full_scan_finds():
+    rng = Random(1)
+    index = ChunkIndex(64)
+    positions = []
+    for _ in range(500):
+        pos = (rng.randrange(-300, 1000), rng.randrange(-300, 1000))
+        index.add(pos)
+        positions.append(pos)
+    for pos in positions[::3]:
+        index.remove(pos)
+        positions.remove(pos)
+    assert len(index) == len(positions)
+    for _ in range(50):
+        rect = pg.Rect(rng.randrange(-300, 900), rng.randrange(-300, 900), rng.randrange(1, 400), rng.randrange(1, 400))
+        assert sorted(index.query(rect)) == sorted({pos for pos in positions if rect.collidepoint(pos)})
+
+
+def test_positions_are_counted_and_can_carry_an_owner():
+    index = ChunkIndex(8)
+    index.add((3, 3, 1))
+    index.add((3, 3, 2))
+    index.add((3, 3, 2))
+    index.remove((3, 3, 2))
+    assert sorted(index.query(pg.Rect(0, 0, 8, 8))) == [(3, 3, 1), (3, 3, 2)]
+    index.remove((3, 3, 1))
+    index.remove((3, 3, 2))
+    assert not index.chunks
+    assert list(index.query(pg.Rect(0, 0, 8, 8))) == []
+
+
+def test_camera_follows_and_stops_at_the_edges():
+    camera = Camera((800, 600), (4000, 3000))
+    camera.follow((2000, 1500))
+    assert camera.rect.center == (2000, 1500)
+    camera.follow((10, 10))
+    assert camera.rect.topleft == (0, 0)
+    camera.follow((3990, 2990))
+    assert camera.rect.bottomright == (4000, 3000)
+    assert camera.to_screen(pg.Rect(3300, 2500, 20, 20)).topleft == (100, 100)
+    assert camera.visible_area(10).width == 820
@@ -0,0 +1,48 @@
+from engine import SnakeEngine
+
+
+def test_version_goes_up_when_the_foods_change():
+    engine = SnakeEngine((400, 300), 1)
+    foods = engine.foods
+    version = foods.version
+    foods.foods = foods.foods
+    assert foods.version == version
+    foods.changed()
+    assert foods.version == version + 1
+    foods.foods = list(foods.foods)
+    assert foods.version == version + 2
+
+
+def test_chunk_index_is_only_rebuilt_when_the_foods_change():
+    engine = SnakeEngine((400, 300), 2)
+    foods = engine.foods
+    chunks = foods.get_chunks(foods.foods, 100)
+    assert foods.get_chunks(foods.foods, 100) is chunks
+    foods.foods[0].center = (20, 20)
+    foods.changed()
+    rebuilt = foods.get_chunks(foods.foods, 100)
+    assert rebuilt is not chunks
+    assert sorted(rebuilt.query(engine.snake._snake.inflate(10000, 10000))) == sorted({food.center for food in foods.foods})
+
+
+def test_eating_a_food_changes_the_version():
+    engine = SnakeEngine((400, 300), 3)
+    food = engine.foods.foods[0]
+    engine.free_cells.unblock(food.center)
+    food.center = (engine.snake._snake.centerx + engine.TILE_SIZE, engine.snake._snake.centery)
+    engine.free_cells.block(food.center)
+    engine.foods.changed()
+    version = engine.foods.version
+    engine.step((engine.TILE_SIZE, 0))
+    assert engine.foods_eaten == 1
+    assert engine.foods.version > version
+    assert food not in engine.foods.foods
+
+
+def test_foods_and_snake_block_their_cells():
+    engine = SnakeEngine((400, 300), 4)
+    for _ in range(50):
+        if engine.step((engine.TILE_SIZE, 0) if engine.ticks % 10 < 5 else (0, engine.TILE_SIZE)):
+            engine.reset()
+        blocked = {food.center for food in engine.foods.foods} | set(engine.snake.occupancy)
+        assert set(engine.free_cells.blocked) == blocked & set(engine.free_cells.slots)
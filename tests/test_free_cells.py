@@ -0,0 +1,112 @@
+from collections import Counter
+from random import Random
+from array import array
+from free_cells import FreeCells
+
+CELLS = [(x, y) for x in range(0, 100, 20) for y in range(0, 80, 20)]
+
+
+def check(free_cells: FreeCells) -> None:
+    # Free cells are the front of cells, blocked ones the back, and slots always points at the right index
+    assert sorted(free_cells.cells) == sorted(CELLS)
+    for slot, cell in enumerate(free_cells.cells):
+        assert free_cells.slots[cell] == slot
+        assert (cell in free_cells) == (slot < free_cells.free) == (cell not in free_cells.blocked)
+    assert len(free_cells) == len(CELLS) - len(free_cells.blocked)
+
+
+def test_block_and_unblock_swap_cells_to_either_side():
+    free_cells = FreeCells(CELLS)
+    free_cells.block((20, 20))
+    assert (20, 20) not in free_cells
+    assert free_cells.cells[-1] == (20, 20)
+    check(free_cells)
+    free_cells.unblock((20, 20))
+    assert (20, 20) in free_cells
+    check(free_cells)
+
+
+def test_a_cell_stays_blocked_until_everything_on_it_left():
+    free_cells = FreeCells(CELLS)
+    free_cells.block((0, 0))
+    free_cells.block((0, 0))
+    free_cells.unblock((0, 0))
+    assert (0, 0) not in free_cells
+    free_cells.unblock((0, 0))
+    assert (0, 0) in free_cells
+    check(free_cells)
+
+
+def test_cells_off_the_board_are_ignored():
+    free_cells = FreeCells(CELLS)
+    free_cells.block((-20, 0))
+    free_cells.unblock((5, 5))
+    free_cells.unblock((0, 0))
+    assert len(free_cells) == len(CELLS)
+    check(free_cells)
+
+
+def test_random_blocks_and_unblocks_keep_the_invariants():
+    free_cells = FreeCells(CELLS)
+    rng = Random(1)
+    for _ in range(2000):
+        cell = rng.choice(CELLS)
+        if rng.random() < 0.5:
+            free_cells.block(cell)
+        else:
+            free_cells.unblock(cell)
+    check(free_cells)
+
+
+def test_sample_picks_distinct_free_cells_and_blocks_them():
+    free_cells = FreeCells(CELLS)
+    free_cells.block((0, 0))
+    picked = free_cells.sample(10, Random(2))
+    assert len(set(picked)) == 10
+    assert (0, 0) not in picked
+    assert not any(cell in free_cells for cell in picked)
+    # A full board gives what is left
+    assert len(free_cells.sample(100, Random(3))) == len(CELLS) - 11
+    assert free_cells.sample(1, Random(4)) == []
+    check(free_cells)
+
+
+def test_sample_only_depends_on_the_seed_and_the_moves_before():
+    runs = []
+    for _ in range(2):
+        free_cells = FreeCells(CELLS)
+        for cell in CELLS[::3]:
+            free_cells.block(cell)
+        free_cells.unblock(CELLS[3])
+        runs.append(free_cells.sample(5, Random(5)))
+    assert runs[0] == runs[1]
+
+
+def test_journal_records_both_slots_of_every_swap():
+    free_cells = FreeCells(CELLS)
+    free_cells.journal = array('I')
+    replayed = list(CELLS)
+    rng = Random(6)
+    for _ in range(200):
+        cell = rng.choice(CELLS)
+        free_cells.block(cell) if rng.random() < 0.6 else free_cells.unblock(cell)
+    for index in range(0, len(free_cells.journal), 2):
+        slot, other = free_cells.journal[index], free_cells.journal[index + 1]
+        replayed[slot], replayed[other] = replayed[other], replayed[slot]
+    assert replayed == free_cells.cells
+
+
+def test_displaced_and_restore_put_the_order_back():
+    free_cells = FreeCells(CELLS)
+    rng = Random(7)
+    for cell in rng.sample(CELLS, 8):
+        free_cells.block(cell)
+    displaced, blocked, order = free_cells.displaced(), Counter(free_cells.blocked), list(free_cells.cells)
+    assert all(free_cells.cells[slot] != free_cells.positions[slot] for slot in displaced)
+    for cell in rng.sample(CELLS, 8):
+        free_cells.unblock(cell)
+        free_cells.block(rng.choice(CELLS))
+    free_cells.restore(displaced, blocked)
+    assert free_cells.cells == order
+    assert free_cells.blocked == blocked
+    check(free_cells)
@@ -0,0 +1,58 @@
+import pygame as pg
+from particle import ParticleSystem
+
+
+class Game:
+    seed = 1
+
+
+def test_particles_live_for_their_lifetime():
+    particles = ParticleSystem(Game(), capacity=256)
+    particles.emit((100, 100), (255, 0, 0))
+    assert len(particles) == particles.particle_count
+    for _ in range(particles.particle_lifetime - 1):
+        particles.update()
+    assert len(particles) == particles.particle_count
+    particles.update()
+    assert len(particles) == 0
+
+
+def test_a_full_buffer_keeps_the_live_particles_and_cuts_new_bursts_short():
+    particles = ParticleSystem(Game(), capacity=50)
+    particles.emit((100, 100), (0, 0, 255))
+    particles.update()
+    particles.emit((200, 200), (255, 0, 0))
+    # Only 10 of the 20 particles of this burst fit, the older ones are all kept
+    particles.emit((300, 300), (255, 0, 0))
+    assert len(particles) == 50
+    particles.emit((400, 400), (255, 0, 0))
+    assert len(particles) == 50
+    lifetime = particles.particle_lifetime
+    assert particles.lifetime[:50].tolist() == [lifetime - 1] * 20 + [lifetime] * 30
+    assert (abs(particles.pos[:20] - 100) <= 1).all()
+    assert (particles.pos[20:40] == 200).all() and (particles.pos[40:50] == 300).all()
+    assert particles.palette == [(0, 0, 255, 255), (255, 0, 0, 255)]
+    # Once the first burst has died its room goes to new ones
+    for _ in range(lifetime - 1):
+        particles.update()
+    assert len(particles) == 30
+    particles.emit((400, 400), (255, 0, 0))
+    assert len(particles) == 50
+    assert (particles.pos[particles.end - 20:particles.end] == 400).all()
+
+
+def test_draw_puts_every_particle_where_it_is():
+    particles = ParticleSystem(Game(), capacity=256)
+    for x in range(5):
+        particles.emit((40 + x * 30, 50), (255, 0, 0))
+    for _ in range(10):
+        particles.update()
+    for offset in ((0, 0), (13, -7)):
+        surface = pg.Surface((300, 200))
+        particles.draw(surface, offset)
+        expected = pg.Surface((300, 200))
+        for color, pos in zip(particles.color[particles.start:particles.end], particles.pos[particles.start:particles.end]):
+            expected.blit(particles.sprites[color], (int(pos[0]) - offset[0], int(pos[1]) - offset[1]))
+        assert pg.image.tobytes(surface, 'RGB') == pg.image.tobytes(expected, 'RGB')
+    x, y = particles.pos[particles.start]
+    assert particles.get_bounds().collidepoint(int(x), int(y))
@@ -0,0 +1,36 @@
+from time import sleep
+import pygame as pg
+from profiler import PHASES, FrameProfiler
+
+
+class Game:
+    # Just the parts of SnakeGame the profiler wraps, optional ones switched off
+    snake = foods = sprites = particles = None
+
+    def __init__(self) -> None:
+        self.screen = pg.Surface((800, 600))
+
+
+for _, method_name, _ in PHASES:
+    setattr(Game, method_name, lambda self: None)
+
+
+def test_the_frame_the_profiler_is_turned_on_in_is_timed_from_then():
+    game = Game()
+    profiler = FrameProfiler(game)
+    sleep(0.05)
+    # Like F3: turned on during handle_events, the frame wasn't begun but is still ended
+    profiler.toggle()
+    game.step()
+    profiler.end_frame()
+    assert profiler.frame_times[-1] < 40
+    assert profiler.phase_times['tick'][-1] >= 0
+
+    profiler.toggle()
+    sleep(0.05)
+    profiler.toggle()
+    profiler.end_frame()
+    assert list(profiler.frame_times) == [profiler.frame_times[-1]]
+    assert profiler.frame_times[-1] < 40
+    profiler.toggle()
+    assert 'step' not in vars(game)
@@ -0,0 +1,84 @@
+import pytest
+from autopilot import Autopilot
+from engine import SnakeEngine
+from replay import HEADER, HEADERS, MAGIC, RESTART, Replay, ReplayRecorder, play_headless, verify
+
+
+def record_game(seed: int, ticks: int) -> Replay:
+    # An autopilot game with a restart in the middle, recorded like the game records a player
+    engine = SnakeEngine((400, 300), seed)
+    recorder = ReplayRecorder(engine)
+    autopilot = Autopilot(engine, budget_ms=1000)
+    for tick in range(ticks):
+        if tick == ticks // 2:
+            engine.restart()
+        direction = autopilot()
+        if direction is not None:
+            engine.turn(direction)
+        if engine.step():
+            engine.restart()
+    return recorder.replay
+
+
+def test_round_trip():
+    replay = record_game(1, 400)
+    loaded = Replay.from_bytes(replay.to_bytes())
+    assert vars(loaded) == vars(replay)
+    assert (400 // 2, RESTART) in loaded.events
+
+
+def test_long_gaps_between_events():
+    replay = Replay(3, (800, 650), SnakeEngine().get_config())
+    replay.events = [(0, 5), (200, 2), (70000, RESTART), (70000, 7)]
+    replay.ticks = 70001
+    assert Replay.from_bytes(replay.to_bytes()).events == replay.events
+
+
+def test_played_back_game_ends_the_same():
+    replay = record_game(2, 600)
+    assert verify(Replay.from_bytes(replay.to_bytes()))
+    replay.score += 1
+    assert not verify(replay)
+
+
+def test_playback_follows_the_recording_tick_by_tick():
+    engine = SnakeEngine((400, 300), 4)
+    recorder = ReplayRecorder(engine)
+    autopilot = Autopilot(engine, budget_ms=1000)
+    heads = []
+    for _ in range(300):
+        if engine.step(autopilot()):
+            engine.restart()
+        heads.append(engine.snake.segments[-1].center)
+    player = play_headless(recorder.replay)
+    assert player.engine.snake.segments[-1].center == heads[-1]
+    assert player.engine.ticks == engine.ticks
+
+
+def test_worlds_bigger_than_16_bits():
+    replay = Replay(5, (4000 * 20, 3500 * 20), SnakeEngine().get_config())
+    assert Replay.from_bytes(replay.to_bytes()).resolution == (80000, 70000)
+
+
+def test_version_1_files_still_load():
+    replay = record_game(6, 200)
+    data = replay.to_bytes()
+    fields = HEADER.unpack_from(data)
+    old = HEADERS[1].pack(MAGIC, 1, *fields[2:]) + data[HEADER.size:]
+    assert vars(Replay.from_bytes(old)) == vars(replay)
+
+
+def cut_short(length: int) -> bytes:
+    # A file the game stopped writing part of the way, the second event's tick takes two bytes
+    replay = Replay(7, (400, 300), SnakeEngine().get_config())
+    replay.events = [(0, 5), (200, 2), (201, RESTART)]
+    data = replay.to_bytes()
+    return data[:length if length >= 0 else len(data) + length]
+
+
+@pytest.mark.parametrize('data', [b'', b'SNKR', b'NOPE' + bytes(100), b'SNKR\x09' + bytes(100), cut_short(40),
+                                  cut_short(HEADER.size - 1), cut_short(HEADER.size), cut_short(HEADER.size + 3),
+                                  cut_short(-1)])
+def test_other_files_are_rejected(data):
+    with pytest.raises(ValueError):
+        Replay.from_bytes(data)
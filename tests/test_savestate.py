@@ -0,0 +1,124 @@
+import pytest
+from autopilot import Autopilot
+from engine import SnakeEngine
+from savestate import FORMATS, HEADER, MAGIC, POINT, SLOT, RewindBuffer, Snapshot, unpack_path
+
+
+def play(engine: SnakeEngine, autopilot: Autopilot, ticks: int, rewind=None, states=None) -> None:
+    for _ in range(ticks):
+        if engine.step(autopilot()):
+            engine.reset()
+        if rewind is not None:
+            rewind.capture()
+        if states is not None:
+            states.append(Snapshot.capture(engine).to_bytes())
+
+
+def test_snapshot_round_trip():
+    engine = SnakeEngine((400, 300), 1)
+    play(engine, Autopilot(engine, budget_ms=1000), 300)
+    data = Snapshot.capture(engine).to_bytes()
+    assert Snapshot.from_bytes(data).to_bytes() == data
+
+
+def test_restored_game_carries_on_exactly_the_same():
+    engine = SnakeEngine((400, 300), 2)
+    play(engine, Autopilot(engine, budget_ms=1000), 200)
+    snapshot = Snapshot.capture(engine)
+    later = []
+    play(engine, Autopilot(engine, budget_ms=1000), 200, states=later)
+
+    other = SnakeEngine((400, 300), 99)
+    Snapshot.from_bytes(snapshot.to_bytes()).restore(other)
+    assert Snapshot.capture(other).to_bytes() == snapshot.to_bytes()
+    again = []
+    play(other, Autopilot(other, budget_ms=1000), 200, states=again)
+    assert again == later
+
+
+def test_rewinding_gives_byte_identical_snapshots():
+    engine = SnakeEngine((400, 300), 3)
+    rewind = RewindBuffer(engine, keyframe_interval=25)
+    states = []
+    play(engine, Autopilot(engine, budget_ms=1000), 400, rewind, states)
+    for ticks_back in (0, 1, 24, 25, 26, 99, 250):
+        assert rewind.snapshot(ticks_back).to_bytes() == states[-1 - ticks_back]
+    # Going back for real, then playing on and going back again
+    assert rewind.rewind(60) == 60
+    assert Snapshot.capture(engine).to_bytes() == states[-61]
+    del states[-60:]
+    play(engine, Autopilot(engine, budget_ms=1000), 30, rewind, states)
+    assert rewind.rewind(45) == 45
+    assert Snapshot.capture(engine).to_bytes() == states[-46]
+
+
+def test_rewind_memory_is_bounded():
+    engine = SnakeEngine((400, 300), 4)
+    rewind = RewindBuffer(engine, capacity=20000, keyframe_interval=20)
+    play(engine, Autopilot(engine, budget_ms=1000), 800, rewind)
+    assert rewind.size <= 20000
+    assert 0 < len(rewind) < 800
+    assert rewind.entries[0].startswith(MAGIC)
+    rewind.snapshot(len(rewind))
+
+
+def test_loading_checks_the_board():
+    engine = SnakeEngine((400, 300), 5)
+    snapshot = Snapshot.capture(engine)
+    with pytest.raises(ValueError):
+        snapshot.restore(SnakeEngine((800, 650), 5))
+    with pytest.raises(ValueError):
+        Snapshot.from_bytes(b'SNKR' + bytes(100))
+
+
+def test_cut_short_files_are_rejected():
+    engine = SnakeEngine((400, 300), 8)
+    play(engine, Autopilot(engine, budget_ms=1000), 200)
+    data = Snapshot.capture(engine).to_bytes()
+    for length in (5, 40, HEADER.size, HEADER.size + 1, HEADER.size + 10, len(data) - 100, len(data) - 1):
+        with pytest.raises(ValueError):
+            Snapshot.from_bytes(data[:length])
+
+
+def test_saving_never_leaves_a_half_written_file(tmp_path, monkeypatch):
+    engine = SnakeEngine((400, 300), 9)
+    path = str(tmp_path / 'quicksave.state')
+    Snapshot.capture(engine).save(path)
+    saved = Snapshot.load(path).to_bytes()
+    engine.step((engine.TILE_SIZE, 0))
+    snapshot = Snapshot.capture(engine)
+
+    def fail():
+        raise OSError('disk full')
+    monkeypatch.setattr(snapshot, 'to_bytes', fail)
+    with pytest.raises(OSError):
+        snapshot.save(path)
+    assert Snapshot.load(path).to_bytes() == saved
+    monkeypatch.undo()
+    snapshot.save(path)
+    assert Snapshot.load(path).ticks == 1
+    assert [entry.name for entry in tmp_path.iterdir()] == ['quicksave.state']
+
+
+def test_worlds_bigger_than_16_bits():
+    engine = SnakeEngine((4000 * 20, 4 * 20), 6)
+    play(engine, Autopilot(engine, budget_ms=1000), 100)
+    data = Snapshot.capture(engine).to_bytes()
+    assert Snapshot.from_bytes(data).to_bytes() == data
+
+
+def test_version_1_files_still_load():
+    engine = SnakeEngine((400, 300), 7)
+    play(engine, Autopilot(engine, budget_ms=1000), 300)
+    data = Snapshot.capture(engine).to_bytes()
+    old_header, old_slot = FORMATS[1]
+    fields = HEADER.unpack_from(data)
+    segment_count, food_count, displaced_count = fields[-3:]
+    _, offset = unpack_path(data, HEADER.size, segment_count, None, engine.TILE_SIZE)
+    offset += food_count * POINT.size
+    old = bytearray(old_header.pack(MAGIC, 1, *fields[2:])) + data[HEADER.size:offset]
+    for index in range(displaced_count):
+        old += old_slot.pack(*SLOT.unpack_from(data, offset + index * SLOT.size))
+    old += data[offset + displaced_count * SLOT.size:]
+    assert displaced_count > 0
+    assert Snapshot.from_bytes(bytes(old)).to_bytes() == data
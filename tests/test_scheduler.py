@@ -0,0 +1,37 @@
+from scheduler import FixedStepScheduler
+
+
+def test_one_tick_per_step_of_frame_time():
+    scheduler = FixedStepScheduler(100)
+    ticks = []
+    for _ in range(10):
+        scheduler.update(30, lambda: ticks.append(1) and False)
+    assert len(ticks) == 3
+    assert scheduler.alpha == 0.0
+    # 2.5 steps of frame time: two ticks and half way to the next one
+    scheduler.update(250, lambda: ticks.append(1) and False)
+    assert len(ticks) == 5
+    assert scheduler.alpha == 0.5
+
+
+def test_slow_frames_catch_up_a_limited_number_of_ticks():
+    scheduler = FixedStepScheduler(10, max_catch_up=5)
+    ticks = []
+    scheduler.update(1000, lambda: ticks.append(1) and False)
+    assert len(ticks) == 5
+
+
+def test_a_tick_returning_true_stops_the_frame():
+    scheduler = FixedStepScheduler(10)
+    ticks = []
+    assert scheduler.update(45, lambda: ticks.append(1) or len(ticks) == 2)
+    assert len(ticks) == 2
+    assert scheduler.accumulator == 0
+
+
+def test_turbo_runs_ticks_for_its_budget():
+    scheduler = FixedStepScheduler(100, turbo=True, turbo_budget_ms=5)
+    ticks = []
+    scheduler.update(0, lambda: ticks.append(1) and False)
+    assert len(ticks) > 1
+    assert scheduler.alpha == 1.0
@@ -0,0 +1,38 @@
+import sqlite3
+import pytest
+from stats import RunStats, format_run
+
+CONFIG = {'time_step': 100, 'length': 1}
+
+
+def test_recorded_games_show_up_in_the_leaderboard_and_history(tmp_path):
+    stats = RunStats(str(tmp_path / 'stats.db'), batch_delay=0.01)
+    for score in (3, 10, 7):
+        stats.record(12.5, 100, score, 2, score, False, CONFIG)
+    stats.record(1.0, 10, 50, 1, 50, True, CONFIG)
+    stats.flush()
+    assert [run['score'] for run in stats.leaderboard()] == [10, 7, 3]
+    assert [run['score'] for run in stats.leaderboard(cheat_mode=True)] == [50]
+    assert [run['score'] for run in stats.history(2)] == [50, 7]
+    assert stats.totals() == {'games': 4, 'seconds': 38.5, 'foods_eaten': 70}
+    assert 'score    10' in format_run(stats.leaderboard(1)[0])
+    stats.close()
+
+
+def test_games_are_kept_between_runs(tmp_path):
+    stats = RunStats(str(tmp_path / 'stats.db'), batch_delay=0.01)
+    stats.record(5.0, 50, 4, 1, 4, False, CONFIG)
+    stats.close()
+    stats = RunStats(str(tmp_path / 'stats.db'))
+    assert stats.totals()['games'] == 1
+    stats.close()
+
+
+def test_a_file_that_cannot_be_opened_never_hangs(tmp_path):
+    stats = RunStats(str(tmp_path / 'missing' / 'stats.db'), batch_delay=0.01)
+    stats.record(5.0, 50, 4, 1, 4, False, CONFIG)
+    stats.flush()
+    assert isinstance(stats.error, sqlite3.Error)
+    with pytest.raises(sqlite3.Error):
+        stats.leaderboard()
+    stats.close()
@@ -0,0 +1,20 @@
+import pygame as pg
+from text_cache import TextCache
+
+
+def test_lines_are_rendered_once_and_old_ones_dropped():
+    pg.font.init()
+    font = pg.font.Font(None, 20)
+    cache = TextCache(max_size=2)
+    first = cache.render(font, 'a')
+    assert cache.render(font, 'a') is first
+    cache.render(font, 'b')
+    cache.render(font, 'a')
+    cache.render(font, 'c')
+    # b was the least recently used
+    assert list(key[1] for key in cache.surfaces) == ['a', 'c']
+    pinned = cache.pin(font, 'Game over')
+    for text in 'defg':
+        cache.render(font, text)
+    assert cache.render(font, 'Game over') is pinned
+    assert len(cache) == 3
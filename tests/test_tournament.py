@@ -0,0 +1,21 @@
+from tournament import play_game, shard_seeds
+
+
+def test_shards_split_the_seeds_without_overlap():
+    shards = [shard_seeds(0, 99, shard, 4) for shard in range(4)]
+    assert sorted(seed for shard in shards for seed in shard) == list(range(100))
+    assert shards[1][:3] == [1, 5, 9]
+    assert shard_seeds(10, 12) == [10, 11, 12]
+
+
+def test_games_only_depend_on_the_seed():
+    first = play_game('greedy_bot', 7, 300)
+    second = play_game('greedy_bot', 7, 300)
+    first.pop('seconds'), second.pop('seconds')
+    assert first == second
+    assert first['outcome'] in ('died', 'cleared', 'timeout')
+
+
+def test_autopilot_plays_as_a_bot():
+    result = play_game('autopilot', 1, 300)
+    assert result['score'] > 0
@@ -0,0 +1,37 @@
+from collections import OrderedDict
+from typing import Dict, Tuple
+import pygame as pg
+
+class TextCache:
+    # Rendered text surfaces keyed on (font, text, color). Font rendering is slow and the HUD
+    # values rarely change, so a line is only rendered again when its text does. The least
+    # recently used surfaces are dropped once there are more than max_size of them.
+    def __init__(self, max_size: int = 64) -> None:
+        self.max_size = max_size
+        self.surfaces: OrderedDict = OrderedDict()
+        # Static strings that are rendered once and never evicted
+        self.pinned: Dict[Tuple, pg.Surface] = {}
+
+    def __len__(self) -> int:
+        return len(self.surfaces) + len(self.pinned)
+
+    def pin(self, font: pg.font.Font, text: str, color='white') -> pg.Surface:
+        key = (font, text, color)
+        if key not in self.pinned:
+            self.pinned[key] = font.render(text, True, color)
+        return self.pinned[key]
+
+    def render(self, font: pg.font.Font, text: str, color='white') -> pg.Surface:
+        key = (font, text, color)
+        surface = self.pinned.get(key)
+        if surface is not None:
+            return surface
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+        surface = font.render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
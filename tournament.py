@@ -0,0 +1,139 @@
+import importlib
+import importlib.util
+import json
+import os
+import signal
+import sys
+from argparse import ArgumentParser
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from statistics import mean, median, pstdev
+from time import perf_counter
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+# pygame's import banner would end up between the JSON lines on stdout
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+from engine import SnakeEngine
+
+# Bots are loaded once per worker process
+_bots: Dict[str, Callable] = {}
+
+
+def load_bot(bot: str) -> Callable:
+    # A module name (greedy_bot) or the path to a .py file, with a create_bot(engine) function
+    if bot not in _bots:
+        if bot.endswith('.py'):
+            spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(bot))[0], bot)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        else:
+            module = importlib.import_module(bot)
+        _bots[bot] = module.create_bot
+    return _bots[bot]
+
+
+def play_game(bot: str, seed: int, max_ticks: int, resolution: Tuple[int, int] = (800, 650)) -> Dict:
+    # One game with the default rules, everything in it follows from the seed
+    engine = SnakeEngine(resolution, seed)
+    act = load_bot(bot)(engine)
+    start = perf_counter()
+    outcome = 'timeout'
+    while engine.ticks < max_ticks:
+        direction = act()
+        if direction is not None:
+            engine.turn(direction)
+        if engine.step():
+            # step() also ends the game when the snake fills the board
+            outcome = 'died' if engine.is_game_over() else 'cleared'
+            break
+    return {'seed': seed, 'score': engine.score, 'level': engine.level, 'foods_eaten': engine.foods_eaten,
+            'ticks': engine.ticks, 'outcome': outcome, 'seconds': round(perf_counter() - start, 4)}
+
+
+def ignore_interrupts() -> None:
+    # Ctrl+C goes to the whole process group, only the parent should handle it
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def shard_seeds(first: int, last: int, shard: int = 0, shards: int = 1) -> List[int]:
+    # Shard i of n gets every n-th seed starting at first + i, the same split on every machine
+    return list(range(first + shard, last + 1, shards))
+
+
+def run_tournament(bot: str, seeds: List[int], max_ticks: int, workers: Optional[int] = None,
+                   max_pending: Optional[int] = None) -> Iterator[Dict]:
+    # Yields results as games finish. Only a few games per worker are queued at a time, so
+    # stopping early (Ctrl+C or closing the generator) doesn't wait for thousands of queued games.
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 4
+    executor = ProcessPoolExecutor(workers, initializer=ignore_interrupts)
+    pending: Dict[Future, int] = {}
+    remaining = iter(seeds)
+    try:
+        while True:
+            for seed in remaining:
+                pending[executor.submit(play_game, bot, seed, max_ticks)] = seed
+                if len(pending) >= max_pending:
+                    break
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                del pending[future]
+                yield future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def summarize(results: List[Dict]) -> Dict:
+    summary = {'games': len(results)}
+    if not results:
+        return summary
+    for field in ('score', 'level', 'foods_eaten', 'ticks'):
+        values = sorted(result[field] for result in results)
+        summary[field] = {'mean': round(mean(values), 3), 'stdev': round(pstdev(values), 3), 'median': median(values),
+                          'p10': values[len(values) // 10], 'p90': values[len(values) * 9 // 10],
+                          'min': values[0], 'max': values[-1]}
+    outcomes: Dict[str, int] = {}
+    for result in results:
+        outcomes[result['outcome']] = outcomes.get(result['outcome'], 0) + 1
+    summary['outcomes'] = outcomes
+    best = max(results, key=lambda result: (result['score'], -result['seed']))
+    summary['best_seed'] = best['seed']
+    return summary
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Play a bot through many seeded games on all cores and sum up how it did')
+    parser.add_argument('bot', help='bot module name or .py file with a create_bot(engine) function')
+    parser.add_argument('--seeds', default='0-999', metavar='FIRST-LAST', help='seed range, both ends included (default 0-999)')
+    parser.add_argument('--shard', default='0/1', metavar='I/N', help='only play shard I of N of the seeds, for splitting a run across machines')
+    parser.add_argument('--workers', type=int, help='worker processes (default: one per core)')
+    parser.add_argument('--max-ticks', type=int, default=20000, help='end a game after this many ticks (default 20000)')
+    parser.add_argument('--out', metavar='FILE', help='write one JSON line per game here (default: stdout)')
+    args = parser.parse_args()
+
+    first, last = (int(seed) for seed in args.seeds.split('-'))
+    shard, shards = (int(number) for number in args.shard.split('/'))
+    seeds = shard_seeds(first, last, shard, shards)
+    # Fail here rather than once in every worker
+    load_bot(args.bot)
+
+    out = sys.stdout if args.out is None else open(args.out, 'w')
+    results = []
+    start = perf_counter()
+    try:
+        for result in run_tournament(args.bot, seeds, args.max_ticks, args.workers):
+            results.append(result)
+            out.write(json.dumps(result) + '\n')
+            out.flush()
+    except KeyboardInterrupt:
+        print(f"Cancelled after {len(results)} of {len(seeds)} games", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    # Summary on stderr, so stdout stays one JSON result per line
+    elapsed = perf_counter() - start
+    summary = summarize(results)
+    summary['seconds'] = round(elapsed, 2)
+    print(json.dumps(summary, indent=2), file=sys.stderr)
+    exit(130 if len(results) < len(seeds) else 0)